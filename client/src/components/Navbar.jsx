@@ -126,10 +126,9 @@ const Navbar = () => {
                 className="w-10 rounded-full object-contain"
                 src={
                   user?.profilePhoto
-                    ? `http://localhost:5000/${user.profilePhoto.replace(
-                        /\\/g,
-                        "/"
-                      )}`
+                    ? `http://localhost:5000/${user.profilePhoto
+                        .replace(/\\/g, "/")
+                        .replace(/-256\.webp$/, "-64.webp")}`
                     : "/default-avatar.png"
                 }
                 alt=""
@@ -0,0 +1,91 @@
+// Compact behavioral telemetry: fixed-size ring buffers for sampled pointer
+// moves and clicks, and a delta/varint encoder for the batches the collector
+// ships with navigator.sendBeacon. The server decodes the same layout in
+// server/utils/behaviorTelemetry.js.
+
+export const BEHAVIOR_CONTENT_TYPE = 'application/x-nextbuy-behavior';
+export const FORMAT_VERSION = 1;
+export const POSITION_QUANTUM = 4; // pixels per encoded unit
+
+// Ring buffer of [time, x, y] samples; the oldest sample is overwritten when full
+export const createSampleRing = (capacity) => {
+  const times = new Float64Array(capacity);
+  const xs = new Int32Array(capacity);
+  const ys = new Int32Array(capacity);
+  let start = 0;
+  let size = 0;
+
+  return {
+    get size() {
+      return size;
+    },
+    push(time, x = 0, y = 0) {
+      const index = (start + size) % capacity;
+      times[index] = time;
+      xs[index] = x;
+      ys[index] = y;
+      if (size < capacity) {
+        size++;
+      } else {
+        start = (start + 1) % capacity;
+      }
+    },
+    // Visit samples from oldest to newest
+    forEach(callback) {
+      for (let i = 0; i < size; i++) {
+        const index = (start + i) % capacity;
+        callback(times[index], xs[index], ys[index]);
+      }
+    },
+    last() {
+      return size > 0 ? times[(start + size - 1) % capacity] : null;
+    },
+    clear() {
+      start = 0;
+      size = 0;
+    }
+  };
+};
+
+const writeVarint = (bytes, value) => {
+  let remaining = Math.max(0, Math.round(value));
+  while (remaining >= 0x80) {
+    bytes.push((remaining % 0x80) | 0x80);
+    remaining = Math.floor(remaining / 0x80);
+  }
+  bytes.push(remaining);
+};
+
+const writeZigzag = (bytes, value) => {
+  writeVarint(bytes, value >= 0 ? value * 2 : -value * 2 - 1);
+};
+
+// Encode one batch: moves and clicks are ring buffers, formFillTime is ms or null
+export const encodeBehaviorBatch = ({ moves, clicks, formFillTime }) => {
+  const bytes = [FORMAT_VERSION];
+  writeVarint(bytes, formFillTime === null || formFillTime === undefined ? 0 : formFillTime + 1);
+
+  writeVarint(bytes, moves.size);
+  let previousTime = null;
+  let previousX = 0;
+  let previousY = 0;
+  moves.forEach((time, x, y) => {
+    const qx = Math.round(x / POSITION_QUANTUM);
+    const qy = Math.round(y / POSITION_QUANTUM);
+    writeVarint(bytes, previousTime === null ? 0 : time - previousTime);
+    writeZigzag(bytes, qx - previousX);
+    writeZigzag(bytes, qy - previousY);
+    previousTime = time;
+    previousX = qx;
+    previousY = qy;
+  });
+
+  writeVarint(bytes, clicks.size);
+  previousTime = null;
+  clicks.forEach((time) => {
+    writeVarint(bytes, previousTime === null ? 0 : time - previousTime);
+    previousTime = time;
+  });
+
+  return Uint8Array.from(bytes);
+};
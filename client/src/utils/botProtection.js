@@ -1,43 +1,38 @@
-import FingerprintJS from '@fingerprintjs/fingerprintjs';
 import axios from 'axios';
+import FingerprintJS from '@fingerprintjs/fingerprintjs';
+import { BEHAVIOR_CONTENT_TYPE, createSampleRing, encodeBehaviorBatch } from './behaviorTelemetry';
 
 // Initialize fingerprint library
 const fpPromise = FingerprintJS.load();
 
-// Store mouse movement data
-const mouseMovements = [];
-const clickTimes = [];
+const BEHAVIOR_ENDPOINT = '/api/bot-protection/log-behavior';
+const DEVICE_ID_HEADER = 'X-Device-Id';
+const MOVE_SAMPLE_INTERVAL = 50; // ms between recorded mouse samples
+const MAX_MOVE_SAMPLES = 128;
+const MAX_CLICK_SAMPLES = 32;
+
+// Sampled behavior since the last batch (fixed-size, oldest samples overwritten)
+const mouseMovements = createSampleRing(MAX_MOVE_SAMPLES);
+const clickTimes = createSampleRing(MAX_CLICK_SAMPLES);
 let formStartTime = null;
 let formEndTime = null;
+let deviceIdPromise = null;
 
 // Track user behavior
 export const trackUserBehavior = () => {
-  // Track mouse movements
+  // Track mouse movements, at most one sample per MOVE_SAMPLE_INTERVAL
   document.addEventListener('mousemove', (event) => {
-    // Only store every 10th movement to avoid excessive data
-    if (mouseMovements.length % 10 === 0) {
-      mouseMovements.push({
-        x: event.clientX,
-        y: event.clientY,
-        timestamp: Date.now()
-      });
-      
-      // Keep only the last 100 movements
-      if (mouseMovements.length > 100) {
-        mouseMovements.shift();
-      }
+    const now = performance.now();
+    const last = mouseMovements.last();
+    if (last === null || now - last >= MOVE_SAMPLE_INTERVAL) {
+      mouseMovements.push(now, event.clientX, event.clientY);
     }
-  });
+  }, { passive: true });
   
   // Track clicks
   document.addEventListener('click', () => {
-    clickTimes.push(Date.now());
-    
-    // Keep only the last 20 clicks
-    if (clickTimes.length > 20) {
-      clickTimes.shift();
-    }
-  });
+    clickTimes.push(performance.now());
+  }, { passive: true });
   
   // Track form interactions
   document.addEventListener('focusin', (event) => {
@@ -55,45 +50,48 @@ export const trackUserBehavior = () => {
   });
 };
 
-// Calculate average click speed (time between clicks)
-const calculateClickSpeed = () => {
-  if (clickTimes.length < 2) return null;
-  
-  let totalDiff = 0;
-  for (let i = 1; i < clickTimes.length; i++) {
-    totalDiff += clickTimes[i] - clickTimes[i-1];
-  }
-  
-  return totalDiff / (clickTimes.length - 1);
-};
-
 // Calculate form fill time
 const calculateFormFillTime = () => {
   if (!formStartTime || !formEndTime) return null;
   return formEndTime - formStartTime;
 };
 
-// Send behavioral data to the server
+// Send the current behavioral batch to the server
 export const sendBehavioralData = async () => {
   try {
-    // Get fingerprint
-    const fp = await fpPromise;
-    const result = await fp.get();
+    // Encode the sampled batch (a few bytes per sample); the server derives
+    // click speed and movement features from it
+    const payload = encodeBehaviorBatch({
+      moves: mouseMovements,
+      clicks: clickTimes,
+      formFillTime: calculateFormFillTime()
+    });
+    const body = new Blob([payload], { type: BEHAVIOR_CONTENT_TYPE });
+    // Beacons can't carry headers: the device id rides in the query string
+    const deviceId = await getDeviceId();
+    const url = deviceId ? `${BEHAVIOR_ENDPOINT}?device=${encodeURIComponent(deviceId)}` : BEHAVIOR_ENDPOINT;
     
-    // Prepare data to send
-    const behavioralData = {
-      interactionData: {
-        mouseMovements: mouseMovements.slice(-20), // Send only last 20 movements
-        clickSpeed: calculateClickSpeed(),
-        formFillTime: calculateFormFillTime()
-      },
-      fingerprint: result.visitorId
-    };
-    
-    // Send data to server
-    await axios.post('/api/bot-protection/log-behavior', behavioralData);
+    // Beacons survive page unloads and don't hold up the page; fall back to a keepalive fetch
+    let queued = false;
+    try {
+      queued = typeof navigator.sendBeacon === 'function' && navigator.sendBeacon(url, body);
+    } catch (error) {
+      // Chromium can throw for a Blob type that isn't CORS-safelisted
+      queued = false;
+    }
+    if (!queued) {
+      await fetch(url, {
+        method: 'POST',
+        body,
+        headers: { 'Content-Type': BEHAVIOR_CONTENT_TYPE },
+        credentials: 'same-origin',
+        keepalive: true
+      });
+    }
     
-    // Reset form timing
+    // Start the next batch
+    mouseMovements.clear();
+    clickTimes.clear();
     formStartTime = null;
     formEndTime = null;
     
@@ -115,6 +113,12 @@ export const getDeviceFingerprint = async () => {
   }
 };
 
+// Visitor id, computed once per page load; the server rate-limits devices by it
+const getDeviceId = () => {
+  deviceIdPromise ??= getDeviceFingerprint();
+  return deviceIdPromise;
+};
+
 // Add honeypot fields to forms
 export const addHoneypotToForm = (formElement) => {
   if (!formElement) return;
@@ -179,6 +183,16 @@ export const detectHeadlessBrowser = () => {
 export const initBotProtection = () => {
   trackUserBehavior();
   
+  // Identify this device on API calls, so its request rate is tracked
+  // across IP changes
+  axios.interceptors.request.use(async (config) => {
+    const deviceId = await getDeviceId();
+    if (deviceId) {
+      config.headers.set(DEVICE_ID_HEADER, deviceId);
+    }
+    return config;
+  });
+  
   // Send behavioral data periodically
   setInterval(sendBehavioralData, 60000); // Every minute
   
@@ -187,6 +201,13 @@ export const initBotProtection = () => {
     sendBehavioralData();
   });
   
+  // Flush the last batch when the page is hidden or closed
+  document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') {
+      sendBehavioralData();
+    }
+  });
+  
   // Check for headless browser
   const headlessCheck = detectHeadlessBrowser();
   if (headlessCheck.isHeadless) {
@@ -64,5 +64,9 @@ botDetectionSchema.index({ ipAddress: 1, timestamp: -1 });
 // Index for querying by device fingerprint
 botDetectionSchema.index({ deviceFingerprint: 1, timestamp: -1 });
 
+// TTL index so old detections expire instead of growing the collection forever
+const RETENTION_DAYS = Number(process.env.BOT_DETECTION_RETENTION_DAYS) || 30;
+botDetectionSchema.index({ timestamp: 1 }, { expireAfterSeconds: RETENTION_DAYS * 24 * 60 * 60 });
+
 const BotDetection = mongoose.model("BotDetection", botDetectionSchema);
 export default BotDetection; 
\ No newline at end of file
@@ -0,0 +1,133 @@
+import cluster from "cluster";
+import os from "os";
+import path from "path";
+import { fileURLToPath } from "url";
+import dotenv from "dotenv";
+import { attachMetricsPrimary } from "./utils/botMetricsMonitor.js";
+import { attachRateLimitPrimary, connectRedisRateLimitAdapter } from "./utils/rateLimitStore.js";
+import { attachStageMetricsPrimary } from "./utils/stageMetrics.js";
+
+// Cluster entry point: a primary process forks CLUSTER_WORKERS copies of
+// server.js, aggregates their bot metrics and owns the shared rate-limit
+// counters. Send SIGHUP for a graceful rolling restart.
+
+dotenv.config();
+
+const WORKER_COUNT = Number(process.env.CLUSTER_WORKERS) || os.availableParallelism?.() || os.cpus().length;
+const SHUTDOWN_TIMEOUT = 30 * 1000; // 30 seconds for in-flight requests to finish
+const CRASH_WINDOW = 5 * 1000; // workers dying younger than this are respawned with a delay
+const CRASH_RESPAWN_DELAY = 1000;
+const CLUSTER_MESSAGE_TYPE = "nextbuy:cluster";
+
+const __dirname = path.dirname(fileURLToPath(import.meta.url));
+
+cluster.setupPrimary({ exec: path.join(__dirname, "server.js") });
+
+attachMetricsPrimary(cluster);
+attachRateLimitPrimary(cluster);
+attachStageMetricsPrimary(cluster);
+
+// Rate limits are counted here for the whole host; Redis shares them across nodes
+if (process.env.REDIS_URL) {
+  connectRedisRateLimitAdapter(process.env.REDIS_URL)
+    .then(() => {
+      console.log(`✅ Rate limit store connected to Redis`);
+    })
+    .catch((err) => {
+      console.warn(`⚠️ Redis connection failed: ${err.message}`);
+      console.log(`📝 Rate limits will be counted on this host only.`);
+    });
+}
+
+let shuttingDown = false;
+let restarting = false;
+const retiring = new Set();
+const startedAt = new Map();
+
+function forkWorker() {
+  const worker = cluster.fork({ CLUSTER_WORKERS: String(WORKER_COUNT) });
+  startedAt.set(worker.id, Date.now());
+  return worker;
+}
+
+/**
+ * Ask a worker to flush its metrics and stop accepting connections
+ * @param {import('cluster').Worker} worker - Worker to retire
+ * @returns {Promise<void>} Resolves once the worker has exited
+ */
+function retireWorker(worker) {
+  retiring.add(worker.id);
+  return new Promise((resolve) => {
+    const timer = setTimeout(() => {
+      console.warn(`⚠️ Worker ${worker.process.pid} did not exit in time, killing it`);
+      worker.kill("SIGKILL");
+    }, SHUTDOWN_TIMEOUT);
+
+    worker.once("exit", () => {
+      clearTimeout(timer);
+      resolve();
+    });
+
+    if (worker.isConnected()) {
+      worker.send({ type: CLUSTER_MESSAGE_TYPE, op: "shutdown" });
+    } else {
+      worker.kill();
+    }
+  });
+}
+
+/**
+ * Replace workers one at a time, waiting for each replacement to listen
+ */
+async function rollingRestart() {
+  if (restarting || shuttingDown) return;
+  restarting = true;
+  console.log(`🔄 Rolling restart of ${Object.keys(cluster.workers).length} workers`);
+
+  for (const worker of Object.values(cluster.workers)) {
+    if (!worker || retiring.has(worker.id)) continue;
+
+    const replacement = forkWorker();
+    await new Promise((resolve) => {
+      replacement.once("listening", resolve);
+      replacement.once("exit", resolve);
+    });
+    await retireWorker(worker);
+  }
+
+  restarting = false;
+  console.log(`✅ Rolling restart complete`);
+}
+
+async function shutdown(signal) {
+  if (shuttingDown) return;
+  shuttingDown = true;
+  console.log(`📴 ${signal} received, stopping ${Object.keys(cluster.workers).length} workers`);
+  await Promise.all(Object.values(cluster.workers).map(retireWorker));
+  process.exit(0);
+}
+
+cluster.on("exit", (worker, code, signal) => {
+  const lifetime = Date.now() - (startedAt.get(worker.id) || 0);
+  startedAt.delete(worker.id);
+
+  if (retiring.delete(worker.id) || shuttingDown) return;
+
+  console.warn(`⚠️ Worker ${worker.process.pid} exited (${signal || code}), starting a replacement`);
+  if (lifetime < CRASH_WINDOW) {
+    setTimeout(() => {
+      if (!shuttingDown) forkWorker();
+    }, CRASH_RESPAWN_DELAY);
+  } else {
+    forkWorker();
+  }
+});
+
+process.on("SIGHUP", rollingRestart);
+process.on("SIGTERM", () => shutdown("SIGTERM"));
+process.on("SIGINT", () => shutdown("SIGINT"));
+
+console.log(`NextBuy cluster primary ${process.pid} starting ${WORKER_COUNT} workers`);
+for (let i = 0; i < WORKER_COUNT; i++) {
+  forkWorker();
+}
@@ -21,10 +21,13 @@ export const isAuthenticated = (req, res, next) => {
  * Middleware to check if user is an admin
  */
 export const isAdmin = (req, res, next) => {
-  // For development purposes, we'll allow access from localhost without authentication
+  // For development purposes, we'll allow access from localhost without authentication.
+  // Not behind a proxy (trust proxy set): every client would look local there,
+  // or could claim to be through X-Forwarded-For.
   const clientIP = req.ip || req.connection.remoteAddress;
+  const behindProxy = Boolean(req.app?.get('trust proxy'));
   
-  if (clientIP.includes('127.0.0.1') || clientIP.includes('::1') || clientIP.includes('localhost')) {
+  if (!behindProxy && (clientIP.includes('127.0.0.1') || clientIP.includes('::1') || clientIP.includes('localhost'))) {
     return next();
   }
   
@@ -36,4 +39,18 @@ export const isAdmin = (req, res, next) => {
   }
   
   next();
-}; 
\ No newline at end of file
+}; 
+
+/**
+ * Middleware requiring the admin API key, with no localhost exception.
+ * For routes whose output can expose secrets (e.g. heap snapshots).
+ */
+export const requireAdminKey = (req, res, next) => {
+  const apiKey = req.headers['x-api-key'];
+  
+  if (!process.env.ADMIN_API_KEY || apiKey !== process.env.ADMIN_API_KEY) {
+    return res.status(403).json({ message: 'Forbidden: Admin API key required' });
+  }
+  
+  next();
+};
@@ -1,5 +1,7 @@
 import express from 'express';
-import { generateReport, resetMetrics, ingestTestResults } from '../utils/botMetricsMonitor.js';
+import { setImmediate as yieldToEventLoop } from 'timers/promises';
+import { getReport, getTimeSeries, subscribeReport, resetMetrics, ingestTestResults, ingestTestResultBatch } from '../utils/botMetricsMonitor.js';
+import { NdjsonError, decodeBody, readNdjsonBatches } from '../utils/ndjsonStream.js';
 import { isAdmin } from '../middleware/auth.js';
 
 const router = express.Router();
@@ -12,9 +14,9 @@ router.use(isAdmin);
  * @desc Get bot detection metrics
  * @access Admin only
  */
-router.get('/bot-metrics', (req, res) => {
+router.get('/bot-metrics', async (req, res) => {
   try {
-    const report = generateReport();
+    const report = await getReport();
     res.json(report);
   } catch (error) {
     console.error('Error generating bot metrics report:', error);
@@ -22,6 +24,45 @@ router.get('/bot-metrics', (req, res) => {
   }
 });
 
+/**
+ * @route GET /api/admin/bot-metrics/timeseries
+ * @desc Detection counters over time. Query: series (comma-separated), from and
+ * to (ms or ISO date), resolution (second, minute, hour), step (ms)
+ * @access Admin only
+ */
+router.get('/bot-metrics/timeseries', async (req, res) => {
+  const toTime = value => (value === undefined ? undefined : /^\d+$/.test(value) ? Number(value) : Date.parse(value));
+  const from = toTime(req.query.from);
+  const to = toTime(req.query.to);
+  const step = req.query.step === undefined ? undefined : Number(req.query.step);
+  // Checked here: NaN turns into null over cluster IPC and would fall back to the defaults
+  for (const [name, value] of Object.entries({ from, to, step })) {
+    if (value !== undefined && !Number.isFinite(value)) {
+      return res.status(400).json({ message: `Invalid ${name}` });
+    }
+  }
+  if (step !== undefined && step <= 0) {
+    return res.status(400).json({ message: 'Invalid step' });
+  }
+
+  try {
+    const result = await getTimeSeries({
+      series: req.query.series ? String(req.query.series).split(',') : undefined,
+      from,
+      to,
+      resolution: req.query.resolution === undefined ? undefined : String(req.query.resolution),
+      step
+    });
+    res.json(result);
+  } catch (error) {
+    if (error instanceof RangeError) {
+      return res.status(400).json({ message: error.message });
+    }
+    console.error('Error querying bot metrics time series:', error);
+    res.status(500).json({ message: 'Error querying time series' });
+  }
+});
+
 /**
  * @route POST /api/admin/bot-metrics/reset
  * @desc Reset bot detection metrics
@@ -53,17 +94,84 @@ router.post('/bot-metrics/ingest', (req, res) => {
   }
 });
 
+const NDJSON_TYPES = ['application/x-ndjson', 'application/ndjson', 'application/jsonl'];
+
 /**
- * @route GET /api/admin/bot-dashboard
- * @desc Enhanced HTML dashboard for bot metrics with advanced charts
+ * @route POST /api/admin/bot-metrics/ingest/stream
+ * @desc Ingest test results as NDJSON (optionally gzip/br encoded), applied batch by batch
  * @access Admin only
  */
-router.get('/bot-dashboard', (req, res) => {
+router.post('/bot-metrics/ingest/stream', async (req, res) => {
+  if (!req.is(NDJSON_TYPES)) {
+    return res.status(415).json({ message: 'Expected an application/x-ndjson body' });
+  }
+
+  const stats = {};
+  let ingested = 0;
   try {
-    const report = generateReport();
+    const body = decodeBody(req, req.headers['content-encoding']);
+    for await (const batch of readNdjsonBatches(body, { stats })) {
+      ingested += ingestTestResultBatch(batch);
+      // Let queued requests run before the next batch is read
+      await yieldToEventLoop();
+    }
+
+    res.json({
+      message: 'Test results ingested successfully',
+      ingested,
+      rejected: stats.rejected + (stats.records - ingested)
+    });
+  } catch (error) {
+    if (error instanceof NdjsonError) {
+      return res.status(error.status).json({ message: error.message, ingested });
+    }
+    console.error('Error streaming test results:', error);
+    if (!res.headersSent && !req.destroyed) {
+      res.status(500).json({ message: 'Error ingesting test results', ingested });
+    }
+  }
+});
+
+const STREAM_HEARTBEAT_INTERVAL = 15000; // keeps proxies from closing idle streams
+
+/**
+ * @route GET /api/admin/bot-dashboard/stream
+ * @desc Server-Sent Events: a full report snapshot, then deltas as metrics change
+ * @access Admin only
+ */
+router.get('/bot-dashboard/stream', async (req, res) => {
+  try {
+    const report = await getReport();
     
-    // Generate enhanced HTML for dashboard
-    const html = `
+    res.set({
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache',
+      'Connection': 'keep-alive',
+      'X-Accel-Buffering': 'no'
+    });
+    res.flushHeaders();
+    res.write(`event: snapshot\ndata: ${JSON.stringify(report)}\n\n`);
+
+    const unsubscribe = subscribeReport((delta) => {
+      res.write(`event: delta\ndata: ${JSON.stringify(delta)}\n\n`);
+    });
+    const heartbeat = setInterval(() => res.write(': heartbeat\n\n'), STREAM_HEARTBEAT_INTERVAL);
+
+    req.on('close', () => {
+      clearInterval(heartbeat);
+      unsubscribe();
+    });
+  } catch (error) {
+    console.error('Error starting bot dashboard stream:', error);
+    if (!res.headersSent) {
+      res.status(500).json({ message: 'Error starting dashboard stream' });
+    }
+  }
+});
+
+// The dashboard page is static: it is built once and fills itself from the
+// stream endpoint above
+const DASHBOARD_HTML = `
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -302,7 +410,7 @@ router.get('/bot-dashboard', (req, res) => {
           <div class="controls">
             <div class="auto-refresh" onclick="toggleAutoRefresh()" style="cursor: pointer; user-select: none;">
               <div class="status-indicator"></div>
-              Auto-refresh: ON
+              Live updates: CONNECTING
             </div>
             <button class="btn btn-success" onclick="exportData()">📊 Export Data</button>
             <button class="btn" onclick="refreshData()">🔄 Refresh</button>
@@ -310,44 +418,39 @@ router.get('/bot-dashboard', (req, res) => {
           </div>
         </div>
         
-        ${parseFloat(report.botPercentage) > 50 ? 
-          '<div class="alert severity-high">⚠️ High bot activity detected! Over 50% of requests are from bots.</div>' : 
-          parseFloat(report.botPercentage) > 25 ? 
-          '<div class="alert severity-medium">⚠️ Moderate bot activity detected.</div>' : 
-          '<div class="alert severity-low">✅ Low bot activity - system operating normally.</div>'
-        }
+        <div class="alert severity-low">✅ Low bot activity - system operating normally.</div>
         
         <!-- Key Metrics Overview -->
         <div class="card">
           <h2>📊 Key Metrics</h2>
           <div class="stats-grid">
             <div class="stat-card">
-              <div class="stat-value">${report.totalRequests.toLocaleString()}</div>
+              <div class="stat-value">–</div>
               <div class="stat-label">Total Requests</div>
-              <div class="metric-trend">Since ${new Date(Date.now() - parseFloat(report.timeFrame) * 3600000).toLocaleDateString()}</div>
+              <div class="metric-trend" id="sinceTrend"></div>
             </div>
             <div class="stat-card">
-              <div class="stat-value">${report.detectedBots.toLocaleString()}</div>
+              <div class="stat-value">–</div>
               <div class="stat-label">Detected Bots</div>
-              <div class="metric-trend ${parseFloat(report.botPercentage) > 25 ? 'trend-up' : 'trend-down'}">📈 ${report.botPercentage}</div>
+              <div class="metric-trend" id="botTrend"></div>
             </div>
             <div class="stat-card">
-              <div class="stat-value">${report.legitimateRequests.toLocaleString()}</div>
+              <div class="stat-value">–</div>
               <div class="stat-label">Legitimate Requests</div>
-              <div class="metric-trend trend-down">📉 ${(100 - parseFloat(report.botPercentage)).toFixed(1)}%</div>
+              <div class="metric-trend trend-down" id="legitimateTrend"></div>
             </div>
             <div class="stat-card">
-              <div class="stat-value">${report.averageBotsPerHour}</div>
+              <div class="stat-value">–</div>
               <div class="stat-label">Bots/Hour</div>
               <div class="metric-trend">⏱️ Current rate</div>
             </div>
             <div class="stat-card">
-              <div class="stat-value">${report.suspiciousPatterns.rapidRequests}</div>
+              <div class="stat-value">–</div>
               <div class="stat-label">Rate Limited</div>
               <div class="metric-trend">🚫 Blocked requests</div>
             </div>
             <div class="stat-card">
-              <div class="stat-value">${report.suspiciousPatterns.headlessDetections}</div>
+              <div class="stat-value">–</div>
               <div class="stat-label">Headless Bots</div>
               <div class="metric-trend">🤖 Automated browsers</div>
             </div>
@@ -404,20 +507,7 @@ router.get('/bot-dashboard', (req, res) => {
                     <th>Actions</th>
                   </tr>
                 </thead>
-                <tbody>
-                  ${report.topIPs.slice(0, 10).map(([ip, count]) => {
-                    const threatLevel = count > 100 ? 'HIGH' : count > 50 ? 'MEDIUM' : 'LOW';
-                    const threatClass = threatLevel.toLowerCase();
-                    return `
-                    <tr>
-                      <td>${ip}</td>
-                      <td>${count.toLocaleString()}</td>
-                      <td><span class="severity-${threatClass}">${threatLevel}</span></td>
-                      <td><button class="btn" onclick="blockIP('${ip}')">🚫 Block</button></td>
-                    </tr>
-                    `;
-                  }).join('')}
-                </tbody>
+                <tbody id="topIPsTable"></tbody>
               </table>
             </div>
           </div>
@@ -434,20 +524,7 @@ router.get('/bot-dashboard', (req, res) => {
                     <th>Type</th>
                   </tr>
                 </thead>
-                <tbody>
-                  ${report.topUserAgents.slice(0, 10).map(([ua, count]) => {
-                    const isHeadless = ua.toLowerCase().includes('headless') || ua.toLowerCase().includes('phantom');
-                    const isBot = ua.toLowerCase().includes('bot') || ua.toLowerCase().includes('crawler');
-                    const type = isHeadless ? 'Headless' : isBot ? 'Crawler' : 'Unknown';
-                    return `
-                    <tr>
-                      <td title="${ua}">${ua.length > 60 ? ua.substring(0, 60) + '...' : ua}</td>
-                      <td>${count.toLocaleString()}</td>
-                      <td>${type}</td>
-                    </tr>
-                    `;
-                  }).join('')}
-                </tbody>
+                <tbody id="topUserAgentsTable"></tbody>
               </table>
             </div>
           </div>
@@ -464,18 +541,7 @@ router.get('/bot-dashboard', (req, res) => {
                     <th>Risk Level</th>
                   </tr>
                 </thead>
-                <tbody>
-                  ${report.topPaths.slice(0, 10).map(([path, count]) => {
-                    const riskLevel = path.includes('admin') || path.includes('auth') ? 'HIGH' : 'MEDIUM';
-                    return `
-                    <tr>
-                      <td>${path}</td>
-                      <td>${count.toLocaleString()}</td>
-                      <td><span class="severity-${riskLevel.toLowerCase()}">${riskLevel}</span></td>
-                    </tr>
-                    `;
-                  }).join('')}
-                </tbody>
+                <tbody id="topPathsTable"></tbody>
               </table>
             </div>
           </div>
@@ -492,18 +558,7 @@ router.get('/bot-dashboard', (req, res) => {
                     <th>Percentage</th>
                   </tr>
                 </thead>
-                <tbody>
-                  ${report.topCountries.slice(0, 10).map(([country, count]) => {
-                    const percentage = ((count / report.detectedBots) * 100).toFixed(1);
-                    return `
-                    <tr>
-                      <td>${country}</td>
-                      <td>${count.toLocaleString()}</td>
-                      <td>${percentage}%</td>
-                    </tr>
-                    `;
-                  }).join('')}
-                </tbody>
+                <tbody id="topCountriesTable"></tbody>
               </table>
             </div>
           </div>
@@ -514,11 +569,11 @@ router.get('/bot-dashboard', (req, res) => {
           <h2>📋 System Information</h2>
           <div class="stats-grid">
             <div class="stat-card">
-              <div class="stat-value">${report.generatedAt ? new Date(report.generatedAt).toLocaleString() : 'N/A'}</div>
+              <div class="stat-value">N/A</div>
               <div class="stat-label">Last Updated</div>
             </div>
             <div class="stat-card">
-              <div class="stat-value">${report.timeFrame}</div>
+              <div class="stat-value">–</div>
               <div class="stat-label">Data Time Frame</div>
             </div>
             <div class="stat-card">
@@ -535,7 +590,7 @@ router.get('/bot-dashboard', (req, res) => {
       
       <script>
         let charts = {};
-        const reportData = ${JSON.stringify(report)};
+        let reportData = null;
         
         // Chart.js global settings
         Chart.defaults.color = '#fff';
@@ -708,43 +763,70 @@ const labels = data.hourlyDistribution.map(h => (h.hour.toString().padStart(2, '
         }
 
         // Global variables
-        let autoRefreshInterval = null;
+        let eventSource = null;
         let isAutoRefreshEnabled = true;
         
         document.addEventListener('DOMContentLoaded', () => {
-          renderAllCharts(reportData);
           startAutoRefresh();
         });
         
+        function setStatus(text, color) {
+          const statusElement = document.querySelector('.auto-refresh');
+          if (statusElement) {
+            const indicator = color
+              ? '<div style="width: 12px; height: 12px; border-radius: 50%; background: ' + color + ';"></div>'
+              : '<div class="status-indicator"></div>';
+            statusElement.innerHTML = indicator + 'Live updates: ' + text;
+          }
+        }
+        
+        // Live updates arrive over Server-Sent Events: a full snapshot on
+        // connect, then only the report fields that changed
         function startAutoRefresh() {
-          if (autoRefreshInterval) {
-            clearInterval(autoRefreshInterval);
+          if (eventSource) {
+            eventSource.close();
           }
           
           if (isAutoRefreshEnabled) {
-            autoRefreshInterval = setInterval(refreshData, 15000); // Auto-refresh every 15 seconds
-            console.log('Auto-refresh started');
+            eventSource = new EventSource('/api/admin/bot-dashboard/stream');
+            
+            eventSource.addEventListener('snapshot', (event) => {
+              reportData = JSON.parse(event.data);
+              window.reportData = reportData;
+              renderReport(reportData);
+              setStatus('ON');
+            });
+            
+            eventSource.addEventListener('delta', (event) => {
+              if (!reportData) return;
+              const delta = JSON.parse(event.data);
+              Object.assign(reportData, delta.changes);
+              reportData.version = delta.version;
+              renderReport(reportData, Object.keys(delta.changes));
+              setStatus('ON (Last: ' + new Date().toLocaleTimeString() + ')');
+            });
+            
+            // EventSource reconnects on its own and gets a fresh snapshot
+            eventSource.onerror = () => {
+              setStatus('RECONNECTING', '#ff6b6b');
+            };
+            console.log('Live updates started');
           }
         }
         
         function toggleAutoRefresh() {
           isAutoRefreshEnabled = !isAutoRefreshEnabled;
-          const statusElement = document.querySelector('.auto-refresh');
           
           if (isAutoRefreshEnabled) {
             startAutoRefresh();
-            if (statusElement) {
-              statusElement.innerHTML = '<div class="status-indicator"></div>Auto-refresh: ON';
-            }
+            setStatus('CONNECTING');
           } else {
-            if (autoRefreshInterval) {
-              clearInterval(autoRefreshInterval);
-              autoRefreshInterval = null;
+            if (eventSource) {
+              eventSource.close();
+              eventSource = null;
             }
-            if (statusElement) {
-              statusElement.innerHTML = '<div style="width: 12px; height: 12px; border-radius: 50%; background: #ffc107;"></div>Auto-refresh: OFF';
-            }
-            console.log('Auto-refresh stopped');
+            setStatus('OFF', '#ffc107');
+            console.log('Live updates stopped');
           }
         }
 
@@ -764,39 +846,115 @@ const labels = data.hourlyDistribution.map(h => (h.hour.toString().padStart(2, '
               throw new Error('HTTP error! status: ' + response.status);
             }
             
-            const newData = await response.json();
-            console.log('New data received:', newData);
-            
-            // Update global reportData
-            window.reportData = newData;
-            
-            // Update charts
-            renderAllCharts(newData);
-            
-            // Update metrics display
-            updateMetrics(newData);
-            
-            // Update timestamp
-            const statusElement = document.querySelector('.auto-refresh');
-            if (statusElement) {
-              const timestamp = new Date().toLocaleTimeString();
-              statusElement.innerHTML = '<div class="status-indicator"></div>Auto-refresh: ON (Last: ' + timestamp + ')';
-            }
-            
+            reportData = await response.json();
+            window.reportData = reportData;
+            renderReport(reportData);
             console.log('Dashboard refreshed successfully');
           } catch (error) {
             console.error('Error refreshing data:', error);
+            setStatus('ERROR', '#ff6b6b');
+          }
+        }
             
-            // Show error in UI
-            const statusElement = document.querySelector('.auto-refresh');
-            if (statusElement) {
-              statusElement.innerHTML = '<div style="width: 12px; height: 12px; border-radius: 50%; background: #ff6b6b;"></div>Auto-refresh: ERROR';
+        /**
+         * Render the report; with a list of changed fields, only the parts
+         * that depend on them are touched
+         */
+        function renderReport(data, changedFields) {
+          const changed = (field) => !changedFields || changedFields.includes(field);
+          
+          updateMetrics(data);
+          updateCharts(data, changed);
+          if (changed('topIPs')) renderTopIPs(data.topIPs);
+          if (changed('topUserAgents')) renderTopUserAgents(data.topUserAgents);
+          if (changed('topPaths')) renderTopPaths(data.topPaths);
+          if (changed('topCountries') || changed('detectedBots')) renderTopCountries(data.topCountries, data.detectedBots);
+        }
+        
+        function updateCharts(data, changed) {
+          if (!charts.detection) {
+            renderAllCharts(data);
+            return;
+          }
+          
+          try {
+            if (changed('detectionMethods')) {
+              charts.detection.data.labels = Object.keys(data.detectionMethods);
+              charts.detection.data.datasets[0].data = Object.values(data.detectionMethods);
+              charts.detection.update('none');
             }
-            
-            // Do not show alert on auto-refresh failures to avoid interrupting user
-            console.warn('Auto-refresh failed, will retry on next interval');
+            if (changed('hourlyDistribution')) {
+              charts.hourly.data.labels = data.hourlyDistribution.map(h => (h.hour.toString().padStart(2, '0') + ':00'));
+              charts.hourly.data.datasets[0].data = data.hourlyDistribution.map(h => h.bots);
+              charts.hourly.update('none');
+            }
+            if (changed('topCountries')) {
+              charts.geo.data.labels = data.topCountries.map(c => c[0]);
+              charts.geo.data.datasets[0].data = data.topCountries.map(c => c[1]);
+              charts.geo.update('none');
+            }
+            if (changed('suspiciousPatterns')) {
+              charts.threats.data.labels = Object.keys(data.suspiciousPatterns);
+              charts.threats.data.datasets[0].data = Object.values(data.suspiciousPatterns);
+              charts.threats.update('none');
+            }
+          } catch (error) {
+            console.error('Error updating charts:', error);
           }
         }
+            
+        function escapeHtml(value) {
+          return String(value).replace(/[&<>"']/g, (char) => ({
+            '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+          })[char]);
+        }
+        
+        function renderTopIPs(rows) {
+          document.getElementById('topIPsTable').innerHTML = rows.slice(0, 10).map(([ip, count]) => {
+            const threatLevel = count > 100 ? 'HIGH' : count > 50 ? 'MEDIUM' : 'LOW';
+            return '<tr>' +
+              '<td>' + escapeHtml(ip) + '</td>' +
+              '<td>' + count.toLocaleString() + '</td>' +
+              '<td><span class="severity-' + threatLevel.toLowerCase() + '">' + threatLevel + '</span></td>' +
+              '<td><button class="btn" data-ip="' + escapeHtml(ip) + '" onclick="blockIP(this.dataset.ip)">🚫 Block</button></td>' +
+              '</tr>';
+          }).join('');
+        }
+        
+        function renderTopUserAgents(rows) {
+          document.getElementById('topUserAgentsTable').innerHTML = rows.slice(0, 10).map(([ua, count]) => {
+            const isHeadless = ua.toLowerCase().includes('headless') || ua.toLowerCase().includes('phantom');
+            const isBot = ua.toLowerCase().includes('bot') || ua.toLowerCase().includes('crawler');
+            const type = isHeadless ? 'Headless' : isBot ? 'Crawler' : 'Unknown';
+            return '<tr>' +
+              '<td title="' + escapeHtml(ua) + '">' + escapeHtml(ua.length > 60 ? ua.substring(0, 60) + '...' : ua) + '</td>' +
+              '<td>' + count.toLocaleString() + '</td>' +
+              '<td>' + type + '</td>' +
+              '</tr>';
+          }).join('');
+        }
+        
+        function renderTopPaths(rows) {
+          document.getElementById('topPathsTable').innerHTML = rows.slice(0, 10).map(([path, count]) => {
+            const riskLevel = path.includes('admin') || path.includes('auth') ? 'HIGH' : 'MEDIUM';
+            return '<tr>' +
+              '<td>' + escapeHtml(path) + '</td>' +
+              '<td>' + count.toLocaleString() + '</td>' +
+              '<td><span class="severity-' + riskLevel.toLowerCase() + '">' + riskLevel + '</span></td>' +
+              '</tr>';
+          }).join('');
+        }
+        
+        function renderTopCountries(rows, detectedBots) {
+          document.getElementById('topCountriesTable').innerHTML = rows.slice(0, 10).map(([country, count]) => {
+            const percentage = ((count / detectedBots) * 100).toFixed(1);
+            return '<tr>' +
+              '<td>' + escapeHtml(country) + '</td>' +
+              '<td>' + count.toLocaleString() + '</td>' +
+              '<td>' + percentage + '%</td>' +
+              '</tr>';
+          }).join('');
+        }
         
         function updateMetrics(data) {
           try {
@@ -811,16 +969,23 @@ const labels = data.hourlyDistribution.map(h => (h.hour.toString().padStart(2, '
               statValues[5].textContent = data.suspiciousPatterns.headlessDetections;
             }
             
-            // Update last updated time
-            const timeElements = document.querySelectorAll('.stat-value');
-            if (timeElements.length > 6 && data.generatedAt) {
-              timeElements[6].textContent = new Date(data.generatedAt).toLocaleString();
+            // Update last updated time and time frame
+            if (statValues.length > 7) {
+              statValues[6].textContent = data.generatedAt ? new Date(data.generatedAt).toLocaleString() : 'N/A';
+              statValues[7].textContent = data.timeFrame;
             }
             
+            // Update trends
+            const botPercentage = parseFloat(data.botPercentage);
+            const botTrend = document.getElementById('botTrend');
+            botTrend.className = 'metric-trend ' + (botPercentage > 25 ? 'trend-up' : 'trend-down');
+            botTrend.textContent = '📈 ' + data.botPercentage;
+            document.getElementById('legitimateTrend').textContent = '📉 ' + (100 - botPercentage).toFixed(1) + '%';
+            document.getElementById('sinceTrend').textContent = 'Since ' + new Date(Date.now() - parseFloat(data.timeFrame) * 3600000).toLocaleDateString();
+            
             // Update alert based on bot percentage
             const alertElement = document.querySelector('.alert');
             if (alertElement) {
-              const botPercentage = parseFloat(data.botPercentage);
               if (botPercentage > 50) {
                 alertElement.className = 'alert severity-high';
                 alertElement.innerHTML = '⚠️ High bot activity detected! Over 50% of requests are from bots.';
@@ -832,8 +997,6 @@ const labels = data.hourlyDistribution.map(h => (h.hour.toString().padStart(2, '
                 alertElement.innerHTML = '✅ Low bot activity - system operating normally.';
               }
             }
-            
-            console.log('Metrics updated successfully');
           } catch (error) {
             console.error('Error updating metrics:', error);
           }
@@ -915,11 +1078,13 @@ const labels = data.hourlyDistribution.map(h => (h.hour.toString().padStart(2, '
     </html>
     `;
     
-    res.send(html);
-  } catch (error) {
-    console.error('Error generating bot dashboard:', error);
-    res.status(500).send('Error generating dashboard');
-  }
+/**
+ * @route GET /api/admin/bot-dashboard
+ * @desc Enhanced HTML dashboard for bot metrics with advanced charts
+ * @access Admin only
+ */
+router.get('/bot-dashboard', (req, res) => {
+  res.type('html').send(DASHBOARD_HTML);
 });
 
 export default router;
@@ -2,29 +2,34 @@ import express from "express";
 import User from "../User/User.js";
 import BotDetection from "../User/BotDetection.js";
 import multer from "multer";
-import path from "path";
-import bcrypt from "bcrypt";
 import { honeypotCheck, deviceFingerprinting, analyzeIP, botDetection } from "../middleware/botProtection.js";
+import { detectionWriteBuffer, queueBotDetection } from "../utils/detectionWriteBuffer.js";
+import { hashPool, hashAdmission, HashPoolBusyError } from "../utils/hashPool.js";
+import { photoStore, PhotoUploadError } from "../utils/photoStore.js";
 
 const router = express.Router();
 const saltRounds = 10;
-// Multer Config
-const storage = multer.diskStorage({
-  destination: function (req, file, cb) {
-    cb(null, "uploads/");
-  },
-  filename: function (req, file, cb) {
-    const ext = path.extname(file.originalname);
-    const name = path.basename(file.originalname, ext);
-    cb(null, `${name}-${Date.now()}${ext}`);
-  },
+// Multer Config: photos are streamed into the content-addressed photo store
+const upload = multer({
+  storage: photoStore.storage(),
+  limits: { fileSize: 5 * 1024 * 1024, files: 1 } // 5 MB
 });
-const upload = multer({ storage });
 
-// Helper function to log bot detection
+// Single profile photo; upload problems are the client's, so answer 400
+const uploadProfilePhoto = (req, res, next) => {
+  upload.single("profilePhoto")(req, res, (error) => {
+    if (!error) return next();
+    if (error instanceof PhotoUploadError || error instanceof multer.MulterError) {
+      return res.status(400).json({ message: error.code === "LIMIT_FILE_SIZE" ? "Profile photo is too large" : error.message });
+    }
+    next(error);
+  });
+};
+
+// Helper function to log bot detection (queued and written in batches)
 const logBotDetection = async (req, botScore = 0.5, blockedRequest = false, reason = '') => {
   try {
-    const botDetection = new BotDetection({
+    queueBotDetection({
       ipAddress: req.ip || req.connection.remoteAddress,
       userAgent: req.headers['user-agent'] || '',
       deviceFingerprint: req.deviceFingerprint || 'unknown',
@@ -38,15 +43,19 @@ const logBotDetection = async (req, botScore = 0.5, blockedRequest = false, reas
       captchaRequired: botScore > 0.7,
       captchaCompleted: false
     });
-    
-    await botDetection.save();
   } catch (error) {
     console.error('Error logging bot detection:', error);
   }
 };
 
+// Hashing pool shed the request: tell the client when to retry
+const sendBusy = (res, error) => {
+  res.set('Retry-After', String(error.retryAfter));
+  return res.status(503).json({ message: "Server is busy, please try again shortly" });
+};
+
 // SIGNUP
-router.post("/signup", [honeypotCheck, deviceFingerprinting, analyzeIP, upload.single("profilePhoto")], async (req, res) => {
+router.post("/signup", [hashAdmission, honeypotCheck, deviceFingerprinting, analyzeIP, uploadProfilePhoto], async (req, res) => {
   try {
     const { fullName, userName, emailAddress, phoneNumber, passWord, captchaToken } = req.body;
     
@@ -95,7 +104,7 @@ router.post("/signup", [honeypotCheck, deviceFingerprinting, analyzeIP, upload.s
         return res.status(400).json({ message: "Username already taken" });
       }
       
-      const hashedPassword = await bcrypt.hash(passWord, saltRounds);
+      const hashedPassword = await hashPool.hash(passWord, saltRounds);
       const newUser = new User({
         fullName,
         userName,
@@ -138,13 +147,16 @@ router.post("/signup", [honeypotCheck, deviceFingerprinting, analyzeIP, upload.s
       throw dbError; // Re-throw for the outer catch block
     }
   } catch (error) {
+    if (error instanceof HashPoolBusyError) {
+      return sendBusy(res, error);
+    }
     console.error(`❌ ${error}`);
     res.status(500).json({ message: "Internal server error" });
   }
 });
 
 // LOGIN
-router.post("/login", [honeypotCheck, deviceFingerprinting, analyzeIP, botDetection], async (req, res) => {
+router.post("/login", [hashAdmission, honeypotCheck, deviceFingerprinting, analyzeIP, botDetection], async (req, res) => {
   try {
     const { emailAddress, userName, passWord, captchaToken } = req.body;
     
@@ -153,12 +165,14 @@ router.post("/login", [honeypotCheck, deviceFingerprinting, analyzeIP, botDetect
       return res.status(400).json({ message: "Email, username and password are required" });
     }
     
-    // Check for suspicious activity
+    // Check for suspicious activity (including detections not yet written)
+    const clientIp = req.ip || req.connection.remoteAddress;
+    const since = new Date(Date.now() - 30 * 60 * 1000); // Last 30 minutes
     const recentFailedAttempts = await BotDetection.countDocuments({
-      ipAddress: req.ip || req.connection.remoteAddress,
+      ipAddress: clientIp,
       blockedRequest: true,
-      timestamp: { $gt: new Date(Date.now() - 30 * 60 * 1000) } // Last 30 minutes
-    });
+      timestamp: { $gt: since }
+    }) + detectionWriteBuffer.countPending(clientIp); // queued blocked requests are at most a flush interval old
     
     // If there have been multiple failed attempts or the bot score is high, require CAPTCHA
     if ((recentFailedAttempts > 3 || req.botScore > 0.7 || req.ipScore > 0.8) && !captchaToken) {
@@ -190,7 +204,7 @@ router.post("/login", [honeypotCheck, deviceFingerprinting, analyzeIP, botDetect
       return res.status(401).json({ message: genericErrorMessage });
     }
     
-    const isPasswordMatch = await bcrypt.compare(passWord, user.passWord);
+    const isPasswordMatch = await hashPool.compare(passWord, user.passWord);
     if (!isPasswordMatch) {
       await logBotDetection(req, 0.8, true, 'Login attempt with valid email and username but invalid password');
       return res.status(401).json({ message: genericErrorMessage });
@@ -219,6 +233,9 @@ router.post("/login", [honeypotCheck, deviceFingerprinting, analyzeIP, botDetect
       },
     });
   } catch (error) {
+    if (error instanceof HashPoolBusyError) {
+      return sendBusy(res, error);
+    }
     console.error(`❌ ${error}`);
     res.status(500).json({ message: "Internal server error" });
   }
@@ -264,7 +281,7 @@ router.get("/user/:userName", [deviceFingerprinting, analyzeIP], async (req, res
 });
 
 // UPDATE USER
-router.put("/user/id/:id", [deviceFingerprinting, analyzeIP, upload.single("profilePhoto")], async (req, res) => {
+router.put("/user/id/:id", [deviceFingerprinting, analyzeIP, uploadProfilePhoto], async (req, res) => {
   const { id } = req.params;
   const updates = req.body;
   try {
@@ -1,57 +1,38 @@
 import express from "express";
+import { productIndex, getProduct, getCatalogVersion } from "../utils/productCatalog.js";
+import { normalizePageSize } from "../utils/productSearchIndex.js";
+import { createResponseCache } from "../utils/responseCache.js";
 
 const router = express.Router();
 
-// Sample product data (in a real app, this would come from a database)
-const sampleProducts = [
-  {
-    id: 1,
-    name: "Wireless Headphones",
-    price: 99.99,
-    category: "Electronics",
-    description: "High-quality wireless headphones with noise cancellation"
-  },
-  {
-    id: 2,
-    name: "Smart Watch",
-    price: 299.99,
-    category: "Electronics", 
-    description: "Advanced fitness tracking and notification features"
-  },
-  {
-    id: 3,
-    name: "Laptop Stand",
-    price: 49.99,
-    category: "Accessories",
-    description: "Ergonomic aluminum laptop stand"
-  },
-  {
-    id: 4,
-    name: "Coffee Mug",
-    price: 14.99,
-    category: "Home",
-    description: "Ceramic coffee mug with thermal insulation"
-  },
-  {
-    id: 5,
-    name: "Backpack",
-    price: 79.99,
-    category: "Accessories",
-    description: "Waterproof travel backpack with multiple compartments"
-  }
-];
+// Serialized (and compressed) once per catalog version, validated by ETag
+const responseCache = createResponseCache();
 
 // GET all products
 router.get("/", async (req, res) => {
   try {
-    // Return products
-    res.json({
-      success: true,
-      products: sampleProducts,
-      total: sampleProducts.length,
-      timestamp: new Date().toISOString()
+    // Return one page of products
+    const limit = normalizePageSize(req.query.limit);
+    const cursor = req.query.cursor ? String(req.query.cursor) : "";
+
+    responseCache.send(req, res, `list:${limit}:${cursor}`, getCatalogVersion(), () => {
+      const page = productIndex.list({ limit, cursor });
+      return {
+        success: true,
+        products: page.items,
+        total: page.total,
+        limit,
+        nextCursor: page.nextCursor,
+        catalogVersion: getCatalogVersion()
+      };
     });
   } catch (error) {
+    if (error.message === "Invalid cursor") {
+      return res.status(400).json({
+        error: "Invalid cursor",
+        message: "Cursor must come from a previous response"
+      });
+    }
     console.error("Error fetching products:", error);
     res.status(500).json({ 
       error: "Internal server error",
@@ -74,7 +55,7 @@ router.get("/:id", async (req, res) => {
       });
     }
 
-    const product = sampleProducts.find(p => p.id === productId);
+    const product = getProduct(productId);
     
     if (!product) {
       return res.status(404).json({
@@ -83,11 +64,11 @@ router.get("/:id", async (req, res) => {
       });
     }
 
-    res.json({
+    responseCache.send(req, res, `product:${productId}`, getCatalogVersion(), () => ({
       success: true,
       product,
-      timestamp: new Date().toISOString()
-    });
+      catalogVersion: getCatalogVersion()
+    }));
   } catch (error) {
     console.error("Error fetching product:", error);
     res.status(500).json({ 
@@ -111,20 +92,28 @@ router.get("/search/:query", async (req, res) => {
     }
 
     const searchTerm = query.toLowerCase().trim();
-    const results = sampleProducts.filter(product => 
-      product.name.toLowerCase().includes(searchTerm) ||
-      product.category.toLowerCase().includes(searchTerm) ||
-      product.description.toLowerCase().includes(searchTerm)
-    );
+    const limit = normalizePageSize(req.query.limit);
+    const cursor = req.query.cursor ? String(req.query.cursor) : "";
 
-    res.json({
-      success: true,
-      query: searchTerm,
-      results,
-      total: results.length,
-      timestamp: new Date().toISOString()
+    responseCache.send(req, res, `search:${limit}:${cursor}:${searchTerm}`, getCatalogVersion(), () => {
+      const page = productIndex.search(searchTerm, { limit, cursor });
+      return {
+        success: true,
+        query: searchTerm,
+        results: page.items,
+        total: page.total,
+        limit,
+        nextCursor: page.nextCursor,
+        catalogVersion: getCatalogVersion()
+      };
     });
   } catch (error) {
+    if (error.message === "Invalid cursor") {
+      return res.status(400).json({
+        error: "Invalid cursor",
+        message: "Cursor must come from a previous response"
+      });
+    }
     console.error("Error searching products:", error);
     res.status(500).json({ 
       error: "Internal server error",
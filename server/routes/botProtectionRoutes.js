@@ -1,6 +1,8 @@
 import express from "express";
 import BotDetection from "../User/BotDetection.js";
 import { deviceFingerprinting, analyzeIP, behavioralAnalysis, botDetection } from "../middleware/botProtection.js";
+import { detectionWriteBuffer, queueBotDetection } from "../utils/detectionWriteBuffer.js";
+import { BEHAVIOR_CONTENT_TYPE, MAX_PAYLOAD_BYTES } from "../utils/behaviorTelemetry.js";
 
 const router = express.Router();
 
@@ -24,6 +26,10 @@ router.post("/captcha-verification", [deviceFingerprinting, analyzeIP, botDetect
     // Update bot detection record if it exists
     if (req.deviceFingerprint) {
       try {
+        detectionWriteBuffer.updatePending(
+          doc => doc.deviceFingerprint === req.deviceFingerprint,
+          { captchaCompleted: true, botScore: 0.3 }
+        );
         await BotDetection.updateMany(
           { deviceFingerprint: req.deviceFingerprint },
           { 
@@ -62,10 +68,13 @@ router.get("/captcha-verification", [deviceFingerprinting, analyzeIP, botDetecti
   }
 });
 
-// Endpoint to log client-side behavioral data
-router.post("/log-behavior", [deviceFingerprinting, analyzeIP, behavioralAnalysis, botDetection], async (req, res) => {
+// Compact telemetry batches (sent with navigator.sendBeacon) arrive as raw bytes
+const behaviorBatchParser = express.raw({ type: BEHAVIOR_CONTENT_TYPE, limit: MAX_PAYLOAD_BYTES });
+
+// Endpoint to log client-side behavioral data (JSON or compact telemetry batch)
+router.post("/log-behavior", [behaviorBatchParser, deviceFingerprinting, analyzeIP, behavioralAnalysis, botDetection], async (req, res) => {
   try {
-    const { interactionData } = req.body;
+    const interactionData = req.behaviorFeatures ? null : req.body?.interactionData;
     
     // Check if the behavior score indicates a bot
     if (req.behaviorScore && req.behaviorScore > 0.7) {
@@ -75,8 +84,8 @@ router.post("/log-behavior", [deviceFingerprinting, analyzeIP, behavioralAnalysi
       });
     }
     
-    // Create a new bot detection entry with the behavioral data
-    const botDetection = new BotDetection({
+    // Queue a bot detection entry with the behavioral data (written in batches)
+    queueBotDetection({
       ipAddress: req.ip || req.connection.remoteAddress,
       userAgent: req.headers['user-agent'] || '',
       deviceFingerprint: req.deviceFingerprint || 'unknown',
@@ -84,15 +93,12 @@ router.post("/log-behavior", [deviceFingerprinting, analyzeIP, behavioralAnalysi
       requestMethod: 'POST',
       behaviorScore: req.behaviorScore || calculateBehaviorScore(interactionData),
       ipScore: req.ipScore || 0.5,
-      botScore: calculateBotScore(interactionData, req.ipScore || 0.5)
+      // Telemetry batches were already scored from their decoded features
+      botScore: req.behaviorFeatures
+        ? req.behaviorScore * 0.7 + (req.ipScore || 0.5) * 0.3
+        : calculateBotScore(interactionData, req.ipScore || 0.5)
     });
     
-    try {
-      await botDetection.save();
-    } catch (dbError) {
-      console.warn('Database save failed, but continuing:', dbError.message);
-    }
-    
     // Don't expose too much information to the client
     res.status(200).json({ success: true });
   } catch (error) {
@@ -105,8 +111,8 @@ router.post("/log-behavior", [deviceFingerprinting, analyzeIP, behavioralAnalysi
 // Honeypot endpoint - should never be accessed by legitimate users
 router.post("/contact-form", async (req, res) => {
   try {
-    // Log the bot attempt
-    const botDetection = new BotDetection({
+    // Log the bot attempt (written in batches)
+    queueBotDetection({
       ipAddress: req.ip || req.connection.remoteAddress,
       userAgent: req.headers['user-agent'] || '',
       deviceFingerprint: 'honeypot',
@@ -117,8 +123,6 @@ router.post("/contact-form", async (req, res) => {
       blockedRequest: true
     });
     
-    await botDetection.save();
-    
     // Return success to the bot to avoid detection
     res.status(200).json({ success: true, message: "Form submitted successfully" });
   } catch (error) {
@@ -1,49 +1,20 @@
 import express from "express";
 import { honeypotCheck, deviceFingerprinting, analyzeIP, botDetection } from "../middleware/botProtection.js";
+import { productIndex, getProduct, getCatalogVersion } from "../utils/productCatalog.js";
+import { normalizePageSize } from "../utils/productSearchIndex.js";
+import { createResponseCache } from "../utils/responseCache.js";
+import { timeStage } from "../utils/stageMetrics.js";
 
 const router = express.Router();
 
-// Sample product data (in a real app, this would come from a database)
-const sampleProducts = [
-  {
-    id: 1,
-    name: "Wireless Headphones",
-    price: 99.99,
-    category: "Electronics",
-    description: "High-quality wireless headphones with noise cancellation"
-  },
-  {
-    id: 2,
-    name: "Smart Watch",
-    price: 299.99,
-    category: "Electronics", 
-    description: "Advanced fitness tracking and notification features"
-  },
-  {
-    id: 3,
-    name: "Laptop Stand",
-    price: 49.99,
-    category: "Accessories",
-    description: "Ergonomic aluminum laptop stand"
-  },
-  {
-    id: 4,
-    name: "Coffee Mug",
-    price: 14.99,
-    category: "Home",
-    description: "Ceramic coffee mug with thermal insulation"
-  },
-  {
-    id: 5,
-    name: "Backpack",
-    price: 79.99,
-    category: "Accessories",
-    description: "Waterproof travel backpack with multiple compartments"
-  }
-];
+// Per-route checks share the global stage names (timed and switchable together)
+const productChecks = [timeStage("deviceFingerprinting", deviceFingerprinting), timeStage("analyzeIP", analyzeIP)];
+
+// Serialized (and compressed) once per catalog version, validated by ETag
+const responseCache = createResponseCache();
 
 // GET all products
-router.get("/", [deviceFingerprinting, analyzeIP], async (req, res) => {
+router.get("/", productChecks, async (req, res) => {
   try {
     // Check for bot activity
     if (req.isBot && req.botScore > 0.8 && !req.isLegitimateBot) {
@@ -53,14 +24,31 @@ router.get("/", [deviceFingerprinting, analyzeIP], async (req, res) => {
       });
     }
 
-    // Return products
-    res.json({
-      success: true,
-      products: sampleProducts,
-      total: sampleProducts.length,
-      timestamp: new Date().toISOString()
+    // Return one page of products (optionally filtered by ?search=) from the response cache
+    const limit = normalizePageSize(req.query.limit);
+    const search = req.query.search ? String(req.query.search) : "";
+    const cursor = req.query.cursor ? String(req.query.cursor) : "";
+
+    responseCache.send(req, res, `list:${limit}:${cursor}:${search}`, getCatalogVersion(), () => {
+      const page = search
+        ? productIndex.search(search, { limit, cursor })
+        : productIndex.list({ limit, cursor });
+      return {
+        success: true,
+        products: page.items,
+        total: page.total,
+        limit,
+        nextCursor: page.nextCursor,
+        catalogVersion: getCatalogVersion()
+      };
     });
   } catch (error) {
+    if (error.message === "Invalid cursor") {
+      return res.status(400).json({
+        error: "Invalid cursor",
+        message: "Cursor must come from a previous response"
+      });
+    }
     console.error("Error fetching products:", error);
     res.status(500).json({ 
       error: "Internal server error",
@@ -70,7 +58,7 @@ router.get("/", [deviceFingerprinting, analyzeIP], async (req, res) => {
 });
 
 // GET product by ID
-router.get("/:id", [deviceFingerprinting, analyzeIP], async (req, res) => {
+router.get("/:id", productChecks, async (req, res) => {
   try {
     const { id } = req.params;
     
@@ -83,7 +71,7 @@ router.get("/:id", [deviceFingerprinting, analyzeIP], async (req, res) => {
       });
     }
 
-    const product = sampleProducts.find(p => p.id === productId);
+    const product = getProduct(productId);
     
     if (!product) {
       return res.status(404).json({
@@ -92,11 +80,11 @@ router.get("/:id", [deviceFingerprinting, analyzeIP], async (req, res) => {
       });
     }
 
-    res.json({
+    responseCache.send(req, res, `product:${productId}`, getCatalogVersion(), () => ({
       success: true,
       product,
-      timestamp: new Date().toISOString()
-    });
+      catalogVersion: getCatalogVersion()
+    }));
   } catch (error) {
     console.error("Error fetching product:", error);
     res.status(500).json({ 
@@ -107,7 +95,7 @@ router.get("/:id", [deviceFingerprinting, analyzeIP], async (req, res) => {
 });
 
 // Search products
-router.get("/search/:query", [deviceFingerprinting, analyzeIP], async (req, res) => {
+router.get("/search/:query", productChecks, async (req, res) => {
   try {
     const { query } = req.params;
     
@@ -138,20 +126,28 @@ router.get("/search/:query", [deviceFingerprinting, analyzeIP], async (req, res)
     }
 
     const searchTerm = query.toLowerCase().trim();
-    const results = sampleProducts.filter(product => 
-      product.name.toLowerCase().includes(searchTerm) ||
-      product.category.toLowerCase().includes(searchTerm) ||
-      product.description.toLowerCase().includes(searchTerm)
-    );
+    const limit = normalizePageSize(req.query.limit);
+    const cursor = req.query.cursor ? String(req.query.cursor) : "";
 
-    res.json({
-      success: true,
-      query: searchTerm,
-      results,
-      total: results.length,
-      timestamp: new Date().toISOString()
+    responseCache.send(req, res, `search:${limit}:${cursor}:${searchTerm}`, getCatalogVersion(), () => {
+      const page = productIndex.search(searchTerm, { limit, cursor });
+      return {
+        success: true,
+        query: searchTerm,
+        results: page.items,
+        total: page.total,
+        limit,
+        nextCursor: page.nextCursor,
+        catalogVersion: getCatalogVersion()
+      };
     });
   } catch (error) {
+    if (error.message === "Invalid cursor") {
+      return res.status(400).json({
+        error: "Invalid cursor",
+        message: "Cursor must come from a previous response"
+      });
+    }
     console.error("Error searching products:", error);
     res.status(500).json({ 
       error: "Internal server error",
@@ -0,0 +1,97 @@
+import express from "express";
+import { profiler, ProfilerError } from "../utils/profiler.js";
+
+// Mounted behind requireAdminKey, ahead of the bot checks and rate limits,
+// so a load run can always start and stop its own profile
+const router = express.Router();
+
+// Heap snapshots contain process.env (API keys, database URI): they stay on
+// disk unless downloads are switched on explicitly
+const SERVE_HEAP_SNAPSHOTS = process.env.PROFILE_SERVE_HEAP_SNAPSHOTS === "true";
+const downloadable = name => SERVE_HEAP_SNAPSHOTS || !name.endsWith(".heapsnapshot");
+const artifactUrl = name => (downloadable(name) ? `/api/admin/profiling/artifacts/${name}` : null);
+
+function sendError(res, error, action) {
+  if (error instanceof ProfilerError) {
+    return res.status(error.status).json({ message: error.message, ...profiler.getStatus() });
+  }
+  console.error(`Error ${action}:`, error);
+  res.status(500).json({ message: `Error ${action}` });
+}
+
+/**
+ * @route GET /api/admin/profiling
+ * @desc Profiler state of the answering process and the saved artifacts
+ */
+router.get("/", async (req, res) => {
+  try {
+    const artifacts = await profiler.listArtifacts();
+    res.json({
+      ...profiler.getStatus(),
+      artifacts: artifacts.map(artifact => ({ ...artifact, url: artifactUrl(artifact.name) }))
+    });
+  } catch (error) {
+    sendError(res, error, "listing profiling artifacts");
+  }
+});
+
+/**
+ * @route POST /api/admin/profiling/cpu/start
+ * @desc Start a sampling CPU profile. Body: { label, samplingInterval (µs) }
+ */
+router.post("/cpu/start", async (req, res) => {
+  try {
+    const started = await profiler.startCpuProfile({
+      label: req.body?.label,
+      samplingInterval: req.body?.samplingInterval
+    });
+    res.status(201).json(started);
+  } catch (error) {
+    sendError(res, error, "starting CPU profile");
+  }
+});
+
+/**
+ * @route POST /api/admin/profiling/cpu/stop
+ * @desc Stop the CPU profile and save it as a .cpuprofile artifact
+ */
+router.post("/cpu/stop", async (req, res) => {
+  try {
+    const artifact = await profiler.stopCpuProfile();
+    res.json({ ...artifact, url: artifactUrl(artifact.name) });
+  } catch (error) {
+    sendError(res, error, "stopping CPU profile");
+  }
+});
+
+/**
+ * @route POST /api/admin/profiling/heap-snapshot
+ * @desc Write a heap snapshot (pauses the process while it is written). Body: { label }.
+ * The response has no download url unless PROFILE_SERVE_HEAP_SNAPSHOTS=true.
+ */
+router.post("/heap-snapshot", async (req, res) => {
+  try {
+    const artifact = await profiler.heapSnapshot({ label: req.body?.label });
+    res.status(201).json({ ...artifact, url: artifactUrl(artifact.name) });
+  } catch (error) {
+    sendError(res, error, "writing heap snapshot");
+  }
+});
+
+/**
+ * @route GET /api/admin/profiling/artifacts/:name
+ * @desc Download a saved profile or snapshot
+ */
+router.get("/artifacts/:name", (req, res) => {
+  const file = profiler.artifactPath(req.params.name);
+  if (!file || !downloadable(req.params.name)) {
+    return res.status(404).json({ message: "Artifact not found" });
+  }
+  res.download(file, req.params.name, (error) => {
+    if (error && !res.headersSent) {
+      res.status(404).json({ message: "Artifact not found" });
+    }
+  });
+});
+
+export default router;
@@ -1,4 +1,6 @@
+import "dotenv/config"; // load .env before modules that read settings at import time
 import express from "express";
+import cluster from "cluster";
 import mongoose from "mongoose";
 import dotenv from "dotenv";
 import path from "path";
@@ -11,6 +13,7 @@ import botProtectionRoutes from "./routes/botProtectionRoutes.js";
 import adminRoutes from "./routes/admin.js";
 import productRoutes from "./routes/productRoutes.js";
 import benchmarkRoutes from "./routes/benchmarkRoutes.js";
+import profilingRoutes from "./routes/profilingRoutes.js";
 import { 
   apiRateLimit, 
   authRateLimit, 
@@ -20,12 +23,30 @@ import {
   botDetection,
   sqlInjectionCheck
 } from "./middleware/botProtection.js";
-import { logRequest } from "./utils/botMetricsMonitor.js";
+import { logRequest, flushMetricsDelta } from "./utils/botMetricsMonitor.js";
+import { connectRedisRateLimitAdapter } from "./utils/rateLimitStore.js";
+import { flushBotDetections } from "./utils/detectionWriteBuffer.js";
+import { timeStage, requestMetrics, markHandlerStart, getMetricsText } from "./utils/stageMetrics.js";
+import { isAdmin, requireAdminKey } from "./middleware/auth.js";
+import { PHOTO_DIR, photoStaticOptions } from "./utils/photoStore.js";
 
 
 dotenv.config();
 const server = express();
 
+// Behind a load balancer, take the client IP from X-Forwarded-For
+// (TRUST_PROXY is a hop count or a list of proxy addresses/subnets).
+// "true" is refused: it trusts every hop, so the client would pick its own IP.
+const trustProxy = (process.env.TRUST_PROXY || "").trim();
+if (trustProxy === "true") {
+  console.warn("⚠️ TRUST_PROXY=true is not supported; set a hop count or proxy subnets. X-Forwarded-For is ignored.");
+} else if (trustProxy && trustProxy !== "false") {
+  server.set("trust proxy", /^\d+$/.test(trustProxy) ? Number(trustProxy) : trustProxy.split(",").map(entry => entry.trim()));
+}
+
+// Per-route counters and durations (mounted first so every response is seen)
+server.use(requestMetrics);
+
 // Security middleware
 server.use(helmet({
   contentSecurityPolicy: {
@@ -49,12 +70,12 @@ server.use(helmet({
 })); // Helps secure Express apps by setting HTTP response headers
 
 // Custom sanitization middleware that works with Express 5
-server.use((req, res, next) => {
+server.use(timeStage('mongoSanitize', (req, res, next) => {
   // Only sanitize req.body and req.params which are writable
   if (req.body) req.body = mongoSanitize.sanitize(req.body, { replaceWith: '_' });
   if (req.params) req.params = mongoSanitize.sanitize(req.params, { replaceWith: '_' });
   next();
-});
+}));
 
 server.use(hpp()); // Protect against HTTP Parameter Pollution attacks
 
@@ -63,7 +84,7 @@ server.use(express.json({ limit: '10mb' }));
 server.use(express.urlencoded({ extended: true, limit: '10mb' }));
 
 // Log all requests for metrics
-server.use((req, res, next) => {
+server.use(timeStage('requestLogging', (req, res, next) => {
   if (!req.path.startsWith('/api/benchmark')) {
     logRequest({
       ip: req.ip,
@@ -72,24 +93,47 @@ server.use((req, res, next) => {
     });
   }
   next();
-});
+}));
 
 // Benchmark routes (without bot protection)
 server.use("/api/benchmark", benchmarkRoutes);
 
+// Prometheus scrape endpoint, ahead of the bot checks so scrapers aren't flagged
+server.get("/metrics", isAdmin, async (req, res) => {
+  try {
+    res.type("text/plain; version=0.0.4").send(await getMetricsText());
+  } catch (error) {
+    console.error("Error collecting metrics:", error);
+    res.status(500).send("Error collecting metrics");
+  }
+});
+
+// On-demand CPU profiles and heap snapshots, also ahead of the bot checks so a
+// load run that trips them can still stop its profile. Always needs the API
+// key: snapshots hold process.env.
+server.use("/api/admin/profiling", requireAdminKey, profilingRoutes);
+
 // Apply SQL injection protection before rate limiting
-server.use(sqlInjectionCheck);
+server.use(timeStage('sqlInjectionCheck', sqlInjectionCheck));
+
+// Fingerprint and count devices ahead of the rate limiter, so requests it
+// turns away still add to the device's rate
+server.use(timeStage('deviceFingerprinting', deviceFingerprinting));
 
 // Apply rate limiting to API endpoints (but not health/root)
-server.use('/api', apiRateLimit);
+server.use('/api', timeStage('apiRateLimit', apiRateLimit));
 
 // Apply bot detection middleware to all routes
-server.use(detectHeadlessBrowser);
-server.use(analyzeIP);
-server.use(deviceFingerprinting);
-server.use(botDetection);
+server.use(timeStage('detectHeadlessBrowser', detectHeadlessBrowser));
+server.use(timeStage('analyzeIP', analyzeIP));
+server.use(timeStage('botDetection', botDetection));
+
+// Everything after this point is timed as the "handler" stage
+server.use(markHandlerStart);
 
 const PORT = process.env.PORT || 5000;
+// Content-addressed photos never change: cache them for a year
+server.use("/uploads/photos", express.static(PHOTO_DIR, photoStaticOptions));
 server.use("/uploads", express.static(path.join(path.resolve(), "uploads")));
 
 // MongoDB connection with graceful error handling
@@ -110,6 +154,19 @@ if (process.env.MONGO_URI) {
   console.log(`📝 No MongoDB URI found. Running in memory-only mode.`);
 }
 
+// Optional Redis backend so rate limits are shared across nodes
+// (under cluster.js the primary owns the connection)
+if (process.env.REDIS_URL && !cluster.isWorker) {
+  connectRedisRateLimitAdapter(process.env.REDIS_URL)
+    .then(() => {
+      console.log(`✅ Rate limit store connected to Redis`);
+    })
+    .catch((err) => {
+      console.warn(`⚠️ Redis connection failed: ${err.message}`);
+      console.log(`📝 Rate limits will be counted on this host only.`);
+    });
+}
+
 // Apply stricter rate limiting to auth routes
 server.use("/api/auth", authRateLimit, authRoutes);
 
@@ -143,8 +200,43 @@ server.get('/health', (req, res) => {
   res.json({ status: 'OK', timestamp: new Date().toISOString() });
 });
 
-server.listen(PORT, '0.0.0.0', () => {
+const httpServer = server.listen(PORT, '0.0.0.0', () => {
+  if (cluster.isWorker) {
+    console.log(`NextBuy worker ${process.pid} listening on port ${PORT}`);
+    return;
+  }
   console.log(`NextBuy Server running on port ${PORT}`);
   console.log(`Bot metrics dashboard available at: http://localhost:${PORT}/api/admin/bot-dashboard`);
   console.log(`Health check available at: http://localhost:${PORT}/health`);
 });
+
+// Graceful shutdown: stop accepting connections, then flush buffered writes
+let shuttingDown = false;
+function gracefulShutdown() {
+  if (shuttingDown) return;
+  shuttingDown = true;
+  flushMetricsDelta();
+  // Don't let lingering keep-alive connections hold the process open
+  setTimeout(() => process.exit(0), 10000).unref();
+  httpServer.close(async () => {
+    try {
+      await flushBotDetections();
+    } catch (err) {
+      console.warn(`⚠️ Failed to flush bot detections: ${err.message}`);
+    }
+    process.exit(0);
+  });
+}
+
+if (cluster.isWorker) {
+  // Requested by the cluster primary (rolling restart or stop)
+  process.on('message', (message) => {
+    if (!message || message.type !== 'nextbuy:cluster' || message.op !== 'shutdown') return;
+    gracefulShutdown();
+  });
+  // Ctrl+C reaches the whole process group; let the primary coordinate
+  process.on('SIGINT', () => {});
+} else {
+  process.on('SIGTERM', gracefulShutdown);
+  process.on('SIGINT', gracefulShutdown);
+}
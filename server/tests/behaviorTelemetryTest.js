@@ -0,0 +1,189 @@
+import { createSampleRing, encodeBehaviorBatch } from '../../client/src/utils/behaviorTelemetry.js';
+import { BehaviorPayloadError, decodeBehaviorBatch } from '../utils/behaviorTelemetry.js';
+
+// Decoder tests for the compact behavioral telemetry batches. Batches are
+// built with the client's own ring buffer and encoder, from pointer events
+// run through the collector's 50 ms sampling gate, so the decoder sees what
+// a browser would send. Human-like movement (slow drifts, wandering and
+// point-to-point reaches, on 60 Hz and 1000 Hz mice) must never be flagged
+// as regularSteps; scripted constant-step movement must be.
+//
+// Usage: node tests/behaviorTelemetryTest.js [--seeds 50]
+
+const MOVE_SAMPLE_INTERVAL = 50; // ms, as in client/src/utils/botProtection.js
+const MAX_MOVE_SAMPLES = 128;
+
+const colors = {
+  reset: '\x1b[0m',
+  red: '\x1b[31m',
+  green: '\x1b[32m',
+  blue: '\x1b[34m',
+  cyan: '\x1b[36m'
+};
+
+function parseArgs(argv) {
+  const options = { seeds: 50 };
+  for (let i = 0; i < argv.length; i++) {
+    const key = argv[i].replace(/^--/, '');
+    if (key in options) options[key] = Number(argv[++i]);
+  }
+  return options;
+}
+
+// Small deterministic PRNG so every run replays the same movements
+function createRandom(seed) {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6D2B79F5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+// Feed pointer events through the collector's sampling gate and encode the batch.
+// `pointer(t)` returns the cursor position at time t; events fire every `eventInterval()` ms.
+function collect({ duration, eventInterval, pointer, formFillTime = null }) {
+  const moves = createSampleRing(MAX_MOVE_SAMPLES);
+  const clicks = createSampleRing(8);
+  for (let t = 1000; t < 1000 + duration; t += eventInterval()) {
+    const last = moves.last();
+    if (last === null || t - last >= MOVE_SAMPLE_INTERVAL) {
+      const [x, y] = pointer(t);
+      moves.push(t, Math.round(x), Math.round(y));
+    }
+  }
+  return decodeBehaviorBatch(encodeBehaviorBatch({ moves, clicks, formFillTime }));
+}
+
+// Mouse event cadences: 60 Hz with frame jitter, and a 1000 Hz gaming mouse
+const sixtyHertz = random => () => 16.667 + (random() - 0.5) * 2;
+const thousandHertz = random => () => 1 + (random() - 0.5) * 0.2;
+
+// Slow, steady hand: a few px per sample in one direction with a little tremor
+function slowDrift(random, cadence) {
+  const speed = 0.02 + random() * 0.06; // px per ms
+  const angle = random() * Math.PI * 2;
+  return collect({
+    duration: 4000,
+    eventInterval: cadence(random),
+    pointer: t => [
+      400 + Math.cos(angle) * speed * t + (random() - 0.5) * 1.5,
+      300 + Math.sin(angle) * speed * t + (random() - 0.5) * 1.5
+    ]
+  });
+}
+
+// Slow wandering: velocity drifts smoothly, never faster than ~0.15 px/ms
+function slowWander(random, cadence) {
+  let x = 500;
+  let y = 400;
+  let vx = 0;
+  let vy = 0;
+  let last = 0;
+  return collect({
+    duration: 6000,
+    eventInterval: cadence(random),
+    pointer: (t) => {
+      const dt = last ? t - last : 0;
+      last = t;
+      vx = Math.max(-0.15, Math.min(0.15, vx + (random() - 0.5) * 0.01 * dt));
+      vy = Math.max(-0.15, Math.min(0.15, vy + (random() - 0.5) * 0.01 * dt));
+      x += vx * dt;
+      y += vy * dt;
+      return [x, y];
+    }
+  });
+}
+
+// Point-to-point reaches with a minimum-jerk (bell-shaped) velocity profile
+function reaches(random, cadence) {
+  const targets = Array.from({ length: 6 }, () => [100 + random() * 1000, 100 + random() * 600]);
+  const reach = 500 + random() * 400;
+  return collect({
+    duration: targets.length * reach,
+    eventInterval: cadence(random),
+    pointer: (t) => {
+      const index = Math.min(targets.length - 1, Math.floor((t - 1000) / reach));
+      const [fromX, fromY] = index === 0 ? [600, 400] : targets[index - 1];
+      const [toX, toY] = targets[index];
+      const s = Math.min(1, ((t - 1000) % reach) / reach);
+      const progress = 10 * s ** 3 - 15 * s ** 4 + 6 * s ** 5;
+      return [fromX + (toX - fromX) * progress, fromY + (toY - fromY) * progress];
+    }
+  });
+}
+
+// Scripted movement: a fixed step on a fixed timer
+function scripted(stepX, stepY, samples = 20) {
+  return collect({
+    duration: samples * MOVE_SAMPLE_INTERVAL,
+    eventInterval: () => MOVE_SAMPLE_INTERVAL,
+    pointer: t => [100 + stepX * ((t - 1000) / MOVE_SAMPLE_INTERVAL), 100 + stepY * ((t - 1000) / MOVE_SAMPLE_INTERVAL)]
+  });
+}
+
+let passed = 0;
+let failed = 0;
+
+function check(name, success, details) {
+  if (success) {
+    passed++;
+    console.log(`${colors.green}✓ PASS${colors.reset} - ${name}`);
+  } else {
+    failed++;
+    console.log(`${colors.red}✗ FAIL${colors.reset} - ${name}${details ? `: ${JSON.stringify(details)}` : ''}`);
+  }
+}
+
+// Run a human-like generator over many seeds; none of the batches may be flagged
+function checkHuman(name, generate, seeds) {
+  const flagged = [];
+  for (let seed = 1; seed <= seeds; seed++) {
+    const features = generate(createRandom(seed));
+    if (features.regularSteps) flagged.push({ seed, moveIntervalVariation: features.moveIntervalVariation, moveCount: features.moveCount });
+  }
+  check(`${name} (${seeds} batches) not flagged`, flagged.length === 0, flagged.slice(0, 3));
+}
+
+function main() {
+  const options = parseArgs(process.argv.slice(2));
+  console.log(`${colors.blue}=== Behavior Telemetry Decoder Tests ====${colors.reset}`);
+
+  console.log(`\n${colors.cyan}Human-like movement${colors.reset}`);
+  checkHuman('Slow steady drift, 60 Hz mouse', random => slowDrift(random, sixtyHertz), options.seeds);
+  checkHuman('Slow steady drift, 1000 Hz mouse', random => slowDrift(random, thousandHertz), options.seeds);
+  checkHuman('Slow wandering, 60 Hz mouse', random => slowWander(random, sixtyHertz), options.seeds);
+  checkHuman('Slow wandering, 1000 Hz mouse', random => slowWander(random, thousandHertz), options.seeds);
+  checkHuman('Point-to-point reaches, 60 Hz mouse', random => reaches(random, sixtyHertz), options.seeds);
+  checkHuman('Point-to-point reaches, 1000 Hz mouse', random => reaches(random, thousandHertz), options.seeds);
+
+  console.log(`\n${colors.cyan}Scripted movement${colors.reset}`);
+  const diagonal = scripted(16, 8);
+  check('Constant 16x8 px step on a 50 ms timer flagged', diagonal.regularSteps, diagonal);
+  const unaligned = scripted(13, 0);
+  check('Constant 13 px step (quantized 3 or 4) flagged', unaligned.regularSteps, unaligned);
+  const tiny = scripted(4, 4);
+  check('Constant 4 px step is too small to flag', !tiny.regularSteps, tiny);
+  const short = scripted(16, 8, 6);
+  check('Six scripted samples are too few to flag', !short.regularSteps, short);
+
+  console.log(`\n${colors.cyan}Decoding${colors.reset}`);
+  const features = scripted(16, 0, 11);
+  check('Move count, path length and straightness decoded',
+    features.moveCount === 11 && features.pathLength === 160 && features.straightness === 1 && features.moveIntervalVariation === 0,
+    features);
+  let rejected = false;
+  try {
+    decodeBehaviorBatch(Uint8Array.from([1, 0, 5]));
+  } catch (error) {
+    rejected = error instanceof BehaviorPayloadError;
+  }
+  check('Truncated batch rejected with BehaviorPayloadError', rejected);
+
+  console.log(`\n${failed === 0 ? colors.green : colors.red}${passed}/${passed + failed} passed${colors.reset}`);
+  process.exitCode = failed === 0 ? 0 : 1;
+}
+
+main();
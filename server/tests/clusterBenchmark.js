@@ -0,0 +1,190 @@
+import http from 'http';
+import os from 'os';
+import path from 'path';
+import { spawn, fork } from 'child_process';
+import { fileURLToPath } from 'url';
+
+// Throughput benchmark for cluster mode: starts cluster.js with 1 worker and
+// then with N workers, drives the same keep-alive HTTP load at each and prints
+// requests/sec and latency percentiles side by side.
+//
+// Usage: node tests/clusterBenchmark.js [--workers 16] [--duration 15]
+//          [--connections 128] [--clients 4] [--path /api/benchmark] [--port 5055]
+//
+// The default path is the unprotected /api/benchmark route so the strict API
+// rate limits don't turn the run into a 429 benchmark.
+
+const __filename = fileURLToPath(import.meta.url);
+const SERVER_DIR = path.join(path.dirname(__filename), '..');
+
+const colors = {
+  reset: '\x1b[0m',
+  green: '\x1b[32m',
+  yellow: '\x1b[33m',
+  blue: '\x1b[34m',
+  cyan: '\x1b[36m'
+};
+
+function parseArgs(argv) {
+  const options = {
+    workers: os.availableParallelism?.() || os.cpus().length,
+    duration: 15,
+    connections: 128,
+    clients: Math.max(1, Math.floor((os.availableParallelism?.() || os.cpus().length) / 4)),
+    path: '/api/benchmark',
+    port: 5055
+  };
+  for (let i = 0; i < argv.length; i++) {
+    const key = argv[i].replace(/^--/, '');
+    if (key in options) {
+      options[key] = key === 'path' ? argv[++i] : Number(argv[++i]);
+    } else if (key === 'generator') {
+      options.generator = true;
+    }
+  }
+  return options;
+}
+
+function percentile(sorted, p) {
+  if (sorted.length === 0) return 0;
+  return sorted[Math.min(sorted.length - 1, Math.floor((p / 100) * sorted.length))];
+}
+
+// Load generator: `connections` keep-alive loops for `duration` seconds
+async function generateLoad({ port, path: requestPath, connections, duration }) {
+  const agent = new http.Agent({ keepAlive: true, maxSockets: connections });
+  const latencies = [];
+  const statuses = {};
+  let errors = 0;
+  const deadline = Date.now() + duration * 1000;
+
+  const request = () => new Promise((resolve) => {
+    const start = process.hrtime.bigint();
+    const req = http.get({ host: '127.0.0.1', port, path: requestPath, agent }, (res) => {
+      res.resume();
+      res.on('end', () => {
+        latencies.push(Number(process.hrtime.bigint() - start) / 1e6);
+        statuses[res.statusCode] = (statuses[res.statusCode] || 0) + 1;
+        resolve();
+      });
+    });
+    req.on('error', () => {
+      errors++;
+      resolve();
+    });
+  });
+
+  const loop = async () => {
+    while (Date.now() < deadline) {
+      await request();
+    }
+  };
+
+  await Promise.all(Array.from({ length: connections }, loop));
+  agent.destroy();
+  return { latencies, statuses, errors };
+}
+
+// Run the generator in `clients` child processes so the load side isn't the bottleneck
+function runGenerators(options) {
+  const perClient = Math.max(1, Math.round(options.connections / options.clients));
+  return Promise.all(Array.from({ length: options.clients }, () => new Promise((resolve, reject) => {
+    const child = fork(__filename, [
+      '--generator',
+      '--port', String(options.port),
+      '--path', options.path,
+      '--connections', String(perClient),
+      '--duration', String(options.duration)
+    ]);
+    child.once('message', resolve);
+    child.once('error', reject);
+  })));
+}
+
+async function waitForHealth(port, timeoutMs = 30000) {
+  const deadline = Date.now() + timeoutMs;
+  while (Date.now() < deadline) {
+    const ok = await new Promise((resolve) => {
+      http.get({ host: '127.0.0.1', port, path: '/health' }, (res) => {
+        res.resume();
+        resolve(res.statusCode === 200);
+      }).on('error', () => resolve(false));
+    });
+    if (ok) return;
+    await new Promise(resolve => setTimeout(resolve, 250));
+  }
+  throw new Error(`Server on port ${port} did not become healthy`);
+}
+
+async function benchmarkWorkers(workers, options) {
+  const serverProcess = spawn(process.execPath, ['cluster.js'], {
+    cwd: SERVER_DIR,
+    env: { ...process.env, CLUSTER_WORKERS: String(workers), PORT: String(options.port) },
+    stdio: 'ignore'
+  });
+
+  try {
+    await waitForHealth(options.port);
+    // Let every worker finish starting before measuring
+    await new Promise(resolve => setTimeout(resolve, 1000));
+
+    const started = Date.now();
+    const results = await runGenerators(options);
+    const elapsed = (Date.now() - started) / 1000;
+
+    const latencies = results.flatMap(result => result.latencies).sort((a, b) => a - b);
+    const statuses = {};
+    let errors = 0;
+    for (const result of results) {
+      errors += result.errors;
+      for (const [code, count] of Object.entries(result.statuses)) {
+        statuses[code] = (statuses[code] || 0) + count;
+      }
+    }
+
+    return {
+      workers,
+      rps: latencies.length / elapsed,
+      p50: percentile(latencies, 50),
+      p99: percentile(latencies, 99),
+      statuses,
+      errors
+    };
+  } finally {
+    serverProcess.kill('SIGTERM');
+    await new Promise(resolve => serverProcess.once('exit', resolve));
+  }
+}
+
+async function main() {
+  const options = parseArgs(process.argv.slice(2));
+
+  if (options.generator) {
+    const result = await generateLoad(options);
+    process.send(result, () => process.exit(0));
+    return;
+  }
+
+  console.log(`${colors.blue}=== Cluster Mode Throughput Benchmark ====${colors.reset}`);
+  console.log(`Path: ${options.path} | Duration: ${options.duration}s | Connections: ${options.connections} | Load clients: ${options.clients}`);
+
+  const rows = [];
+  for (const workers of [...new Set([1, options.workers])]) {
+    console.log(`\n${colors.cyan}Running with ${workers} worker(s)...${colors.reset}`);
+    const row = await benchmarkWorkers(workers, options);
+    console.log(`  ${row.rps.toFixed(0)} req/s, p50 ${row.p50.toFixed(2)} ms, p99 ${row.p99.toFixed(2)} ms, statuses ${JSON.stringify(row.statuses)}, errors ${row.errors}`);
+    rows.push(row);
+  }
+
+  console.log(`\n${colors.blue}=== Summary ====${colors.reset}`);
+  console.log('Workers | Req/s      | p50 (ms) | p99 (ms) | Speedup');
+  for (const row of rows) {
+    const speedup = row.rps / rows[0].rps;
+    console.log(`${String(row.workers).padEnd(7)} | ${row.rps.toFixed(0).padEnd(10)} | ${row.p50.toFixed(2).padEnd(8)} | ${row.p99.toFixed(2).padEnd(8)} | ${colors.green}${speedup.toFixed(2)}x${colors.reset}`);
+  }
+}
+
+main().catch((error) => {
+  console.error(`${colors.yellow}Benchmark failed: ${error.message}${colors.reset}`);
+  process.exit(1);
+});
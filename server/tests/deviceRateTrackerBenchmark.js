@@ -0,0 +1,140 @@
+import { performance } from 'perf_hooks';
+import { randomBytes } from 'crypto';
+import { createDeviceRateTracker } from '../utils/deviceRateTracker.js';
+
+// Benchmark for the per-device rate tracker at a million fingerprints:
+// first sight of every device, skewed repeat traffic (20% of devices send
+// 80% of requests) and churn past capacity, where every new device evicts
+// the least recently seen one. A simulated clock advances with every request
+// so the wheels rotate as they would at --rate requests per second. The
+// same workload then runs against a naive per-device timestamp log for
+// comparison.
+//
+// Usage: node --expose-gc tests/deviceRateTrackerBenchmark.js [--devices 1000000]
+//          [--requests 5000000] [--rate 100000] [--baseline-devices 200000]
+
+const colors = {
+  reset: '\x1b[0m',
+  green: '\x1b[32m',
+  yellow: '\x1b[33m',
+  blue: '\x1b[34m',
+  cyan: '\x1b[36m'
+};
+
+function parseArgs(argv) {
+  const options = { devices: 1000000, requests: 5000000, rate: 100000, 'baseline-devices': 200000 };
+  for (let i = 0; i < argv.length; i++) {
+    const key = argv[i].replace(/^--/, '');
+    if (key in options) options[key] = Number(argv[++i]);
+  }
+  return options;
+}
+
+function memoryInUse() {
+  global.gc?.();
+  const memory = process.memoryUsage();
+  return memory.heapUsed + memory.arrayBuffers;
+}
+
+const megabytes = bytes => `${(bytes / 1024 / 1024).toFixed(1)} MB`;
+
+function fingerprints(count) {
+  return Array.from({ length: count }, () => randomBytes(32).toString('hex'));
+}
+
+// Deterministic skew: 80% of requests go to the first 20% of devices
+function skewedIndex(i, devices) {
+  const hot = Math.max(1, Math.floor(devices / 5));
+  const mixed = Math.imul(i ^ (i >>> 15), 0x2c1b3c6d) >>> 0;
+  return mixed % 10 < 8 ? mixed % hot : hot + (mixed % (devices - hot || 1));
+}
+
+function runPhase(name, count, step) {
+  const start = performance.now();
+  for (let i = 0; i < count; i++) step(i);
+  const elapsed = performance.now() - start;
+  console.log(`  ${name.padEnd(28)} ${(count / elapsed / 1000).toFixed(2).padStart(7)} M ops/s  ${((elapsed * 1e6) / count).toFixed(0).padStart(5)} ns/op`);
+  return elapsed;
+}
+
+// Sliding log of timestamps per device: the straightforward alternative
+function createTimestampLog(now) {
+  const devices = new Map();
+  return {
+    record(fingerprint) {
+      const time = now();
+      let log = devices.get(fingerprint);
+      if (!log) {
+        log = [];
+        devices.set(fingerprint, log);
+      }
+      log.push(time);
+      while (log.length > 0 && time - log[0] > 15 * 60 * 1000) log.shift();
+      let perSecond = 0;
+      let perMinute = 0;
+      for (let i = log.length - 1; i >= 0 && time - log[i] <= 60 * 1000; i--) {
+        perMinute++;
+        if (time - log[i] <= 1000) perSecond++;
+      }
+      return { perSecond, perMinute, perQuarterHour: log.length };
+    }
+  };
+}
+
+function main() {
+  const options = parseArgs(process.argv.slice(2));
+  const msPerRequest = 1000 / options.rate;
+  if (!global.gc) {
+    console.log(`${colors.yellow}Run with --expose-gc for accurate memory figures${colors.reset}`);
+  }
+
+  console.log(`${colors.blue}=== Device Rate Tracker Benchmark ====${colors.reset}`);
+  console.log(`Devices: ${options.devices.toLocaleString()} | Repeat requests: ${options.requests.toLocaleString()} | Simulated rate: ${options.rate.toLocaleString()} req/s`);
+
+  const devices = fingerprints(options.devices);
+  const newcomers = fingerprints(options.devices);
+
+  let clock = 0;
+  const now = () => clock;
+  const before = memoryInUse();
+  const tracker = createDeviceRateTracker({ capacity: options.devices, now, sweep: false });
+
+  console.log(`\n${colors.cyan}Time-wheel tracker (capacity ${options.devices.toLocaleString()})${colors.reset}`);
+  let checksum = 0;
+  runPhase('first request per device', options.devices, (i) => {
+    clock += msPerRequest;
+    checksum += tracker.record(devices[i]).perSecond;
+  });
+  runPhase('skewed repeat traffic', options.requests, (i) => {
+    clock += msPerRequest;
+    checksum += tracker.record(devices[skewedIndex(i, options.devices)]).perMinute;
+  });
+  runPhase('churn past capacity', options.devices, (i) => {
+    clock += msPerRequest;
+    checksum += tracker.record(newcomers[i]).perSecond;
+  });
+  const trackerMemory = memoryInUse() - before;
+  const stats = tracker.getStats();
+  console.log(`  Devices tracked: ${stats.devices.toLocaleString()} | Evicted: ${stats.evicted.toLocaleString()} | Memory: ${megabytes(trackerMemory)} (${(trackerMemory / stats.devices).toFixed(0)} B/device)`);
+
+  const baselineDevices = Math.min(options['baseline-devices'], options.devices);
+  const baselineRequests = Math.round(options.requests * (baselineDevices / options.devices));
+  clock = 0;
+  const baselineBefore = memoryInUse();
+  const log = createTimestampLog(now);
+  console.log(`\n${colors.cyan}Timestamp log baseline (${baselineDevices.toLocaleString()} devices, unbounded)${colors.reset}`);
+  runPhase('first request per device', baselineDevices, (i) => {
+    clock += msPerRequest;
+    checksum += log.record(devices[i]).perSecond;
+  });
+  runPhase('skewed repeat traffic', baselineRequests, (i) => {
+    clock += msPerRequest;
+    checksum += log.record(devices[skewedIndex(i, baselineDevices)]).perMinute;
+  });
+  const baselineMemory = memoryInUse() - baselineBefore;
+  console.log(`  Memory: ${megabytes(baselineMemory)} (${(baselineMemory / baselineDevices).toFixed(0)} B/device, grows with request rate)`);
+
+  console.log(`\n${colors.green}Checksum ${checksum} (keeps results live)${colors.reset}`);
+}
+
+main();
@@ -0,0 +1,146 @@
+import http from 'http';
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import { spawn } from 'child_process';
+import { fileURLToPath } from 'url';
+
+// End-to-end check of the device_velocity block through the real middleware
+// chain: starts server.js with TRUST_PROXY=1 and sends bursts to
+// /api/products, every request from a new X-Forwarded-For address, the way
+// traffic through a rotating proxy pool arrives. Each address stays far
+// below the IP+UA API rate limit, so only the per-device rate can stop the
+// burst. A burst sharing one device (same headers, or the same X-Device-Id)
+// must be blocked once it passes the 1-second limit; a burst of distinct
+// devices must not be.
+//
+// Usage: node tests/deviceVelocityTest.js [--requests 60] [--port 5057]
+
+const __filename = fileURLToPath(import.meta.url);
+const SERVER_DIR = path.join(path.dirname(__filename), '..');
+
+const BROWSER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36';
+const PER_SECOND_LIMIT = 20;
+
+const colors = {
+  reset: '\x1b[0m',
+  red: '\x1b[31m',
+  green: '\x1b[32m',
+  blue: '\x1b[34m',
+  cyan: '\x1b[36m'
+};
+
+function parseArgs(argv) {
+  const options = { requests: 60, port: 5057 };
+  for (let i = 0; i < argv.length; i++) {
+    const key = argv[i].replace(/^--/, '');
+    if (key in options) options[key] = Number(argv[++i]);
+  }
+  return options;
+}
+
+async function waitForHealth(port, timeoutMs = 30000) {
+  const deadline = Date.now() + timeoutMs;
+  while (Date.now() < deadline) {
+    const ok = await new Promise((resolve) => {
+      http.get({ host: '127.0.0.1', port, path: '/health' }, (res) => {
+        res.resume();
+        resolve(res.statusCode === 200);
+      }).on('error', () => resolve(false));
+    });
+    if (ok) return;
+    await new Promise(resolve => setTimeout(resolve, 250));
+  }
+  throw new Error(`Server on port ${port} did not become healthy`);
+}
+
+function get(port, headers) {
+  return new Promise((resolve) => {
+    http.get({ host: '127.0.0.1', port, path: '/api/products?limit=1', headers }, (res) => {
+      res.resume();
+      res.on('end', () => resolve(res.statusCode));
+    }).on('error', () => resolve(0));
+  });
+}
+
+// One burst, all requests in flight at once; `headersFor(i)` adds per-request headers
+async function burst(options, first, headersFor) {
+  const statuses = await Promise.all(Array.from({ length: options.requests }, (_, i) => get(options.port, {
+    'User-Agent': BROWSER_AGENT,
+    'Accept': 'application/json',
+    'Accept-Language': 'en-US,en;q=0.9',
+    // A fresh 10.0.0.0/8 address per request: analyzeIP scores it without a lookup
+    'X-Forwarded-For': `10.${((first + i) >> 16) & 255}.${((first + i) >> 8) & 255}.${(first + i) & 255}`,
+    ...headersFor(i)
+  })));
+  const counts = {};
+  for (const status of statuses) counts[status] = (counts[status] || 0) + 1;
+  return counts;
+}
+
+async function main() {
+  const options = parseArgs(process.argv.slice(2));
+  const workDir = fs.mkdtempSync(path.join(os.tmpdir(), 'nextbuy-velocity-'));
+  const serverProcess = spawn(process.execPath, [path.join(SERVER_DIR, 'server.js')], {
+    cwd: workDir,
+    env: {
+      ...process.env,
+      PORT: String(options.port),
+      TRUST_PROXY: '1', // the test client is the one trusted hop
+      DEVICE_RATE_LIMITS: `${PER_SECOND_LIMIT},300,2000`,
+      MONGO_URI: '',
+      REDIS_URL: '',
+      SERVER_TIMING: 'false'
+    },
+    stdio: 'ignore'
+  });
+
+  const cases = [
+    {
+      name: 'Rotating IPs, same headers, no device id',
+      headersFor: () => ({}),
+      blocked: true
+    },
+    {
+      name: 'Rotating IPs, one X-Device-Id',
+      headersFor: () => ({ 'X-Device-Id': 'velocity-test-device' }),
+      blocked: true
+    },
+    {
+      name: 'Rotating IPs, a device id per request',
+      headersFor: i => ({ 'X-Device-Id': `velocity-test-device-${i}` }),
+      blocked: false
+    }
+  ];
+
+  console.log(`${colors.blue}=== Device Velocity Test (${options.requests} requests per burst, limit ${PER_SECOND_LIMIT}/s) ====${colors.reset}`);
+  let failures = 0;
+  try {
+    await waitForHealth(options.port);
+    for (const [index, testCase] of cases.entries()) {
+      console.log(`\n${colors.cyan}Testing: ${testCase.name}${colors.reset}`);
+      const counts = await burst(options, (index + 1) * 10000, testCase.headersFor);
+      const forbidden = counts[403] || 0;
+      // A blocked burst is stopped once it passes the limit, and never by the IP+UA limiter
+      const success = !counts[429] && (testCase.blocked
+        ? forbidden >= options.requests - PER_SECOND_LIMIT
+        : forbidden === 0);
+      if (!success) failures++;
+      console.log(`${success ? `${colors.green}✓ PASS` : `${colors.red}✗ FAIL`}${colors.reset} - responses ${JSON.stringify(counts)}, expected ${testCase.blocked ? 'device_velocity blocks' : 'no blocks'}`);
+      // Let the 1-second window drain before the next burst
+      await new Promise(resolve => setTimeout(resolve, 1500));
+    }
+  } finally {
+    serverProcess.kill('SIGTERM');
+    await new Promise(resolve => serverProcess.once('exit', resolve));
+    fs.rmSync(workDir, { recursive: true, force: true });
+  }
+
+  console.log(`\n${failures === 0 ? colors.green : colors.red}${cases.length - failures}/${cases.length} passed${colors.reset}`);
+  process.exitCode = failures === 0 ? 0 : 1;
+}
+
+main().catch((error) => {
+  console.error(`${colors.red}Device velocity test failed:${colors.reset}`, error);
+  process.exit(1);
+});
@@ -9,14 +9,23 @@ import requests
 import time
 import sys
 from concurrent.futures import ThreadPoolExecutor
+from server_timing import ServerTimingRecorder
 
 BASE_URL = "http://localhost:5000"
+SERVER_TIMING = ServerTimingRecorder()
+
+def timed_request(method, url, **kwargs):
+    """requests.request that records client latency against the server's stage timings"""
+    start_time = time.perf_counter()
+    response = requests.request(method, url, **kwargs)
+    SERVER_TIMING.record(response, (time.perf_counter() - start_time) * 1000)
+    return response
 
 def test_server_connectivity():
     """Test basic server connectivity"""
     print("🔗 Testing Server Connectivity...")
     try:
-        response = requests.get(f"{BASE_URL}/health", timeout=5)
+        response = timed_request("GET", f"{BASE_URL}/health", timeout=5)
         if response.status_code == 200:
             print("✅ PASS: Server is accessible")
             return True
@@ -39,7 +48,8 @@ def test_headless_browser_detection():
     blocked = 0
     for agent in headless_agents:
         try:
-            response = requests.get(
+            response = timed_request(
+                "GET",
                 f"{BASE_URL}/api/products",
                 headers={"User-Agent": agent},
                 timeout=5
@@ -66,7 +76,8 @@ def test_rate_limiting():
     
     try:
         for i in range(15):
-            response = requests.post(
+            response = timed_request(
+                "POST",
                 f"{BASE_URL}/api/auth/login",
                 json={"emailAddress": "test@rate.com", "passWord": "test123"},
                 headers={
@@ -132,6 +143,8 @@ def main():
     else:
         print("⚠️  Some tests failed. Please check the bot protection configuration.")
     
+    SERVER_TIMING.print_summary("⏱️  Server-Timing Breakdown (ms)")
+    
     print("=" * 70)
     print(f"📊 View detailed metrics at: {BASE_URL}/api/admin/bot-dashboard")
     print("=" * 70)
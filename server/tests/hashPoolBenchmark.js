@@ -0,0 +1,206 @@
+import http from 'http';
+import os from 'os';
+import fs from 'fs';
+import path from 'path';
+import { fork } from 'child_process';
+import { fileURLToPath } from 'url';
+
+// Login latency under a credential-stuffing burst. A server child answers
+// /login with a bcrypt compare (cost 10) and /fs with the kind of file I/O
+// saveMetrics and multer do. The parent drives three client groups at once:
+// attackers hammering /login, a few real users logging in with think time,
+// and file-I/O clients. It runs once with bcrypt on libuv's shared
+// threadpool (the old code path) and once with utils/hashPool.js, then
+// prints p50/p99 and shed (503) counts per group.
+//
+// Usage: node tests/hashPoolBenchmark.js [--duration 15] [--attackers 200]
+//          [--users 10] [--think 200] [--fs-clients 8] [--port 5057]
+//
+// HASH_POOL_SIZE, HASH_QUEUE_LIMIT and HASH_QUEUE_TIMEOUT_MS apply to the
+// pool run as they do in the server.
+
+const __filename = fileURLToPath(import.meta.url);
+
+const colors = {
+  reset: '\x1b[0m',
+  green: '\x1b[32m',
+  yellow: '\x1b[33m',
+  red: '\x1b[31m',
+  blue: '\x1b[34m',
+  cyan: '\x1b[36m'
+};
+
+function parseArgs(argv) {
+  const options = {
+    duration: 15,
+    attackers: 200,
+    users: 10,
+    think: 200,
+    'fs-clients': 8,
+    port: 5057,
+    mode: 'pool'
+  };
+  for (let i = 0; i < argv.length; i++) {
+    const key = argv[i].replace(/^--/, '');
+    if (key === 'server') {
+      options.server = true;
+    } else if (key in options) {
+      options[key] = key === 'mode' ? argv[++i] : Number(argv[++i]);
+    }
+  }
+  return options;
+}
+
+function percentile(sorted, p) {
+  if (sorted.length === 0) return 0;
+  return sorted[Math.min(sorted.length - 1, Math.floor((p / 100) * sorted.length))];
+}
+
+// Server child: bcrypt on the libuv threadpool ("threadpool") or on the hashing pool ("pool")
+async function runServer({ port, mode }) {
+  const { default: bcrypt } = await import('bcrypt');
+  const { hashPool, HashPoolBusyError } = await import('../utils/hashPool.js');
+  const storedHash = bcrypt.hashSync('correct horse battery staple', 10);
+  const workDir = fs.mkdtempSync(path.join(os.tmpdir(), 'nextbuy-hashpool-'));
+  const payload = JSON.stringify({ samples: Array.from({ length: 2000 }, (_, i) => ({ i, value: Math.random() })) });
+  let fileIndex = 0;
+
+  const send = (res, status, body) => {
+    res.writeHead(status, { 'Content-Type': 'application/json' });
+    res.end(JSON.stringify(body));
+  };
+
+  const server = http.createServer(async (req, res) => {
+    try {
+      if (req.url.startsWith('/login')) {
+        // The admission check hashAdmission applies on the auth routes
+        if (mode === 'pool' && hashPool.isSaturated()) {
+          res.setHeader('Retry-After', '2');
+          return send(res, 503, { message: 'busy' });
+        }
+        const match = mode === 'pool'
+          ? await hashPool.compare('wrong password', storedHash)
+          : await bcrypt.compare('wrong password', storedHash);
+        send(res, match ? 200 : 401, { match });
+      } else if (req.url.startsWith('/fs')) {
+        // saveMetrics/multer-style work: write a file, read it back
+        const file = path.join(workDir, `metrics-${fileIndex++ % 64}.json`);
+        await fs.promises.writeFile(file, payload);
+        await fs.promises.readFile(file);
+        send(res, 200, { ok: true });
+      } else if (req.url === '/health') {
+        send(res, 200, { status: 'ok' });
+      } else {
+        send(res, 404, {});
+      }
+    } catch (error) {
+      if (error instanceof HashPoolBusyError) {
+        res.setHeader('Retry-After', String(error.retryAfter));
+        return send(res, 503, { message: 'busy' });
+      }
+      send(res, 500, { error: error.message });
+    }
+  });
+
+  server.listen(port, '127.0.0.1', () => process.send({ ready: true }));
+  process.on('SIGTERM', () => {
+    fs.rmSync(workDir, { recursive: true, force: true });
+    process.exit(0);
+  });
+}
+
+// One client loop: request, record, optionally wait, repeat until the deadline
+async function clientLoop(agent, options, requestPath, think, record, deadline) {
+  while (Date.now() < deadline) {
+    const start = process.hrtime.bigint();
+    const status = await new Promise((resolve) => {
+      http.get({ host: '127.0.0.1', port: options.port, path: requestPath, agent }, (res) => {
+        res.resume();
+        res.on('end', () => resolve(res.statusCode));
+      }).on('error', () => resolve(0));
+    });
+    record(status, Number(process.hrtime.bigint() - start) / 1e6);
+    if (think > 0) await new Promise(resolve => setTimeout(resolve, think));
+  }
+}
+
+function createGroup() {
+  const group = { latencies: [], statuses: {} };
+  group.record = (status, ms) => {
+    group.statuses[status] = (group.statuses[status] || 0) + 1;
+    // Latency of answered (not shed) requests
+    if (status !== 503 && status !== 0) group.latencies.push(ms);
+  };
+  return group;
+}
+
+async function benchmarkMode(mode, options) {
+  const server = fork(__filename, ['--server', '--mode', mode, '--port', String(options.port)]);
+  await new Promise((resolve, reject) => {
+    server.once('message', resolve);
+    server.once('exit', code => reject(new Error(`Server exited with code ${code}`)));
+  });
+
+  const agent = new http.Agent({ keepAlive: true, maxSockets: options.attackers + options.users + options['fs-clients'] });
+  const groups = { attack: createGroup(), user: createGroup(), fs: createGroup() };
+  const deadline = Date.now() + options.duration * 1000;
+  await Promise.all([
+    ...Array.from({ length: options.attackers }, () => clientLoop(agent, options, '/login', 0, groups.attack.record, deadline)),
+    ...Array.from({ length: options.users }, () => clientLoop(agent, options, '/login', options.think, groups.user.record, deadline)),
+    ...Array.from({ length: options['fs-clients'] }, () => clientLoop(agent, options, '/fs', 0, groups.fs.record, deadline))
+  ]);
+  agent.destroy();
+  server.removeAllListeners('exit');
+  server.kill('SIGTERM');
+
+  const summary = {};
+  for (const [name, group] of Object.entries(groups)) {
+    const sorted = group.latencies.sort((a, b) => a - b);
+    const total = Object.values(group.statuses).reduce((sum, count) => sum + count, 0);
+    summary[name] = {
+      requests: total,
+      shed: group.statuses[503] || 0,
+      errors: group.statuses[0] || 0,
+      p50: percentile(sorted, 50),
+      p99: percentile(sorted, 99)
+    };
+  }
+  return summary;
+}
+
+async function main() {
+  const options = parseArgs(process.argv.slice(2));
+
+  if (options.server) {
+    await runServer(options);
+    return;
+  }
+
+  console.log(`${colors.blue}=== Hashing Pool Benchmark ====${colors.reset}`);
+  console.log(`Duration: ${options.duration}s | Attackers: ${options.attackers} | Users: ${options.users} (think ${options.think}ms) | File-I/O clients: ${options['fs-clients']}`);
+  console.log(`libuv threadpool: ${process.env.UV_THREADPOOL_SIZE || 4} threads | Hash pool: ${process.env.HASH_POOL_SIZE || 'default'} threads`);
+
+  const results = {};
+  for (const mode of ['threadpool', 'pool']) {
+    console.log(`\n${colors.cyan}Running with bcrypt on the ${mode === 'pool' ? 'hashing pool' : 'libuv threadpool'}...${colors.reset}`);
+    results[mode] = await benchmarkMode(mode, options);
+  }
+
+  console.log(`\n${colors.blue}=== Results ====${colors.reset}`);
+  console.log('Mode        | Group    | Requests | Shed (503) | p50 (ms) | p99 (ms)');
+  for (const [mode, summary] of Object.entries(results)) {
+    for (const [group, row] of Object.entries(summary)) {
+      console.log(`${mode.padEnd(11)} | ${group.padEnd(8)} | ${String(row.requests).padEnd(8)} | ${String(row.shed).padEnd(10)} | ${row.p50.toFixed(1).padEnd(8)} | ${row.p99.toFixed(1)}`);
+    }
+  }
+
+  const before = results.threadpool.user.p99;
+  const after = results.pool.user.p99;
+  const color = after < before ? colors.green : colors.yellow;
+  console.log(`\n${color}Real-user login p99: ${before.toFixed(1)} ms -> ${after.toFixed(1)} ms; file I/O p99: ${results.threadpool.fs.p99.toFixed(1)} ms -> ${results.pool.fs.p99.toFixed(1)} ms${colors.reset}`);
+}
+
+main().catch((error) => {
+  console.error(`${colors.yellow}Benchmark failed: ${error.message}${colors.reset}`);
+  process.exit(1);
+});
@@ -0,0 +1,150 @@
+import { performance } from 'perf_hooks';
+import {
+  createInjectionScanner,
+  DEFAULT_INJECTION_PATTERNS
+} from '../utils/injectionScanner.js';
+
+// Throughput benchmark for the injection scanner used by sqlInjectionCheck.
+// Compares the previous "8 regexes per top-level string" loop with the
+// single-pass nested scanner on clean JSON bodies (the worst case: every
+// byte must be inspected because nothing short-circuits).
+//
+// Usage: node tests/injectionScannerBenchmark.js [sizeMB ...]
+
+const colors = {
+  reset: '\x1b[0m',
+  green: '\x1b[32m',
+  yellow: '\x1b[33m',
+  blue: '\x1b[34m',
+  cyan: '\x1b[36m'
+};
+
+const WORDS = [
+  'wireless', 'headphones', 'smart', 'watch', 'laptop', 'stand', 'coffee',
+  'mug', 'backpack', 'ceramic', 'thermal', 'aluminum', 'travel', 'fitness',
+  'noise', 'cancellation', 'ergonomic', 'waterproof', 'compartments', 'quality'
+];
+
+// Build a clean nested payload of roughly `targetBytes` of JSON
+function buildPayload(targetBytes) {
+  const items = [];
+  let size = 0;
+  let i = 0;
+  while (size < targetBytes) {
+    const description = Array.from({ length: 40 }, (_, j) => WORDS[(i + j * 7) % WORDS.length]).join(' ');
+    const item = {
+      id: i,
+      name: `${WORDS[i % WORDS.length]} ${WORDS[(i * 3) % WORDS.length]}`,
+      tags: [WORDS[(i * 5) % WORDS.length], WORDS[(i * 11) % WORDS.length]],
+      meta: { description, notes: { text: description } }
+    };
+    size += JSON.stringify(item).length;
+    items.push(item);
+    i++;
+  }
+  return { order: 'bench', items };
+}
+
+// Previous implementation: top-level values only, one regex at a time
+function legacyScan(sources) {
+  const check = (value) => {
+    if (typeof value !== 'string') return false;
+    return DEFAULT_INJECTION_PATTERNS.some(pattern => pattern.test(value));
+  };
+  for (const value of Object.values(sources)) {
+    if (!value || typeof value !== 'object') continue;
+    for (const [key, field] of Object.entries(value)) {
+      if (check(field)) return key;
+    }
+  }
+  return null;
+}
+
+// Legacy scan over the same bytes, flattened to strings so both scanners see identical data
+function legacyScanAllStrings(strings) {
+  for (const value of strings) {
+    if (DEFAULT_INJECTION_PATTERNS.some(pattern => pattern.test(value))) return true;
+  }
+  return false;
+}
+
+function collectStrings(value, out = []) {
+  if (typeof value === 'string') out.push(value);
+  else if (value && typeof value === 'object') {
+    for (const key in value) collectStrings(value[key], out);
+  }
+  return out;
+}
+
+function time(fn, iterations) {
+  fn(); // warm up
+  const start = performance.now();
+  for (let i = 0; i < iterations; i++) fn();
+  return (performance.now() - start) / iterations;
+}
+
+function runBenchmark(sizeMB) {
+  const bytes = Math.round(sizeMB * 1024 * 1024);
+  const body = buildPayload(bytes);
+  const jsonBytes = Buffer.byteLength(JSON.stringify(body));
+  const strings = collectStrings(body);
+  const scanner = createInjectionScanner({ maxBytes: jsonBytes * 2 });
+  const iterations = Math.max(3, Math.round(50 / sizeMB));
+
+  const sanity = scanner.scan({ body });
+  if (sanity) {
+    throw new Error(`Benchmark payload unexpectedly flagged: ${JSON.stringify(sanity)}`);
+  }
+
+  const legacyTopLevelMs = time(() => legacyScan({ body }), iterations);
+  const legacyAllMs = time(() => legacyScanAllStrings(strings), iterations);
+  const scannerMs = time(() => scanner.scan({ body }), iterations);
+
+  const mbps = (ms) => ((jsonBytes / (1024 * 1024)) / (ms / 1000)).toFixed(1);
+
+  console.log(`\n${colors.cyan}Payload: ${(jsonBytes / (1024 * 1024)).toFixed(2)} MB JSON, ${strings.length} strings${colors.reset}`);
+  console.log(`  legacy (top-level only):   ${legacyTopLevelMs.toFixed(3)} ms  (inspects no nested data)`);
+  console.log(`  legacy (8 regexes/string): ${legacyAllMs.toFixed(3)} ms  ${mbps(legacyAllMs)} MB/s`);
+  console.log(`${colors.green}  single-pass scanner:       ${scannerMs.toFixed(3)} ms  ${mbps(scannerMs)} MB/s${colors.reset}`);
+}
+
+// The automaton must agree with the legacy regex list on every string
+function runEquivalenceChecks() {
+  console.log(`\n${colors.blue}=== Equivalence checks ====${colors.reset}`);
+  const scanner = createInjectionScanner();
+  const samples = [
+    "1' OR '1'='1", '1; DROP TABLE users--', "' UNION SELECT * FROM users--",
+    'admin or 1=1', 'color 1 = 1', 'OR TRUE', 'floor true', 'x and false',
+    'sp_who', '0x1f', 'information_schema', 'JavaScript:alert(1)',
+    'Wireless Headphones', 'coffee mug', 'laptop stand', 'ſelect', 'ÜNION'
+  ];
+  let mismatches = 0;
+  for (const sample of samples) {
+    const legacy = DEFAULT_INJECTION_PATTERNS.some(pattern => pattern.test(sample));
+    if (legacy !== scanner.matches(sample)) {
+      mismatches++;
+      console.log(`  ${colors.yellow}mismatch: ${JSON.stringify(sample)} legacy=${legacy}${colors.reset}`);
+    }
+  }
+  console.log(`  ${samples.length} samples, ${mismatches} mismatches`);
+}
+
+function runBudgetChecks() {
+  console.log(`\n${colors.blue}=== Budget checks ====${colors.reset}`);
+  const scanner = createInjectionScanner({ maxDepth: 8, maxBytes: 1024 });
+
+  let deep = { value: 'ok' };
+  for (let i = 0; i < 20; i++) deep = { nested: deep };
+  console.log(`  deep nesting:   ${JSON.stringify(scanner.scan({ body: deep }))}`);
+  console.log(`  oversized body: ${JSON.stringify(scanner.scan({ body: { blob: 'a'.repeat(4096) } }))}`);
+  console.log(`  nested payload: ${JSON.stringify(scanner.scan({ body: { user: { tags: ['ok', "1' OR '1'='1"] } } }))}`);
+}
+
+console.log(`${colors.blue}=== Injection Scanner Throughput Benchmark ====${colors.reset}`);
+
+const sizes = process.argv.slice(2).map(Number).filter(n => n > 0);
+for (const sizeMB of (sizes.length ? sizes : [0.1, 1, 5, 10])) {
+  runBenchmark(sizeMB);
+}
+runEquivalenceChecks();
+runBudgetChecks();
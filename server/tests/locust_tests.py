@@ -5,10 +5,14 @@ Scalable user load and bot behavior simulation
 """
 
 from locust import HttpUser, TaskSet, task, between, events
+from locust.runners import WorkerRunner
+import os
 import random
 import json
 import time
 from datetime import datetime
+from server_timing import ServerTimingRecorder
+from server_profiling import ServerProfiler
 
 class BotBehaviorTaskSet(TaskSet):
     """Simulate bot-like behavior patterns"""
@@ -138,11 +142,15 @@ class MixedUser(HttpUser):
     weight = 1
 
 # Event handlers for custom logging
+# Server stage time per request (headers appear when the server runs with SERVER_TIMING=true)
+server_timing = ServerTimingRecorder()
+
 @events.request.add_listener
 def log_request(request_type, name, response_time, response_length, response, context, exception, **kwargs):
     """Log requests with additional context"""
     if hasattr(response, 'status_code'):
         status_code = response.status_code
+        server_timing.record(response, response_time)
         
         # Log rate limiting
         if status_code == 429:
@@ -156,13 +164,36 @@ def log_request(request_type, name, response_time, response_length, response, co
         elif status_code >= 500:
             print(f"❌ Server Error: {request_type} {name} - {status_code}")
 
+@events.init_command_line_parser.add_listener
+def add_profiling_options(parser):
+    """Server profiling for the whole run (see server_profiling.py)"""
+    parser.add_argument("--server-profile", action="store_true", default=False,
+                        help="Record a server CPU profile while the test runs")
+    parser.add_argument("--server-heap-snapshot", action="store_true", default=False,
+                        help="Take a server heap snapshot when the test stops")
+    parser.add_argument("--server-profile-dir", default="",
+                        help="Where artifacts are saved (default: profiles/ next to the --csv/--html results)")
+
+# Created at test start on the master (or local) runner only
+server_profiler = None
+
 @events.test_start.add_listener
 def on_test_start(environment, **kwargs):
     """Called when test starts"""
+    global server_profiler
     print("🚀 NextBuy Locust Load Test Starting...")
     print(f"Target: {environment.host}")
     print("=" * 50)
 
+    options = environment.parsed_options
+    if options and (options.server_profile or options.server_heap_snapshot) and not isinstance(environment.runner, WorkerRunner):
+        results = options.csv_prefix or options.html_file or ""
+        profile_dir = options.server_profile_dir or os.path.join(os.path.dirname(os.path.abspath(results or "locust")), "profiles")
+        server_profiler = ServerProfiler(environment.host, output_dir=profile_dir,
+                                         cpu=options.server_profile, heap=options.server_heap_snapshot)
+        if server_profiler.cpu:
+            server_profiler.start("locust")
+
 @events.test_stop.add_listener
 def on_test_stop(environment, **kwargs):
     """Called when test stops"""
@@ -184,6 +215,16 @@ def on_test_stop(environment, **kwargs):
         for failure in stats.errors.values():
             print(f"  {failure.method} {failure.name}: {failure.occurrences} times")
 
+    server_timing.print_summary("Server-Timing Breakdown (network vs. server stages)")
+
+    global server_profiler
+    if server_profiler:
+        server_profiler.stop("locust")
+        if server_profiler.heap:
+            server_profiler.heap_snapshot("locust")
+        server_profiler.print_summary()
+        server_profiler = None
+
 if __name__ == "__main__":
     # This allows running the file directly for testing
     print("NextBuy Locust Test Suite")
@@ -0,0 +1,176 @@
+import { ProductSearchIndex, encodeCursor } from '../utils/productSearchIndex.js';
+
+// Benchmark for the product search index against the previous linear
+// substring scan. Builds a synthetic catalog (1M products by default), checks
+// that single-term results match the scan, applies incremental updates and
+// prints per-query latency percentiles for both approaches.
+//
+// Usage: node tests/productSearchBenchmark.js [--products 1000000] [--runs 50]
+
+const colors = {
+  reset: '\x1b[0m',
+  green: '\x1b[32m',
+  yellow: '\x1b[33m',
+  red: '\x1b[31m',
+  blue: '\x1b[34m'
+};
+
+const ADJECTIVES = ['wireless', 'smart', 'ergonomic', 'ceramic', 'waterproof', 'portable', 'compact', 'premium', 'vintage', 'digital', 'organic', 'foldable', 'magnetic', 'rechargeable', 'insulated', 'adjustable'];
+const NOUNS = ['headphones', 'watch', 'stand', 'mug', 'backpack', 'speaker', 'keyboard', 'lamp', 'bottle', 'charger', 'camera', 'blender', 'jacket', 'tripod', 'monitor', 'wallet', 'kettle', 'router', 'mouse', 'notebook'];
+const CATEGORIES = ['Electronics', 'Accessories', 'Home', 'Kitchen', 'Outdoor', 'Office', 'Fitness', 'Travel'];
+const FEATURES = ['noise cancellation', 'fitness tracking', 'thermal insulation', 'multiple compartments', 'fast charging', 'aluminum frame', 'bluetooth pairing', 'long battery life', 'scratch resistant glass', 'eco friendly materials', 'lifetime warranty', 'touch controls'];
+
+const QUERIES = ['headphones', 'wireless headphones', 'head', 'phone', 'ergo', 'insulation', 'blue', 'travel backpack', 'sm', 'kettle', 'zzz'];
+
+function parseArgs(argv) {
+  const options = { products: 1000000, runs: 50 };
+  for (let i = 0; i < argv.length; i++) {
+    const key = argv[i].replace(/^--/, '');
+    if (key in options) options[key] = Number(argv[++i]);
+  }
+  return options;
+}
+
+// Small deterministic PRNG so runs are comparable
+function createRandom(seed) {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6D2B79F5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+function generateProducts(count, random) {
+  const pick = list => list[Math.floor(random() * list.length)];
+  const products = new Array(count);
+  for (let i = 0; i < count; i++) {
+    products[i] = {
+      id: i + 1,
+      name: `${pick(ADJECTIVES)} ${pick(NOUNS)}`,
+      price: Math.round(random() * 50000) / 100,
+      category: pick(CATEGORIES),
+      description: `${pick(ADJECTIVES)} ${pick(NOUNS)} with ${pick(FEATURES)} and ${pick(FEATURES)}`
+    };
+  }
+  return products;
+}
+
+// The scan productRoutes used before the index
+function linearSearch(products, query) {
+  const searchTerm = query.toLowerCase().trim();
+  return products.filter(product =>
+    product.name.toLowerCase().includes(searchTerm) ||
+    product.category.toLowerCase().includes(searchTerm) ||
+    product.description.toLowerCase().includes(searchTerm)
+  );
+}
+
+function percentile(sorted, p) {
+  if (sorted.length === 0) return 0;
+  return sorted[Math.min(sorted.length - 1, Math.floor((p / 100) * sorted.length))];
+}
+
+function measure(fn, runs) {
+  const samples = [];
+  for (let i = 0; i < runs; i++) {
+    const start = process.hrtime.bigint();
+    fn();
+    samples.push(Number(process.hrtime.bigint() - start) / 1e6);
+  }
+  samples.sort((a, b) => a - b);
+  return { p50: percentile(samples, 50), p99: percentile(samples, 99) };
+}
+
+// Collect every page of a search to compare against the scan
+function collectAll(index, query) {
+  const ids = [];
+  let cursor;
+  do {
+    const page = index.search(query, { limit: 100, cursor });
+    page.items.forEach(item => ids.push(item.id));
+    cursor = page.nextCursor;
+  } while (cursor);
+  return ids;
+}
+
+function sameIds(a, b) {
+  if (a.length !== b.length) return false;
+  const sortedA = [...a].sort((x, y) => x - y);
+  const sortedB = [...b].sort((x, y) => x - y);
+  return sortedA.every((id, i) => id === sortedB[i]);
+}
+
+function main() {
+  const options = parseArgs(process.argv.slice(2));
+  const random = createRandom(42);
+  let failures = 0;
+
+  console.log(`${colors.blue}=== Product Search Index Benchmark ====${colors.reset}`);
+  console.log(`Products: ${options.products.toLocaleString()} | Runs per query: ${options.runs}`);
+
+  const products = generateProducts(options.products, random);
+
+  // Postings live in typed arrays, so count ArrayBuffer memory too
+  const memoryUsed = () => process.memoryUsage().heapUsed + process.memoryUsage().arrayBuffers;
+  const heapBefore = memoryUsed();
+  let start = process.hrtime.bigint();
+  const index = new ProductSearchIndex();
+  products.forEach(product => index.upsert(product));
+  const buildMs = Number(process.hrtime.bigint() - start) / 1e6;
+  const heapMb = (memoryUsed() - heapBefore) / (1024 * 1024);
+  console.log(`Index built in ${buildMs.toFixed(0)} ms (~${heapMb.toFixed(0)} MB)`);
+
+  // Single-term queries of 3+ characters must match the substring scan exactly
+  for (const query of ['headphones', 'phone', 'insulation', 'ergo', 'zzz']) {
+    const ok = sameIds(collectAll(index, query), linearSearch(products, query).map(p => p.id));
+    if (!ok) failures++;
+    console.log(`  ${ok ? colors.green + '✓' : colors.red + '✗'} "${query}" matches linear scan${colors.reset}`);
+  }
+
+  // Incremental updates: rename 1% of products, delete another 1%
+  const changes = Math.max(1, Math.floor(options.products / 100));
+  start = process.hrtime.bigint();
+  for (let i = 0; i < changes; i++) {
+    products[i] = { ...products[i], name: `refurbished ${products[i].name}` };
+    index.upsert(products[i]);
+  }
+  for (let i = changes; i < changes * 2; i++) {
+    index.remove(products[i].id);
+  }
+  const updateMs = Number(process.hrtime.bigint() - start) / 1e6;
+  const remaining = products.slice(0, changes).concat(products.slice(changes * 2));
+  console.log(`Applied ${changes.toLocaleString()} updates and ${changes.toLocaleString()} removals in ${updateMs.toFixed(0)} ms`);
+
+  for (const query of ['refurbished', 'headphones']) {
+    const ok = sameIds(collectAll(index, query), linearSearch(remaining, query).map(p => p.id));
+    if (!ok) failures++;
+    console.log(`  ${ok ? colors.green + '✓' : colors.red + '✗'} "${query}" matches linear scan after updates${colors.reset}`);
+  }
+
+  console.log(`\nQuery                 | Matches   | Index p50/p99 (ms) | Scan p50/p99 (ms) | Speedup`);
+  const scanRuns = Math.max(3, Math.floor(options.runs / 10));
+  for (const query of QUERIES) {
+    const first = index.search(query, { limit: 20 });
+    const indexed = measure(() => index.search(query, { limit: 20 }), options.runs);
+    const scanned = measure(() => linearSearch(remaining, query).slice(0, 20), scanRuns);
+    const speedup = scanned.p50 / Math.max(indexed.p50, 0.001);
+    console.log(`${query.padEnd(21)} | ${String(first.total).padEnd(9)} | ${`${indexed.p50.toFixed(2)} / ${indexed.p99.toFixed(2)}`.padEnd(18)} | ${`${scanned.p50.toFixed(1)} / ${scanned.p99.toFixed(1)}`.padEnd(17)} | ${colors.green}${speedup.toFixed(0)}x${colors.reset}`);
+  }
+
+  // Deep pagination stays cheap with keyset cursors
+  const page = index.search('headphones', { limit: 20 });
+  const deep = measure(() => index.search('headphones', { limit: 20, cursor: page.nextCursor }), options.runs);
+  const listing = measure(() => index.list({ limit: 20, cursor: encodeCursor({ d: Math.floor(options.products / 2) }) }), options.runs);
+  console.log(`\nNext page of "headphones": p50 ${deep.p50.toFixed(2)} ms | Catalog page at the midpoint: p50 ${listing.p50.toFixed(3)} ms`);
+
+  if (failures > 0) {
+    console.log(`\n${colors.red}${failures} equivalence check(s) failed${colors.reset}`);
+    process.exit(1);
+  }
+  console.log(`\n${colors.green}All equivalence checks passed${colors.reset}`);
+}
+
+main();
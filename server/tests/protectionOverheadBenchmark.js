@@ -0,0 +1,346 @@
+import http from 'http';
+import os from 'os';
+import fs from 'fs';
+import path from 'path';
+import { spawn, fork } from 'child_process';
+import { fileURLToPath } from 'url';
+
+// A/B benchmark of the bot-protection chain. Drives the same seeded workload
+// (product listing, lookups and searches with a mixed browser/bot UA and
+// client IP population) against the protected /api/products routes and the
+// unprotected /api/benchmark routes, then once per stage with that stage
+// switched off (DISABLED_STAGES). Prints throughput and p50/p99 per run and
+// the cost of each stage as "all stages" minus "without the stage".
+//
+// Usage: node tests/protectionOverheadBenchmark.js [--duration 10] [--warmup 2]
+//          [--connections 64] [--clients 2] [--ips 5000] [--bot-share 0.15]
+//          [--stages analyzeIP,botDetection] [--public-ips] [--geo-latency 30]
+//          [--port 5056] [--output results.json]
+//
+// Client IPs are sent as X-Forwarded-For (the server runs with TRUST_PROXY).
+// They come from 10.0.0.0/8 by default, which analyzeIP scores without a
+// lookup. --public-ips draws them from 198.18.0.0/15 (the benchmarking range)
+// instead and points the geolocation lookup at a local stub answering after
+// --geo-latency ms, so the run never calls the real ip-api.com.
+
+const __filename = fileURLToPath(import.meta.url);
+const SERVER_DIR = path.join(path.dirname(__filename), '..');
+
+const STAGES = ['requestLogging', 'mongoSanitize', 'sqlInjectionCheck', 'deviceFingerprinting', 'apiRateLimit', 'detectHeadlessBrowser', 'analyzeIP', 'botDetection'];
+
+const BROWSER_AGENTS = [
+  'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+  'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15',
+  'Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0',
+  'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1',
+  'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0'
+];
+const BOT_AGENTS = [
+  'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+  'curl/8.4.0',
+  'python-requests/2.31.0',
+  'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) HeadlessChrome/120.0.0.0 Safari/537.36'
+];
+const SEARCH_TERMS = ['headphones', 'watch', 'stand', 'mug', 'backpack', 'wireless'];
+
+const colors = {
+  reset: '\x1b[0m',
+  green: '\x1b[32m',
+  yellow: '\x1b[33m',
+  red: '\x1b[31m',
+  blue: '\x1b[34m',
+  cyan: '\x1b[36m'
+};
+
+function parseArgs(argv) {
+  const options = {
+    duration: 10,
+    warmup: 2,
+    connections: 64,
+    clients: Math.max(1, Math.floor((os.availableParallelism?.() || os.cpus().length) / 4)),
+    ips: 5000,
+    'bot-share': 0.15,
+    'geo-latency': 30,
+    stages: STAGES.join(','),
+    port: 5056,
+    prefix: '/api/products',
+    seed: 1,
+    output: null
+  };
+  for (let i = 0; i < argv.length; i++) {
+    const key = argv[i].replace(/^--/, '');
+    if (key === 'generator' || key === 'public-ips') {
+      options[key] = true;
+    } else if (key in options) {
+      const value = argv[++i];
+      options[key] = ['stages', 'prefix', 'output'].includes(key) ? value : Number(value);
+    }
+  }
+  return options;
+}
+
+// Small deterministic PRNG so every run replays the same workload
+function createRandom(seed) {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6D2B79F5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+function clientAddress(index, publicIps) {
+  // 198.18.0.0/15 is reserved for benchmarks; 10.0.0.0/8 is private
+  return publicIps
+    ? `198.${18 + ((index >> 16) & 1)}.${(index >> 8) & 255}.${index & 255}`
+    : `10.${(index >> 16) & 255}.${(index >> 8) & 255}.${index & 255}`;
+}
+
+// One request of the mixed workload: 50% listings, 30% lookups, 20% searches
+function nextRequest(random, options) {
+  const kind = random();
+  const route = kind < 0.5 ? '?limit=20'
+    : kind < 0.8 ? `/${1 + Math.floor(random() * 5)}`
+    : `/search/${SEARCH_TERMS[Math.floor(random() * SEARCH_TERMS.length)]}`;
+  const isBot = random() < options['bot-share'];
+  const agents = isBot ? BOT_AGENTS : BROWSER_AGENTS;
+  const client = Math.floor(random() * options.ips);
+  return {
+    path: `${options.prefix}${route}`,
+    headers: {
+      'User-Agent': agents[Math.floor(random() * agents.length)],
+      'Accept': 'application/json',
+      'Accept-Language': 'en-US,en;q=0.9',
+      'Accept-Encoding': 'gzip, br',
+      'X-Forwarded-For': clientAddress(client, options['public-ips']),
+      // Browsers run the app, which sends its device id; bots don't
+      ...(!isBot && { 'X-Device-Id': `benchmark-device-${client}` })
+    }
+  };
+}
+
+function percentile(sorted, p) {
+  if (sorted.length === 0) return 0;
+  return sorted[Math.min(sorted.length - 1, Math.floor((p / 100) * sorted.length))];
+}
+
+// Load generator: `connections` keep-alive loops; samples after the warm-up are kept
+async function generateLoad(options) {
+  const agent = new http.Agent({ keepAlive: true, maxSockets: options.connections });
+  const latencies = [];
+  const statuses = {};
+  let errors = 0;
+  const measureFrom = Date.now() + options.warmup * 1000;
+  const deadline = measureFrom + options.duration * 1000;
+
+  const request = ({ path: requestPath, headers }) => new Promise((resolve) => {
+    const start = process.hrtime.bigint();
+    const req = http.get({ host: '127.0.0.1', port: options.port, path: requestPath, headers, agent }, (res) => {
+      res.resume();
+      res.on('end', () => {
+        if (Date.now() >= measureFrom) {
+          latencies.push(Number(process.hrtime.bigint() - start) / 1e6);
+          statuses[res.statusCode] = (statuses[res.statusCode] || 0) + 1;
+        }
+        resolve();
+      });
+    });
+    req.on('error', () => {
+      errors++;
+      resolve();
+    });
+  });
+
+  const loop = async (index) => {
+    const random = createRandom(options.seed * 1000 + index);
+    while (Date.now() < deadline) {
+      await request(nextRequest(random, options));
+    }
+  };
+
+  await Promise.all(Array.from({ length: options.connections }, (_, index) => loop(index)));
+  agent.destroy();
+  return { latencies, statuses, errors };
+}
+
+function runGenerators(options, prefix) {
+  const perClient = Math.max(1, Math.round(options.connections / options.clients));
+  return Promise.all(Array.from({ length: options.clients }, (_, client) => new Promise((resolve, reject) => {
+    const args = [
+      '--generator',
+      '--port', String(options.port),
+      '--prefix', prefix,
+      '--connections', String(perClient),
+      '--duration', String(options.duration),
+      '--warmup', String(options.warmup),
+      '--ips', String(options.ips),
+      '--bot-share', String(options['bot-share']),
+      '--seed', String(client + 1)
+    ];
+    if (options['public-ips']) args.push('--public-ips');
+    const child = fork(__filename, args);
+    child.once('message', resolve);
+    child.once('error', reject);
+  })));
+}
+
+async function waitForHealth(port, timeoutMs = 30000) {
+  const deadline = Date.now() + timeoutMs;
+  while (Date.now() < deadline) {
+    const ok = await new Promise((resolve) => {
+      http.get({ host: '127.0.0.1', port, path: '/health' }, (res) => {
+        res.resume();
+        resolve(res.statusCode === 200);
+      }).on('error', () => resolve(false));
+    });
+    if (ok) return;
+    await new Promise(resolve => setTimeout(resolve, 250));
+  }
+  throw new Error(`Server on port ${port} did not become healthy`);
+}
+
+// Local stand-in for ip-api.com with a fixed response delay
+function startGeolocationStub(port, latency) {
+  const stub = http.createServer((req, res) => {
+    const ip = decodeURIComponent(req.url.split('?')[0].split('/').pop());
+    setTimeout(() => {
+      res.setHeader('Content-Type', 'application/json');
+      res.end(JSON.stringify({
+        status: 'success',
+        country: 'Benchmarkland',
+        countryCode: 'BL',
+        city: 'Loadtown',
+        isp: 'Benchmark Networks',
+        org: 'Benchmark Networks',
+        as: 'AS64500 Benchmark Networks',
+        proxy: false,
+        hosting: false,
+        query: ip
+      }));
+    }, latency);
+  });
+  return new Promise(resolve => stub.listen(port, '127.0.0.1', () => resolve(stub)));
+}
+
+async function benchmarkRun(run, options, workDir) {
+  // A fresh server per run: rate-limit windows and metrics start empty.
+  // It runs in a scratch directory so its metrics file doesn't touch logs/.
+  const serverProcess = spawn(process.execPath, [path.join(SERVER_DIR, 'server.js')], {
+    cwd: fs.mkdtempSync(path.join(workDir, 'run-')),
+    env: {
+      ...process.env,
+      PORT: String(options.port),
+      TRUST_PROXY: '1', // the benchmark client is the one trusted hop
+      DISABLED_STAGES: run.disabled.join(','),
+      IP_GEOLOCATION_URL: `http://127.0.0.1:${options.port + 1}/json`,
+      MONGO_URI: '',
+      REDIS_URL: '',
+      SERVER_TIMING: 'false'
+    },
+    stdio: 'ignore'
+  });
+
+  try {
+    await waitForHealth(options.port);
+    const results = await runGenerators(options, run.prefix);
+
+    const latencies = results.flatMap(result => result.latencies).sort((a, b) => a - b);
+    const statuses = {};
+    let errors = 0;
+    for (const result of results) {
+      errors += result.errors;
+      for (const [code, count] of Object.entries(result.statuses)) {
+        statuses[code] = (statuses[code] || 0) + count;
+      }
+    }
+
+    return {
+      ...run,
+      requests: latencies.length,
+      rps: latencies.length / options.duration,
+      p50: percentile(latencies, 50),
+      p99: percentile(latencies, 99),
+      statuses,
+      errors
+    };
+  } finally {
+    serverProcess.kill('SIGTERM');
+    await new Promise(resolve => serverProcess.once('exit', resolve));
+  }
+}
+
+function statusShare(statuses, total) {
+  return Object.entries(statuses)
+    .sort((a, b) => b[1] - a[1])
+    .map(([code, count]) => `${code}:${((count / Math.max(total, 1)) * 100).toFixed(0)}%`)
+    .join(' ');
+}
+
+const signed = (value, digits = 2) => `${value >= 0 ? '+' : ''}${value.toFixed(digits)}`;
+
+async function main() {
+  const options = parseArgs(process.argv.slice(2));
+
+  if (options.generator) {
+    const result = await generateLoad(options);
+    process.send(result, () => process.exit(0));
+    return;
+  }
+
+  const stages = options.stages.split(',').map(stage => stage.trim()).filter(stage => STAGES.includes(stage));
+  const runs = [
+    { name: 'unprotected (/api/benchmark)', prefix: '/api/benchmark', disabled: [] },
+    { name: 'protected, all stages', prefix: '/api/products', disabled: [] },
+    ...stages.map(stage => ({ name: `without ${stage}`, stage, prefix: '/api/products', disabled: [stage] })),
+    { name: 'protected, no stages', prefix: '/api/products', disabled: STAGES }
+  ];
+
+  console.log(`${colors.blue}=== Protection Overhead Benchmark ====${colors.reset}`);
+  console.log(`Runs: ${runs.length} x ${options.duration}s (+${options.warmup}s warm-up) | Connections: ${options.connections} | Load clients: ${options.clients}`);
+  console.log(`Clients: ${options.ips} ${options['public-ips'] ? `public IPs (geolocation stub, ${options['geo-latency']} ms)` : 'private IPs'} | Bot UA share: ${(options['bot-share'] * 100).toFixed(0)}%`);
+
+  const workDir = fs.mkdtempSync(path.join(os.tmpdir(), 'nextbuy-overhead-'));
+  const stub = await startGeolocationStub(options.port + 1, options['geo-latency']);
+  const rows = [];
+  try {
+    for (const run of runs) {
+      console.log(`\n${colors.cyan}Running: ${run.name}...${colors.reset}`);
+      const row = await benchmarkRun(run, options, workDir);
+      console.log(`  ${row.rps.toFixed(0)} req/s, p50 ${row.p50.toFixed(2)} ms, p99 ${row.p99.toFixed(2)} ms, ${statusShare(row.statuses, row.requests)}, errors ${row.errors}`);
+      rows.push(row);
+    }
+  } finally {
+    stub.close();
+    fs.rmSync(workDir, { recursive: true, force: true });
+  }
+
+  const [unprotected, protectedAll] = rows;
+  console.log(`\n${colors.blue}=== Runs ====${colors.reset}`);
+  console.log('Run                               | Req/s    | p50 (ms) | p99 (ms) | Responses');
+  for (const row of rows) {
+    console.log(`${row.name.padEnd(33)} | ${row.rps.toFixed(0).padEnd(8)} | ${row.p50.toFixed(2).padEnd(8)} | ${row.p99.toFixed(2).padEnd(8)} | ${statusShare(row.statuses, row.requests)}`);
+  }
+
+  console.log(`\n${colors.blue}=== Cost per stage (all stages minus without the stage) ====${colors.reset}`);
+  console.log('Stage                   | Throughput | p50 (ms) | p99 (ms)');
+  for (const row of rows.filter(row => row.stage)) {
+    const throughput = ((row.rps - protectedAll.rps) / Math.max(row.rps, 1)) * 100;
+    const color = protectedAll.p50 - row.p50 > 0.5 ? colors.red : colors.green;
+    console.log(`${row.stage.padEnd(23)} | ${`${signed(-throughput, 1)}%`.padEnd(10)} | ${color}${signed(protectedAll.p50 - row.p50).padEnd(8)}${colors.reset} | ${signed(protectedAll.p99 - row.p99)}`);
+  }
+  const total = ((unprotected.rps - protectedAll.rps) / Math.max(unprotected.rps, 1)) * 100;
+  console.log(`${'whole chain'.padEnd(23)} | ${`${signed(-total, 1)}%`.padEnd(10)} | ${signed(protectedAll.p50 - unprotected.p50).padEnd(8)} | ${signed(protectedAll.p99 - unprotected.p99)}`);
+  console.log(`\n${colors.yellow}Stages that block (403/429) end requests early, so turning them off can make the rest of the chain slower; check the response mix before reading a negative cost.${colors.reset}`);
+
+  if (options.output) {
+    fs.writeFileSync(options.output, JSON.stringify({ options, rows }, null, 2));
+    console.log(`\nDetailed results saved to: ${options.output}`);
+  }
+}
+
+main().catch((error) => {
+  console.error(`${colors.yellow}Benchmark failed: ${error.message}${colors.reset}`);
+  process.exit(1);
+});
@@ -10,21 +10,30 @@ import threading
 import random
 import json
 import sys
+import os
+import zlib
+import argparse
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import urllib3
+from server_timing import ServerTimingRecorder
+from server_profiling import ServerProfiler, add_profiling_arguments
 
 # Disable SSL warnings for testing
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+RESULTS_FILE = "bot_metrics.json"
+
 class NextBuyTestSuite:
-    def __init__(self, base_url="http://localhost:5000"):
+    def __init__(self, base_url="http://localhost:5000", profiler=None):
         self.base_url = base_url
         self.session = requests.Session()
         self.results = []
+        self.server_timing = ServerTimingRecorder()
+        self.profiler = profiler
         
-    def log_result(self, test_name, status_code, response_time, success, message=""):
-        """Log test results"""
+    def log_result(self, test_name, status_code, response_time, success, message="", response=None):
+        """Log test results (with the server's stage timings when the response carries them)"""
         result = {
             "test": test_name,
             "timestamp": datetime.now().isoformat(),
@@ -33,8 +42,12 @@ class NextBuyTestSuite:
             "success": success,
             "message": message
         }
+        split = self.server_timing.record(response, response_time * 1000) if response is not None else None
+        if split:
+            result["server_timing"] = split
         self.results.append(result)
-        print(f"[{test_name}] Status: {status_code} | Time: {response_time:.3f}s | {'✓' if success else '✗'} | {message}")
+        timing = f" (server {split['server_ms']:.1f}ms, network {split['network_ms']:.1f}ms)" if split else ""
+        print(f"[{test_name}] Status: {status_code} | Time: {response_time:.3f}s{timing} | {'✓' if success else '✗'} | {message}")
         
     def test_basic_health_check(self):
         """Test 1: Basic health check"""
@@ -46,7 +59,7 @@ class NextBuyTestSuite:
             success = response.status_code == 200
             message = "Health check successful" if success else "Health check failed"
             
-            self.log_result("Basic Health Check", response.status_code, response_time, success, message)
+            self.log_result("Basic Health Check", response.status_code, response_time, success, message, response=response)
             return response
         except requests.exceptions.RequestException as e:
             self.log_result("Basic Health Check", 0, 0, False, str(e))
@@ -77,7 +90,7 @@ class NextBuyTestSuite:
                 success = response.status_code in [200, 403]
                 message = f"User-Agent: {agent[:30]}..." if len(agent) > 30 else f"User-Agent: {agent}"
                 
-                self.log_result("Suspicious User Agent", response.status_code, response_time, success, message)
+                self.log_result("Suspicious User Agent", response.status_code, response_time, success, message, response=response)
                 
             except requests.exceptions.RequestException as e:
                 self.log_result("Suspicious User Agent", 0, 0, False, str(e))
@@ -109,7 +122,7 @@ class NextBuyTestSuite:
                 success = response.status_code in [400, 403, 404]
                 message = f"Payload: {payload[:30]}..." if len(payload) > 30 else f"Payload: {payload}"
                 
-                self.log_result("SQL Injection Test", response.status_code, response_time, success, message)
+                self.log_result("SQL Injection Test", response.status_code, response_time, success, message, response=response)
                 
             except requests.exceptions.RequestException as e:
                 self.log_result("SQL Injection Test", 0, 0, False, str(e))
@@ -132,7 +145,8 @@ class NextBuyTestSuite:
                         "thread_id": thread_id,
                         "request_id": i,
                         "status_code": response.status_code,
-                        "response_time": response_time
+                        "response_time": response_time,
+                        "response": response
                     })
                     
                 except requests.exceptions.RequestException as e:
@@ -153,7 +167,7 @@ class NextBuyTestSuite:
                 for result in thread_results:
                     success = result["status_code"] == 200
                     message = f"Thread {result['thread_id']}, Request {result['request_id']}"
-                    self.log_result("Concurrent Request", result["status_code"], result["response_time"], success, message)
+                    self.log_result("Concurrent Request", result["status_code"], result["response_time"], success, message, response=result.get("response"))
     
     def test_post_requests(self):
         """Test 5: POST request variations"""
@@ -199,7 +213,7 @@ class NextBuyTestSuite:
                 response_time = time.time() - start_time
                 success = response.status_code in [200, 400, 404]  # Various acceptable responses
                 
-                self.log_result("POST Request", response.status_code, response_time, success, test["name"])
+                self.log_result("POST Request", response.status_code, response_time, success, test["name"], response=response)
                 
             except requests.exceptions.RequestException as e:
                 self.log_result("POST Request", 0, 0, False, f"{test['name']}: {str(e)}")
@@ -228,7 +242,7 @@ class NextBuyTestSuite:
                 success = response.status_code in [200, 400, 403]
                 header_desc = ", ".join([f"{k}: {v}" for k, v in headers.items()])
                 
-                self.log_result("Header Manipulation", response.status_code, response_time, success, header_desc)
+                self.log_result("Header Manipulation", response.status_code, response_time, success, header_desc, response=response)
                 
             except requests.exceptions.RequestException as e:
                 self.log_result("Header Manipulation", 0, 0, False, str(e))
@@ -254,12 +268,23 @@ class NextBuyTestSuite:
             success = response1.status_code == 200 and response2.status_code == 200
             message = f"Cookies received: {cookies_received}"
             
-            self.log_result("Session Test 1", response1.status_code, response_time1, success, message)
-            self.log_result("Session Test 2", response2.status_code, response_time2, success, "Follow-up request")
+            self.log_result("Session Test 1", response1.status_code, response_time1, success, message, response=response1)
+            self.log_result("Session Test 2", response2.status_code, response_time2, success, "Follow-up request", response=response2)
             
         except requests.exceptions.RequestException as e:
             self.log_result("Session Test", 0, 0, False, str(e))
     
+    @staticmethod
+    def ndjson_gzip_chunks(records, chunk_records=1000):
+        """Yield records as gzip-compressed NDJSON, a chunk at a time (sent with chunked encoding)"""
+        compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+        for start in range(0, len(records), chunk_records):
+            lines = "".join(json.dumps(record) + "\n" for record in records[start:start + chunk_records])
+            chunk = compressor.compress(lines.encode("utf-8"))
+            if chunk:
+                yield chunk
+        yield compressor.flush()
+    
     def generate_report(self):
         """Generate test report and send to server"""
         print("\n" + "="*60)
@@ -295,8 +320,15 @@ class NextBuyTestSuite:
             print(f"  Min: {min_time:.3f}s")
             print(f"  Max: {max_time:.3f}s")
         
+        # Network vs. server stage split (needs SERVER_TIMING=true on the server)
+        self.server_timing.print_summary()
+        
+        # CPU profiles / heap snapshots captured per phase (--profile, --heap-snapshot)
+        if self.profiler:
+            self.profiler.print_summary()
+        
         # Save detailed results to file
-        filename = "bot_metrics.json"
+        filename = RESULTS_FILE
         
         with open(filename, 'w') as f:
             json.dump(self.results, f, indent=2)
@@ -306,13 +338,18 @@ class NextBuyTestSuite:
         # Send results to the server
         try:
             print("\nSending test results to the server...")
+            # Streamed as gzip NDJSON so large runs are applied incrementally
             response = self.session.post(
-                f"{self.base_url}/api/admin/bot-metrics/ingest",
-                json=self.results,
-                headers={"Content-Type": "application/json", "X-Admin-API-Key": "nextbuy-admin-key-2024"}
+                f"{self.base_url}/api/admin/bot-metrics/ingest/stream",
+                data=self.ndjson_gzip_chunks(self.results),
+                headers={
+                    "Content-Type": "application/x-ndjson",
+                    "Content-Encoding": "gzip",
+                    "X-Admin-API-Key": "nextbuy-admin-key-2024"
+                }
             )
             if response.status_code == 200:
-                print("✅ Test results successfully ingested by the server.")
+                print(f"✅ Test results successfully ingested by the server ({response.json().get('ingested', 0)} records).")
             else:
                 print(f"❌ Failed to send test results to the server. Status: {response.status_code}")
                 print(response.text)
@@ -322,11 +359,21 @@ class NextBuyTestSuite:
         print("="*60)
 
 def main():
+    parser = argparse.ArgumentParser(description="NextBuy Python + Requests Test Suite")
+    parser.add_argument("--url", default="http://localhost:5000", help="Server base URL")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    
     print("NextBuy Python + Requests Test Suite")
     print("====================================")
     
+    # Server CPU profile / heap snapshot per phase; artifacts land next to the results file
+    profile_dir = args.profile_dir or os.path.join(os.path.dirname(os.path.abspath(RESULTS_FILE)), "profiles")
+    profiler = ServerProfiler(args.url, output_dir=profile_dir, cpu=args.profile,
+                              heap=args.heap_snapshot, sampling_interval=args.profile_interval)
+    
     # Check if server is running
-    test_suite = NextBuyTestSuite()
+    test_suite = NextBuyTestSuite(args.url, profiler=profiler)
     
     print("Checking if NextBuy server is running...")
     health_response = test_suite.test_basic_health_check()
@@ -338,26 +385,20 @@ def main():
     
     print("✅ NextBuy server is running\n")
     
-    # Run all tests
+    # Run all tests (each phase profiled on the server when requested)
     print("Starting comprehensive test suite...\n")
-    
-    print("\n1. Testing suspicious user agents...")
-    test_suite.test_suspicious_user_agents()
-    
-    print("\n2. Testing SQL injection protection...")
-    test_suite.test_sql_injection_attempts()
-    
-    print("\n3. Testing concurrent requests...")
-    test_suite.test_concurrent_requests()
-    
-    print("\n4. Testing POST requests...")
-    test_suite.test_post_requests()
-    
-    print("\n5. Testing header manipulation...")
-    test_suite.test_header_manipulation()
-    
-    print("\n6. Testing session behavior...")
-    test_suite.test_session_behavior()
+    phases = [
+        ("1. Testing suspicious user agents...", "user-agents", test_suite.test_suspicious_user_agents),
+        ("2. Testing SQL injection protection...", "sql-injection", test_suite.test_sql_injection_attempts),
+        ("3. Testing concurrent requests...", "concurrent", test_suite.test_concurrent_requests),
+        ("4. Testing POST requests...", "post-requests", test_suite.test_post_requests),
+        ("5. Testing header manipulation...", "header-manipulation", test_suite.test_header_manipulation),
+        ("6. Testing session behavior...", "session", test_suite.test_session_behavior),
+    ]
+    for title, phase, run in phases:
+        print(f"\n{title}")
+        with profiler.capture(phase):
+            run()
     
     # Generate final report
     test_suite.generate_report()
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+NextBuy Bot-Scoring Simulator
+Offline replica of the botDetection decision (detectHeadlessBrowser, analyzeIP
+and behavioralAnalysis scores combined as bot x 0.3 + ip x 0.2 + behavior x 0.5,
+blocked above 0.5) evaluated with NumPy over labelled synthetic or replayed
+events. Sweeps the combination weights and the threshold and reports
+precision, recall, false-positive rate and block rate for every setting.
+
+Every score is a sum of rule hits, so each event reduces to a small profile
+(which rules fired, plus its population). Events are folded into profile
+counts with np.bincount in chunks; the sweep then scores the profile table
+only, so tens of millions of events cost one pass and the sweep is instant.
+Rate limiting, device velocity (utils/deviceRateTracker.js) and the honeypot
+are not modelled.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ NumPy is required: pip install numpy")
+    sys.exit(1)
+
+# Production settings (middleware/botProtection.js botDetection)
+CURRENT_WEIGHTS = (0.3, 0.2, 0.5)
+CURRENT_THRESHOLD = 0.5
+
+UA_CLASSES = ["clean", "known_bot", "headless_or_inconsistent"]
+IP_KINDS = ["localhost", "private", "public", "lookup_failed"]
+RULE_COLUMNS = [
+    "high_risk_country", "proxy_or_hosting", "suspicious_isp", "bot_asn",
+    "telemetry", "mouse_moves", "regular_steps", "fast_clicks", "fast_form"
+]
+
+# Same lists as detectHeadlessBrowser and analyzeIP
+HEADLESS_INDICATORS = ["headless", "phantomjs", "puppeteer", "selenium", "webdriver", "chrome-headless",
+                       "playwright", "jsdom", "nightmare", "zombie"]
+KNOWN_BOTS = ["googlebot", "bingbot", "slurp", "duckduckbot", "baiduspider", "yandexbot", "facebookexternalhit",
+              "twitterbot", "linkedinbot", "whatsapp", "telegrambot", "slackbot", "discordbot", "curl", "wget",
+              "python-requests", "bot", "crawler", "spider", "scraper"]
+HIGH_RISK_COUNTRIES = {"CN", "RU", "KP", "IR", "VN", "BD", "PK", "ID"}
+SUSPICIOUS_ISP_KEYWORDS = ["vpn", "proxy", "hosting", "datacenter", "cloud", "amazon", "google cloud", "microsoft",
+                           "digitalocean", "vultr", "linode"]
+BOT_ASNS = ["AS15169", "AS8075", "AS13335", "AS16509"]
+
+# Synthetic traffic: share within its class, UA class and IP kind
+# probabilities, then the probability of each rule firing. Behavioral rules
+# only fire for events that sent telemetry.
+POPULATIONS = [
+    {"name": "browser", "bot": False, "share": 0.85, "ua": [0.995, 0.0, 0.005], "ip": [0.0, 0.02, 0.97, 0.01],
+     "high_risk_country": 0.04, "proxy_or_hosting": 0.02, "suspicious_isp": 0.03, "bot_asn": 0.01,
+     "telemetry": 0.35, "mouse_moves": 0.95, "regular_steps": 0.01, "fast_clicks": 0.02, "fast_form": 0.04},
+    {"name": "vpn_user", "bot": False, "share": 0.15, "ua": [1.0, 0.0, 0.0], "ip": [0.0, 0.0, 0.98, 0.02],
+     "high_risk_country": 0.15, "proxy_or_hosting": 0.9, "suspicious_isp": 0.7, "bot_asn": 0.1,
+     "telemetry": 0.35, "mouse_moves": 0.95, "regular_steps": 0.01, "fast_clicks": 0.02, "fast_form": 0.04},
+    {"name": "seo_crawler", "bot": True, "share": 0.15, "ua": [0.0, 1.0, 0.0], "ip": [0.0, 0.0, 1.0, 0.0],
+     "high_risk_country": 0.0, "proxy_or_hosting": 0.3, "suspicious_isp": 0.6, "bot_asn": 0.9,
+     "telemetry": 0.0, "mouse_moves": 0.0, "regular_steps": 0.0, "fast_clicks": 0.0, "fast_form": 0.0},
+    {"name": "http_client", "bot": True, "share": 0.35, "ua": [0.0, 1.0, 0.0], "ip": [0.0, 0.0, 0.99, 0.01],
+     "high_risk_country": 0.35, "proxy_or_hosting": 0.6, "suspicious_isp": 0.7, "bot_asn": 0.4,
+     "telemetry": 0.0, "mouse_moves": 0.0, "regular_steps": 0.0, "fast_clicks": 0.0, "fast_form": 0.0},
+    {"name": "headless", "bot": True, "share": 0.2, "ua": [0.3, 0.0, 0.7], "ip": [0.0, 0.0, 0.99, 0.01],
+     "high_risk_country": 0.2, "proxy_or_hosting": 0.7, "suspicious_isp": 0.7, "bot_asn": 0.3,
+     "telemetry": 0.6, "mouse_moves": 0.5, "regular_steps": 0.6, "fast_clicks": 0.5, "fast_form": 0.7},
+    {"name": "stealth", "bot": True, "share": 0.3, "ua": [1.0, 0.0, 0.0], "ip": [0.0, 0.0, 0.98, 0.02],
+     "high_risk_country": 0.4, "proxy_or_hosting": 0.5, "suspicious_isp": 0.5, "bot_asn": 0.2,
+     "telemetry": 0.4, "mouse_moves": 0.6, "regular_steps": 0.4, "fast_clicks": 0.4, "fast_form": 0.6},
+]
+
+
+def profile_shape(population_count):
+    return (population_count, len(UA_CLASSES), len(IP_KINDS)) + (2,) * len(RULE_COLUMNS)
+
+
+def profile_counts(chunks, population_count):
+    """Fold event chunks (dicts of column arrays) into counts per profile"""
+    shape = profile_shape(population_count)
+    counts = np.zeros(int(np.prod(shape)), dtype=np.int64)
+    events = 0
+    for chunk in chunks:
+        index = np.ravel_multi_index(
+            (chunk["population"], chunk["ua_class"], chunk["ip_kind"]) + tuple(chunk[column] for column in RULE_COLUMNS),
+            shape
+        )
+        counts += np.bincount(index, minlength=counts.size)
+        events += len(index)
+    return counts, events
+
+
+def synthetic_chunks(events, bot_share, seed, chunk_size=2_000_000):
+    """Yield labelled synthetic events drawn from POPULATIONS"""
+    rng = np.random.default_rng(seed)
+    shares = np.array([
+        population["share"] * (bot_share if population["bot"] else 1 - bot_share) for population in POPULATIONS
+    ])
+    shares /= shares.sum()
+
+    remaining = events
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        remaining -= size
+        parts = []
+        for population_id, count in enumerate(rng.multinomial(size, shares)):
+            if count == 0:
+                continue
+            population = POPULATIONS[population_id]
+            part = {
+                "population": np.full(count, population_id, dtype=np.uint8),
+                "ua_class": rng.choice(len(UA_CLASSES), count, p=population["ua"]).astype(np.uint8),
+                "ip_kind": rng.choice(len(IP_KINDS), count, p=population["ip"]).astype(np.uint8),
+            }
+            public = part["ip_kind"] == IP_KINDS.index("public")
+            for column in ["high_risk_country", "proxy_or_hosting", "suspicious_isp", "bot_asn"]:
+                part[column] = ((rng.random(count) < population[column]) & public).astype(np.uint8)
+            telemetry = rng.random(count) < population["telemetry"]
+            part["telemetry"] = telemetry.astype(np.uint8)
+            moves = telemetry & (rng.random(count) < population["mouse_moves"])
+            part["mouse_moves"] = moves.astype(np.uint8)
+            part["regular_steps"] = (moves & (rng.random(count) < population["regular_steps"])).astype(np.uint8)
+            for column in ["fast_clicks", "fast_form"]:
+                part[column] = (telemetry & (rng.random(count) < population[column])).astype(np.uint8)
+            parts.append(part)
+        yield {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def classify_user_agent(user_agent):
+    """UA class index as detectHeadlessBrowser decides it"""
+    lower = user_agent.lower()
+    # UAParser's OS/browser consistency check, reduced to its practical case:
+    # a Windows UA that also claims Linux
+    inconsistent = "windows" in lower and "linux" in lower and "android" not in lower
+    if inconsistent or any(indicator in lower for indicator in HEADLESS_INDICATORS):
+        return 2
+    if any(bot in lower for bot in KNOWN_BOTS):
+        return 1
+    return 0
+
+
+def replay_record_columns(record, ua_cache):
+    """Feature values for one replayed event (see TEST_SUITE_README for the record layout)"""
+    user_agent = record.get("userAgent") or ""
+    if user_agent not in ua_cache:
+        ua_cache[user_agent] = classify_user_agent(user_agent)
+
+    ip = record.get("ip") or ""
+    geo = record.get("geo") or {}
+    rules = dict.fromkeys(RULE_COLUMNS, 0)
+    if "127.0.0.1" in ip or "::1" in ip:
+        ip_kind = 0
+    elif ip.startswith(("192.168.", "10.", "172.")):
+        ip_kind = 1
+    elif geo.get("status") == "success":
+        ip_kind = 2
+        isp = f"{(geo.get('isp') or '').lower()} {(geo.get('org') or '').lower()}"
+        rules["high_risk_country"] = int(geo.get("countryCode") in HIGH_RISK_COUNTRIES)
+        rules["proxy_or_hosting"] = int(geo.get("proxy") is True or geo.get("hosting") is True)
+        rules["suspicious_isp"] = int(any(keyword in isp for keyword in SUSPICIOUS_ISP_KEYWORDS))
+        rules["bot_asn"] = int(any(asn in (geo.get("as") or "") for asn in BOT_ASNS))
+    else:
+        ip_kind = 3
+
+    behavior = record.get("behavior")
+    if behavior is not None:
+        moves = behavior.get("mouseMovementCount") or 0
+        rules["telemetry"] = 1
+        rules["mouse_moves"] = int(moves > 0)
+        rules["regular_steps"] = int(bool(behavior.get("regularSteps")) and moves > 5)
+        rules["fast_clicks"] = int(bool(behavior.get("clickSpeed")) and behavior["clickSpeed"] < 50)
+        rules["fast_form"] = int(bool(behavior.get("formFillTime")) and behavior["formFillTime"] < 500)
+
+    label = record.get("label")
+    is_bot = label in (1, True, "bot")
+    return [int(is_bot), ua_cache[user_agent], ip_kind] + [rules[column] for column in RULE_COLUMNS]
+
+
+def replay_chunks(path, chunk_size=1_000_000):
+    """Yield feature columns from an NDJSON replay or a saved .npz"""
+    columns = ["population", "ua_class", "ip_kind"] + RULE_COLUMNS
+    if path.endswith(".npz"):
+        data = np.load(path)
+        total = len(data["population"])
+        arrays = {column: data[column] for column in columns}
+        for start in range(0, total, chunk_size):
+            yield {column: arrays[column][start:start + chunk_size] for column in columns}
+        return
+
+    ua_cache = {}
+    rows = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(replay_record_columns(json.loads(line), ua_cache))
+            except (ValueError, AttributeError, TypeError):
+                continue
+            if len(rows) >= chunk_size:
+                matrix = np.array(rows, dtype=np.uint8)
+                rows = []
+                yield {column: matrix[:, i] for i, column in enumerate(columns)}
+    if rows:
+        matrix = np.array(rows, dtype=np.uint8)
+        yield {column: matrix[:, i] for i, column in enumerate(columns)}
+
+
+def save_columns(chunks, path):
+    """Pass chunks through while collecting them into an .npz for faster re-runs"""
+    collected = []
+    for chunk in chunks:
+        collected.append(chunk)
+        yield chunk
+    np.savez_compressed(path, **{key: np.concatenate([chunk[key] for chunk in collected]) for key in collected[0]})
+
+
+def component_scores(table):
+    """botScore, ipScore and behaviorScore per profile, accumulated in the middleware's order"""
+    bot = np.choose(table["ua_class"], [0.1, 0.6, 0.9])
+
+    risk = np.full(len(bot), 0.3)
+    risk = risk + np.where(table["high_risk_country"] == 1, 0.3, 0.0)
+    risk = risk + np.where(table["proxy_or_hosting"] == 1, 0.4, 0.0)
+    risk = risk + np.where(table["suspicious_isp"] == 1, 0.2, 0.0)
+    risk = risk + np.where(table["bot_asn"] == 1, 0.1, 0.0)
+    ip = np.choose(table["ip_kind"], [np.full(len(bot), 0.3), np.full(len(bot), 0.4), np.minimum(risk, 1.0),
+                                      np.full(len(bot), 0.5)])
+
+    behavior = np.full(len(bot), 0.5)
+    behavior = behavior - np.where(table["mouse_moves"] == 1, 0.2, 0.0)
+    behavior = behavior + np.where(table["regular_steps"] == 1, 0.3, 0.0)
+    behavior = behavior + np.where(table["fast_clicks"] == 1, 0.3, 0.0)
+    behavior = behavior + np.where(table["fast_form"] == 1, 0.3, 0.0)
+    behavior = np.clip(behavior, 0.0, 1.0)
+    # Without telemetry botDetection falls back to a neutral 0.5
+    behavior = np.where(table["telemetry"] == 1, behavior, 0.5)
+    return bot, ip, behavior
+
+
+def profile_table(counts, population_count):
+    """Non-empty profiles as column arrays plus their event counts"""
+    occupied = np.flatnonzero(counts)
+    names = ["population", "ua_class", "ip_kind"] + RULE_COLUMNS
+    indices = np.unravel_index(occupied, profile_shape(population_count))
+    table = dict(zip(names, indices))
+    table["count"] = counts[occupied]
+    return table
+
+
+def weight_grid(step):
+    """All (bot, ip, behavior) weights on a step grid that sum to 1"""
+    units = int(round(1 / step))
+    grid = [(b / units, i / units, (units - b - i) / units)
+            for b in range(units + 1) for i in range(units + 1 - b)]
+    return np.array(grid)
+
+
+def sweep(table, is_bot_population, weights, thresholds, score_flagged=False):
+    """Confusion counts for every weight row and threshold: arrays shaped (weights, thresholds)"""
+    bot, ip, behavior = component_scores(table)
+    # Same operation order as botDetection: bot*w + ip*w + behavior*w
+    combined = bot[:, None] * weights[:, 0] + ip[:, None] * weights[:, 1] + behavior[:, None] * weights[:, 2]
+    # detectHeadlessBrowser verdicts block regardless of the combined score
+    flagged = (table["ua_class"] != 0) if not score_flagged else np.zeros(len(bot), dtype=bool)
+
+    is_bot = is_bot_population[table["population"]]
+    bot_counts = np.where(is_bot, table["count"], 0).astype(np.float64)
+    human_counts = np.where(is_bot, 0, table["count"]).astype(np.float64)
+
+    blocked = (combined[:, :, None] > thresholds[None, None, :]) | flagged[:, None, None]
+    true_positives = np.einsum("k,kwt->wt", bot_counts, blocked)
+    false_positives = np.einsum("k,kwt->wt", human_counts, blocked)
+    return true_positives, false_positives, bot_counts.sum(), human_counts.sum()
+
+
+def metrics(true_positives, false_positives, bots, humans):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(true_positives + false_positives > 0,
+                             true_positives / (true_positives + false_positives), 1.0)
+        recall = true_positives / bots if bots else np.zeros_like(true_positives)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    return {
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "false_positive_rate": false_positives / humans if humans else np.zeros_like(false_positives),
+        "block_rate": (true_positives + false_positives) / (bots + humans),
+    }
+
+
+def population_block_rates(table, population_names, weights, threshold, score_flagged):
+    """Share of each population blocked at one setting"""
+    bot, ip, behavior = component_scores(table)
+    combined = bot * weights[0] + ip * weights[1] + behavior * weights[2]
+    blocked = combined > threshold
+    if not score_flagged:
+        blocked |= table["ua_class"] != 0
+    totals = np.bincount(table["population"], weights=table["count"], minlength=len(population_names))
+    hits = np.bincount(table["population"], weights=table["count"] * blocked, minlength=len(population_names))
+    return {name: (hits[i] / totals[i] if totals[i] else None) for i, name in enumerate(population_names)}
+
+
+def format_row(weights, threshold, values):
+    return (f"  w=({weights[0]:.2f}, {weights[1]:.2f}, {weights[2]:.2f}) t={threshold:.2f}  "
+            f"precision {values['precision']:.3f}  recall {values['recall']:.3f}  "
+            f"FPR {values['false_positive_rate']:.4f}  block rate {values['block_rate']:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NextBuy offline bot-scoring simulator")
+    parser.add_argument("--events", type=int, default=10_000_000, help="Synthetic events to generate")
+    parser.add_argument("--bot-share", type=float, default=0.3, help="Share of synthetic events from bots")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic traffic")
+    parser.add_argument("--input", help="Replay labelled events from NDJSON or a saved .npz instead")
+    parser.add_argument("--save-columns", help="Save the replayed feature columns as .npz for faster re-runs")
+    parser.add_argument("--weight-step", type=float, default=0.05, help="Grid step for the weight sweep")
+    parser.add_argument("--thresholds", default="0.2:0.9:0.01", help="Threshold sweep as start:stop:step")
+    parser.add_argument("--max-fpr", type=float, default=0.01, help="False-positive budget for the recommendation")
+    parser.add_argument("--score-flagged", action="store_true",
+                        help="Score headless/known-bot UAs instead of blocking them outright")
+    parser.add_argument("--output", help="Sweep CSV path (default: scoring_sweep_<timestamp>.csv)")
+    parser.add_argument("--plot", help="Save precision/recall and block-rate curves as an image (needs matplotlib)")
+    args = parser.parse_args()
+
+    print("NextBuy Bot-Scoring Simulator")
+    print("=============================")
+
+    if args.input:
+        population_names = ["human", "bot"]
+        is_bot_population = np.array([False, True])
+        chunks = replay_chunks(args.input)
+        if args.save_columns and not args.input.endswith(".npz"):
+            chunks = save_columns(chunks, args.save_columns)
+        print(f"Replaying events from {args.input}")
+    else:
+        population_names = [population["name"] for population in POPULATIONS]
+        is_bot_population = np.array([population["bot"] for population in POPULATIONS])
+        chunks = synthetic_chunks(args.events, args.bot_share, args.seed)
+        print(f"Generating {args.events:,} synthetic events ({args.bot_share:.0%} bots, seed {args.seed})")
+
+    started = time.perf_counter()
+    counts, events = profile_counts(chunks, len(population_names))
+    if events == 0:
+        print("❌ No events to score")
+        sys.exit(1)
+    table = profile_table(counts, len(population_names))
+    profiled = time.perf_counter() - started
+    print(f"Folded {events:,} events into {len(table['count']):,} profiles in {profiled:.2f}s "
+          f"({events / profiled / 1e6:.1f}M events/s)")
+
+    start, stop, step = (float(part) for part in args.thresholds.split(":"))
+    thresholds = np.round(np.arange(start, stop + step / 2, step), 6)
+    weights = weight_grid(args.weight_step)
+
+    started = time.perf_counter()
+    true_positives, false_positives, bots, humans = sweep(table, is_bot_population, weights, thresholds,
+                                                           args.score_flagged)
+    results = metrics(true_positives, false_positives, bots, humans)
+    print(f"Swept {len(weights)} weight settings x {len(thresholds)} thresholds in {time.perf_counter() - started:.2f}s")
+
+    current_tp, current_fp, _, _ = sweep(table, is_bot_population, np.array([CURRENT_WEIGHTS]),
+                                         np.array([CURRENT_THRESHOLD]), args.score_flagged)
+    current = {key: value[0, 0] for key, value in metrics(current_tp, current_fp, bots, humans).items()}
+
+    print("\n" + "=" * 60)
+    print("SCORING SWEEP REPORT")
+    print("=" * 60)
+    print(f"Events: {events:,} ({bots:,.0f} bots, {humans:,.0f} humans)"
+          f"{' | UA verdicts scored, not blocking' if args.score_flagged else ''}")
+    print("Current production setting:")
+    print(format_row(CURRENT_WEIGHTS, CURRENT_THRESHOLD, current))
+
+    best = np.unravel_index(np.argmax(results["f1"]), results["f1"].shape)
+    print("Best F1:")
+    print(format_row(weights[best[0]], thresholds[best[1]], {key: value[best] for key, value in results.items()}))
+
+    within_budget = results["false_positive_rate"] <= args.max_fpr
+    recommended = None
+    if within_budget.any():
+        recall = np.where(within_budget, results["recall"], -1)
+        recommended = np.unravel_index(np.argmax(recall), recall.shape)
+        print(f"Best recall with FPR <= {args.max_fpr}:")
+        print(format_row(weights[recommended[0]], thresholds[recommended[1]],
+                         {key: value[recommended] for key, value in results.items()}))
+    else:
+        print(f"⚠️  No setting keeps the false-positive rate under {args.max_fpr}")
+
+    current_row = np.argmin(np.abs(weights - np.array(CURRENT_WEIGHTS)).sum(axis=1))
+    print(f"\nThreshold curve for w=({weights[current_row][0]:.2f}, {weights[current_row][1]:.2f}, "
+          f"{weights[current_row][2]:.2f}):")
+    print("  threshold | precision | recall | FPR    | block rate")
+    for t in range(0, len(thresholds), max(1, len(thresholds) // 14)):
+        print(f"  {thresholds[t]:<9.2f} | {results['precision'][current_row, t]:<9.3f} | "
+              f"{results['recall'][current_row, t]:<6.3f} | {results['false_positive_rate'][current_row, t]:<6.4f} | "
+              f"{results['block_rate'][current_row, t]:.3f}")
+
+    print("\nBlocked share per population (current" + (" / recommended)" if recommended else ")"))
+    current_rates = population_block_rates(table, population_names, CURRENT_WEIGHTS, CURRENT_THRESHOLD,
+                                           args.score_flagged)
+    recommended_rates = population_block_rates(table, population_names, weights[recommended[0]],
+                                               thresholds[recommended[1]], args.score_flagged) if recommended else {}
+    for name in population_names:
+        if current_rates[name] is None:
+            continue
+        line = f"  {name:<12} {current_rates[name]:.3f}"
+        if recommended:
+            line += f" / {recommended_rates[name]:.3f}"
+        print(line)
+    print("=" * 60)
+
+    output = args.output or f"scoring_sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    with open(output, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["w_bot", "w_ip", "w_behavior", "threshold", "precision", "recall", "f1",
+                         "false_positive_rate", "block_rate"])
+        for w, weight in enumerate(weights):
+            for t, threshold in enumerate(thresholds):
+                writer.writerow([f"{weight[0]:.4f}", f"{weight[1]:.4f}", f"{weight[2]:.4f}", f"{threshold:.4f}"] +
+                                [f"{results[key][w, t]:.6f}" for key in
+                                 ["precision", "recall", "f1", "false_positive_rate", "block_rate"]])
+    print(f"Sweep saved to: {output}")
+
+    if args.plot:
+        try:
+            import matplotlib
+            matplotlib.use("Agg")
+            import matplotlib.pyplot as plt
+        except ImportError:
+            print("⚠️  matplotlib is not installed; skipping the plot")
+            return
+        fig, (curve, rates) = plt.subplots(1, 2, figsize=(12, 5))
+        curve.plot(results["recall"][current_row], results["precision"][current_row], label="current weights")
+        if recommended:
+            curve.plot(results["recall"][recommended[0]], results["precision"][recommended[0]], label="recommended weights")
+        curve.set_xlabel("recall")
+        curve.set_ylabel("precision")
+        curve.legend()
+        rates.plot(thresholds, results["block_rate"][current_row], label="block rate")
+        rates.plot(thresholds, results["false_positive_rate"][current_row], label="false-positive rate")
+        rates.axvline(CURRENT_THRESHOLD, linestyle="--", color="grey")
+        rates.set_xlabel("threshold (current weights)")
+        rates.legend()
+        fig.tight_layout()
+        fig.savefig(args.plot)
+        print(f"Curves saved to: {args.plot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Server profiling helpers for the NextBuy load tools
+Starts a sampling CPU profile on the server for the duration of a load
+phase, optionally takes a heap snapshot after it, and downloads the
+artifacts next to the test results (see /api/admin/profiling)
+"""
+
+import os
+from contextlib import contextmanager
+
+import requests
+
+
+class ServerProfiler:
+    """Captures server-side CPU profiles and heap snapshots around load phases"""
+
+    def __init__(self, base_url, output_dir="profiles", cpu=True, heap=False,
+                 sampling_interval=None, timeout=120):
+        self.base_url = base_url.rstrip("/")
+        self.output_dir = output_dir
+        self.cpu = cpu
+        self.heap = heap
+        self.sampling_interval = sampling_interval
+        self.timeout = timeout
+        self.artifacts = []
+        self.running = False
+        # One keep-alive connection: under cluster.js it stays on the worker
+        # that started the profile
+        self.session = requests.Session()
+        self.session.headers["X-API-Key"] = os.environ.get("ADMIN_API_KEY", "")
+
+    def _post(self, path, payload=None):
+        response = self.session.post(f"{self.base_url}/api/admin/profiling{path}",
+                                     json=payload or {}, timeout=self.timeout)
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise RuntimeError(f"{path}: {response.status_code} {message}")
+        return response.json()
+
+    def download(self, artifact, phase):
+        """Save an artifact from the server; returns its local path (None when the server keeps it)"""
+        if not artifact.get("url"):
+            # Heap snapshots stay on the server unless it sets PROFILE_SERVE_HEAP_SNAPSHOTS=true
+            self.artifacts.append({"phase": phase, "path": None, **artifact})
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        target = os.path.join(self.output_dir, artifact["name"])
+        with self.session.get(f"{self.base_url}{artifact['url']}", stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            with open(target, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1 << 16):
+                    f.write(chunk)
+        self.artifacts.append({"phase": phase, "path": target, **artifact})
+        return target
+
+    def start(self, phase):
+        """Start a CPU profile labelled with the phase; returns whether it runs"""
+        payload = {"label": phase}
+        if self.sampling_interval:
+            payload["samplingInterval"] = self.sampling_interval
+        try:
+            started = self._post("/cpu/start", payload)
+            self.running = True
+            print(f"🔬 CPU profile started on server pid {started['pid']} ({phase})")
+            return True
+        except (requests.exceptions.RequestException, RuntimeError) as e:
+            print(f"⚠️  Could not start CPU profile: {e}")
+            return False
+
+    def stop(self, phase):
+        """Stop the CPU profile started by start() and download it"""
+        if not self.running:
+            return
+        self.running = False
+        try:
+            artifact = self._post("/cpu/stop")
+            path = self.download(artifact, phase)
+            print(f"🔬 CPU profile saved: {path} ({artifact['samples']} samples, {artifact['duration'] / 1000:.1f}s)")
+        except (requests.exceptions.RequestException, RuntimeError) as e:
+            print(f"⚠️  Could not save CPU profile: {e}")
+
+    def heap_snapshot(self, phase):
+        """Take a heap snapshot and download it"""
+        try:
+            artifact = self._post("/heap-snapshot", {"label": phase})
+            path = self.download(artifact, phase) or f"logs/profiles/{artifact['name']} on the server"
+            print(f"🔬 Heap snapshot saved: {path} ({artifact['bytes'] / 1024 / 1024:.1f} MB)")
+        except (requests.exceptions.RequestException, RuntimeError) as e:
+            print(f"⚠️  Could not save heap snapshot: {e}")
+
+    @contextmanager
+    def capture(self, phase):
+        """Profile the server while the block runs (a no-op when disabled)"""
+        started = self.cpu and self.start(phase)
+        try:
+            yield
+        finally:
+            if started:
+                self.stop(phase)
+            if self.heap:
+                self.heap_snapshot(phase)
+
+    def print_summary(self):
+        if not self.artifacts:
+            return
+        print(f"\nServer profiles ({self.output_dir}):")
+        for artifact in self.artifacts:
+            where = "" if artifact["path"] else " (kept in logs/profiles/ on the server)"
+            print(f"  {artifact['phase']:<28} {artifact['name']}{where}")
+        print("  Open .cpuprofile files in Chrome DevTools (Performance) or speedscope,")
+        print("  .heapsnapshot files in Chrome DevTools (Memory)")
+
+
+def add_profiling_arguments(parser):
+    """Register the shared --profile options on an argparse parser"""
+    group = parser.add_argument_group("server profiling")
+    group.add_argument("--profile", action="store_true",
+                       help="Record a server CPU profile for each load phase")
+    group.add_argument("--heap-snapshot", action="store_true",
+                       help="Take a server heap snapshot after each load phase")
+    group.add_argument("--profile-interval", type=int, default=None,
+                       help="CPU sampling interval in microseconds (server default 1000)")
+    group.add_argument("--profile-dir", default=None,
+                       help="Where artifacts are saved (default: profiles/ next to the results)")
+    return group
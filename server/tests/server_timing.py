@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Server-Timing helpers for the NextBuy load tools
+Parses the per-stage durations the server emits (SERVER_TIMING=true) and
+splits client latency into network time and server stage time
+"""
+
+import threading
+
+
+def parse_server_timing(header):
+    """Parse a Server-Timing header into {stage: milliseconds}"""
+    timings = {}
+    if not header:
+        return timings
+
+    for entry in header.split(","):
+        parts = [part.strip() for part in entry.split(";")]
+        name = parts[0]
+        if not name:
+            continue
+        duration = 0.0
+        for param in parts[1:]:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "dur":
+                try:
+                    duration = float(value.strip().strip('"'))
+                except ValueError:
+                    pass
+        # A stage listed twice (e.g. retried middleware) adds up
+        timings[name] = timings.get(name, 0.0) + duration
+    return timings
+
+
+def response_server_timing(response):
+    """Server-Timing of a requests/Locust response, or {} when absent"""
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return {}
+    return parse_server_timing(headers.get("Server-Timing"))
+
+
+def split_latency(client_ms, timings):
+    """Attribute client latency: server stages plus the remaining network/queueing time"""
+    if not timings:
+        return None
+    server_ms = timings.get("total", sum(timings.values()))
+    return {
+        "client_ms": client_ms,
+        "server_ms": server_ms,
+        "network_ms": max(0.0, client_ms - server_ms),
+        "stages": {name: ms for name, ms in timings.items() if name != "total"}
+    }
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+class ServerTimingRecorder:
+    """Thread-safe collector of per-request latency splits"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = []
+        self.missing = 0
+
+    def record(self, response, client_ms):
+        """Record one response; returns its latency split (None without a header)"""
+        split = split_latency(client_ms, response_server_timing(response))
+        with self._lock:
+            if split is None:
+                self.missing += 1
+            else:
+                self.samples.append(split)
+        return split
+
+    def summary(self):
+        """Per-stage mean/p50/p95 in milliseconds, plus client, server and network time"""
+        with self._lock:
+            samples = list(self.samples)
+            missing = self.missing
+
+        series = {"client": [], "network": [], "server": []}
+        stages = {}
+        for sample in samples:
+            series["client"].append(sample["client_ms"])
+            series["network"].append(sample["network_ms"])
+            series["server"].append(sample["server_ms"])
+            for name, ms in sample["stages"].items():
+                stages.setdefault(name, []).append(ms)
+
+        def describe(values):
+            values = sorted(values)
+            return {
+                "count": len(values),
+                "mean": sum(values) / len(values) if values else 0.0,
+                "p50": _percentile(values, 50),
+                "p95": _percentile(values, 95)
+            }
+
+        return {
+            "requests": len(samples),
+            "without_header": missing,
+            "totals": {name: describe(values) for name, values in series.items()},
+            "stages": {name: describe(values) for name, values in stages.items()}
+        }
+
+    def print_summary(self, title="Server-Timing Breakdown"):
+        """Print the latency split; explains how to enable it when no header was seen"""
+        summary = self.summary()
+        print(f"\n{title}:")
+        if summary["requests"] == 0:
+            print("  No Server-Timing headers received (start the server with SERVER_TIMING=true)")
+            return summary
+
+        print(f"  Requests with timing: {summary['requests']} (without: {summary['without_header']})")
+        print(f"  {'Segment':<24} {'Mean':>10} {'p50':>10} {'p95':>10}   (ms)")
+        for name in ("client", "network", "server"):
+            stats = summary["totals"][name]
+            print(f"  {name:<24} {stats['mean']:>10.3f} {stats['p50']:>10.3f} {stats['p95']:>10.3f}")
+        for name, stats in sorted(summary["stages"].items(), key=lambda item: -item[1]["mean"]):
+            print(f"    {name:<22} {stats['mean']:>10.3f} {stats['p50']:>10.3f} {stats['p95']:>10.3f}   ({stats['count']} requests)")
+        return summary
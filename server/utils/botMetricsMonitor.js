@@ -1,48 +1,68 @@
 import fs from 'fs';
 import path from 'path';
+import cluster from 'cluster';
+import { createTimeSeriesStore } from './timeSeriesStore.js';
 
 // Configuration
 const LOG_DIR = path.join(process.cwd(), 'logs');
 const BOT_METRICS_FILE = path.join(LOG_DIR, 'bot_metrics.json');
+const TIME_SERIES_FILE = path.join(LOG_DIR, 'bot_timeseries.bin');
 const REPORT_INTERVAL = 3600000; // 1 hour in milliseconds
+const MAX_DETAILED_LOGS = 1000;
+
+// Cluster mode: workers ship deltas to the primary, which owns the metrics
+const MESSAGE_TYPE = 'nextbuy:metrics';
+const DELTA_FLUSH_INTERVAL = 1000; // 1 second
+const PRIMARY_SAVE_INTERVAL = 1000; // 1 second
+const PRIMARY_REPLY_TIMEOUT = 5000; // 5 seconds
+const STREAM_INTERVAL = 1000; // live dashboard updates at most once a second
+const TOP_SIZES = { ipAddresses: 10, userAgents: 5, geoLocations: 10, requestPaths: 10 };
+const isWorker = cluster.isWorker && typeof process.send === 'function';
 
 // Ensure log directory exists
 if (!fs.existsSync(LOG_DIR)) {
   fs.mkdirSync(LOG_DIR, { recursive: true });
 }
 
+/**
+ * Create an empty metrics structure
+ * @returns {Object} Metrics with all counters at zero
+ */
+function createEmptyMetrics() {
+  return {
+    totalRequests: 0,
+    detectedBots: 0,
+    detectionMethods: {
+      rateLimit: 0,
+      headlessBrowser: 0,
+      userAgent: 0,
+      behavioral: 0,
+      honeypot: 0,
+      captchaFailed: 0,
+      ipAnalysis: 0,
+      sqlInjection: 0,
+      combined: 0
+    },
+    ipAddresses: {},
+    userAgents: {},
+    geoLocations: {},
+    requestPaths: {},
+    suspiciousPatterns: {
+      rapidRequests: 0,
+      headlessDetections: 0,
+      vpnProxyRequests: 0,
+      honeypotTriggers: 0
+    },
+    lastReset: Date.now()
+  };
+}
+
 // Initialize metrics storage
-let metrics = {
-  totalRequests: 0,
-  detectedBots: 0,
-  detectionMethods: {
-    rateLimit: 0,
-    headlessBrowser: 0,
-    userAgent: 0,
-    behavioral: 0,
-    honeypot: 0,
-    captchaFailed: 0,
-    ipAnalysis: 0,
-    sqlInjection: 0,
-    combined: 0
-  },
-  ipAddresses: {},
-  userAgents: {},
-  geoLocations: {},
-  requestPaths: {},
-  hourlyStats: {},
-  suspiciousPatterns: {
-    rapidRequests: 0,
-    headlessDetections: 0,
-    vpnProxyRequests: 0,
-    honeypotTriggers: 0
-  },
-  lastReset: Date.now()
-};
+let metrics = createEmptyMetrics();
 
-// Load existing metrics if available
+// Load existing metrics if available (workers never own the file)
 try {
-  if (fs.existsSync(BOT_METRICS_FILE)) {
+  if (!isWorker && fs.existsSync(BOT_METRICS_FILE)) {
     const data = fs.readFileSync(BOT_METRICS_FILE, 'utf8');
     const loadedMetrics = JSON.parse(data);
     
@@ -59,11 +79,107 @@ try {
         ...loadedMetrics.suspiciousPatterns
       }
     };
+    // Superseded by the time series (it blended days together)
+    delete metrics.hourlyStats;
   }
 } catch (error) {
   console.error('Error loading bot metrics:', error);
 }
 
+// Counters over time: requests, detections, and detections per method and
+// severity, at per-second, per-minute and per-hour resolution
+const SEVERITIES = ['low', 'medium', 'high', 'critical'];
+const TIME_SERIES = [
+  'requests',
+  'detections',
+  ...Object.keys(createEmptyMetrics().detectionMethods).map(method => `method.${method}`),
+  'method.other',
+  ...SEVERITIES.map(severity => `severity.${severity}`)
+];
+const timeSeries = createTimeSeriesStore({
+  series: TIME_SERIES,
+  file: isWorker ? null : TIME_SERIES_FILE
+});
+
+/**
+ * Series names a detection counts towards
+ * @param {Object} data - Detection data
+ * @returns {string[]} Series names
+ */
+function detectionSeries(data) {
+  const method = `method.${data.method}`;
+  return [
+    'detections',
+    TIME_SERIES.includes(method) ? method : 'method.other',
+    `severity.${determineSeverity(data)}`
+  ];
+}
+
+/**
+ * Count events in the time series (workers buffer them per second in their delta)
+ * @param {string[]} names - Series names
+ */
+function countSeries(names) {
+  const time = Date.now();
+  if (isWorker) {
+    const second = Math.floor(time / 1000);
+    const counts = (getPendingDelta().timeSeries[second] ??= {});
+    for (const name of names) counts[name] = (counts[name] || 0) + 1;
+    return;
+  }
+  for (const name of names) timeSeries.add(name, 1, time);
+}
+
+// Report snapshot, maintained incrementally. Counters only grow between
+// resets, so a key can only enter a top-N list by passing its smallest
+// entry; each bump is checked against the board instead of re-sorting maps.
+let reportVersion = 0;
+let reportSnapshot = null;
+let leaderboards = {};
+
+function rebuildLeaderboards() {
+  leaderboards = {};
+  for (const [field, size] of Object.entries(TOP_SIZES)) {
+    leaderboards[field] = Object.entries(metrics[field])
+      .sort((a, b) => b[1] - a[1])
+      .slice(0, size);
+  }
+}
+
+/**
+ * Update a top-N board after a counter changed
+ * @param {string} field - Metrics map name
+ * @param {string} key - Counter key
+ * @param {number} count - New counter value
+ */
+function bumpLeaderboard(field, key, count) {
+  const board = leaderboards[field];
+  const size = TOP_SIZES[field];
+  let index = board.findIndex(entry => entry[0] === key);
+
+  if (index === -1) {
+    if (board.length >= size && count <= board[board.length - 1][1]) return;
+    board.push([key, count]);
+    index = board.length - 1;
+  } else {
+    board[index] = [key, count];
+  }
+
+  // Bubble up to keep the board sorted by count
+  while (index > 0 && board[index - 1][1] < count) {
+    [board[index - 1], board[index]] = [board[index], board[index - 1]];
+    index--;
+  }
+  if (board.length > size) board.pop();
+}
+
+function markReportDirty() {
+  reportVersion++;
+  reportSnapshot = null;
+}
+
+rebuildLeaderboards();
+
 /**
  * Determine severity level of a bot detection
  * @param {Object} data - Detection data
@@ -92,61 +208,47 @@ function determineSeverity(data) {
 }
 
 /**
- * Log a bot detection event
+ * Apply a bot detection event to a metrics structure
+ * @param {Object} target - Metrics (or worker delta) to update
  * @param {Object} data - Detection data
- * @param {string} data.method - Detection method
- * @param {string} data.ip - IP address
- * @param {string} data.userAgent - User agent string
- * @param {string} data.path - Request path
- * @param {Object} data.details - Additional details
  */
-export function logBotDetection(data) {
-  metrics.totalRequests++;
-  metrics.detectedBots++;
+function recordDetection(target, data) {
+  target.totalRequests++;
+  target.detectedBots++;
   
   // Increment detection method counter
-  if (data.method && metrics.detectionMethods[data.method] !== undefined) {
-    metrics.detectionMethods[data.method]++;
+  if (data.method && target.detectionMethods[data.method] !== undefined) {
+    target.detectionMethods[data.method]++;
   }
   
   // Track IP addresses
   if (data.ip) {
-    metrics.ipAddresses[data.ip] = (metrics.ipAddresses[data.ip] || 0) + 1;
+    target.ipAddresses[data.ip] = (target.ipAddresses[data.ip] || 0) + 1;
   }
   
   // Track user agents
   if (data.userAgent) {
-    metrics.userAgents[data.userAgent] = (metrics.userAgents[data.userAgent] || 0) + 1;
+    target.userAgents[data.userAgent] = (target.userAgents[data.userAgent] || 0) + 1;
   }
   
   // Track request paths
   if (data.path) {
-    metrics.requestPaths[data.path] = (metrics.requestPaths[data.path] || 0) + 1;
+    target.requestPaths[data.path] = (target.requestPaths[data.path] || 0) + 1;
   }
   
   // Track geolocation data if available
   if (data.details && data.details.geoData) {
     const country = data.details.geoData.country || 'Unknown';
-    metrics.geoLocations[country] = (metrics.geoLocations[country] || 0) + 1;
+    target.geoLocations[country] = (target.geoLocations[country] || 0) + 1;
   }
   
-// Track hourly statistics
-  const hour = new Date().getHours();
-  const date = new Date().toISOString().split('T')[0]; // YYYY-MM-DD format
-  const hourKey = `${date}-${hour}`;
-  
-  if (!metrics.hourlyStats[hour]) {
-    metrics.hourlyStats[hour] = { total: 0, bots: 0 };
-  }
-  metrics.hourlyStats[hour].bots++;
-  
   // Track detailed logs for dashboard tables
-  if (!metrics.detailedLogs) {
-    metrics.detailedLogs = [];
+  if (!target.detailedLogs) {
+    target.detailedLogs = [];
   }
   
   // Add detailed log entry
-  metrics.detailedLogs.push({
+  target.detailedLogs.push({
     timestamp: new Date().toISOString(),
     method: data.method,
     ip: data.ip,
@@ -157,23 +259,134 @@ export function logBotDetection(data) {
   });
   
   // Keep only last 1000 log entries
-  if (metrics.detailedLogs.length > 1000) {
-    metrics.detailedLogs = metrics.detailedLogs.slice(-1000);
+  if (target.detailedLogs.length > MAX_DETAILED_LOGS) {
+    target.detailedLogs = target.detailedLogs.slice(-MAX_DETAILED_LOGS);
   }
   
   // Track suspicious patterns
   if (data.method === 'headlessBrowser') {
-    metrics.suspiciousPatterns.headlessDetections++;
+    target.suspiciousPatterns.headlessDetections++;
   }
   if (data.method === 'rateLimit') {
-    metrics.suspiciousPatterns.rapidRequests++;
+    target.suspiciousPatterns.rapidRequests++;
   }
   if (data.method === 'honeypot') {
-    metrics.suspiciousPatterns.honeypotTriggers++;
+    target.suspiciousPatterns.honeypotTriggers++;
   }
   if (data.details && (data.details.geoData?.proxy || data.details.geoData?.hosting)) {
-    metrics.suspiciousPatterns.vpnProxyRequests++;
+    target.suspiciousPatterns.vpnProxyRequests++;
+  }
+}
+
+/**
+ * Add a worker delta into the aggregated metrics
+ * @param {Object} delta - Counters accumulated by a worker since its last flush
+ */
+function mergeDelta(delta) {
+  metrics.totalRequests += delta.totalRequests;
+  metrics.detectedBots += delta.detectedBots;
+
+  for (const field of ['detectionMethods', 'suspiciousPatterns', 'ipAddresses', 'userAgents', 'geoLocations', 'requestPaths']) {
+    for (const [key, count] of Object.entries(delta[field])) {
+      metrics[field][key] = (metrics[field][key] || 0) + count;
+      if (TOP_SIZES[field]) bumpLeaderboard(field, key, metrics[field][key]);
+    }
+  }
+
+  for (const [second, counts] of Object.entries(delta.timeSeries || {})) {
+    for (const [name, count] of Object.entries(counts)) {
+      timeSeries.add(name, count, Number(second) * 1000);
+    }
+  }
+
+  if (delta.detailedLogs && delta.detailedLogs.length > 0) {
+    metrics.detailedLogs = (metrics.detailedLogs || []).concat(delta.detailedLogs).slice(-MAX_DETAILED_LOGS);
+  }
+  markReportDirty();
+}
+
+// Worker-side delta, shipped to the primary every DELTA_FLUSH_INTERVAL
+let pendingDelta = null;
+let deltaFlushTimer = null;
+
+function getPendingDelta() {
+  if (!pendingDelta) pendingDelta = { ...createEmptyMetrics(), timeSeries: {} };
+  if (!deltaFlushTimer) {
+    deltaFlushTimer = setTimeout(flushMetricsDelta, DELTA_FLUSH_INTERVAL);
+    deltaFlushTimer.unref();
+  }
+  return pendingDelta;
+}
+
+/**
+ * Send this worker's accumulated delta to the primary (no-op outside cluster workers)
+ */
+export function flushMetricsDelta() {
+  if (deltaFlushTimer) {
+    clearTimeout(deltaFlushTimer);
+    deltaFlushTimer = null;
+  }
+  if (!pendingDelta || !process.connected) return;
+  const delta = pendingDelta;
+  pendingDelta = null;
+  process.send({ type: MESSAGE_TYPE, op: 'delta', delta });
+}
+
+// Pending request/reply calls from this worker to the primary
+let nextRequestId = 1;
+const pendingRequests = new Map();
+
+if (isWorker) {
+  process.on('message', (message) => {
+    if (!message || message.type !== MESSAGE_TYPE || message.op !== 'reply') return;
+    const request = pendingRequests.get(message.id);
+    if (!request) return;
+    pendingRequests.delete(message.id);
+    clearTimeout(request.timer);
+    request.resolve(message.result);
+  });
+}
+
+function askPrimary(op, payload = {}) {
+  // Ship local events first; IPC is ordered so the primary sees them before the request
+  flushMetricsDelta();
+  return new Promise((resolve, reject) => {
+    const id = nextRequestId++;
+    const timer = setTimeout(() => {
+      pendingRequests.delete(id);
+      reject(new Error(`No reply from cluster primary for "${op}"`));
+    }, PRIMARY_REPLY_TIMEOUT);
+    pendingRequests.set(id, { resolve, timer });
+    process.send({ type: MESSAGE_TYPE, op, id, ...payload });
+  });
+}
+
+/**
+ * Log a bot detection event
+ * @param {Object} data - Detection data
+ * @param {string} data.method - Detection method
+ * @param {string} data.ip - IP address
+ * @param {string} data.userAgent - User agent string
+ * @param {string} data.path - Request path
+ * @param {Object} data.details - Additional details
+ */
+export function logBotDetection(data) {
+  if (isWorker) {
+    recordDetection(getPendingDelta(), data);
+    countSeries(detectionSeries(data));
+    return;
   }
+
+  recordDetection(metrics, data);
+  countSeries(detectionSeries(data));
+  for (const field of Object.keys(TOP_SIZES)) {
+    const key = field === 'ipAddresses' ? data.ip
+      : field === 'userAgents' ? data.userAgent
+      : field === 'requestPaths' ? data.path
+      : data.details?.geoData ? (data.details.geoData.country || 'Unknown') : null;
+    if (key) bumpLeaderboard(field, key, metrics[field][key]);
+  }
+  markReportDirty();
   
   // Save metrics to file
   saveMetrics();
@@ -184,7 +397,15 @@ export function logBotDetection(data) {
  * @param {Object} data - Request data
  */
 export function logRequest(data = {}) {
+  if (isWorker) {
+    getPendingDelta().totalRequests++;
+    countSeries(['requests']);
+    return;
+  }
+
   metrics.totalRequests++;
+  countSeries(['requests']);
+  markReportDirty();
   saveMetrics();
 }
 
@@ -199,70 +420,137 @@ function saveMetrics() {
     }
     
     fs.writeFileSync(BOT_METRICS_FILE, JSON.stringify(metrics, null, 2));
+    // Only the rows changed since the last save
+    timeSeries.flush();
   } catch (error) {
     console.warn('Warning: Could not save bot metrics to file:', error.message);
     // Continue execution even if file save fails
   }
 }
 
+// Coalesce bursts of updates into one file write per PRIMARY_SAVE_INTERVAL
+let saveTimer = null;
+
+function scheduleSave() {
+  if (saveTimer) return;
+  saveTimer = setTimeout(() => {
+    saveTimer = null;
+    saveMetrics();
+  }, PRIMARY_SAVE_INTERVAL);
+}
+
 /**
- * Generate a report of bot detection metrics
- * @returns {Object} Metrics report
+ * Build the count-derived part of the report from the leaderboards
+ * @returns {Object} Report snapshot for the current version
  */
-export function generateReport() {
-  const now = Date.now();
-  const timeFrame = now - metrics.lastReset;
-  const timeFrameHours = (timeFrame / 3600000).toFixed(2);
-  
+function buildReportSnapshot() {
   // Calculate percentages
   const botPercentage = metrics.totalRequests > 0 
     ? ((metrics.detectedBots / metrics.totalRequests) * 100).toFixed(2) 
     : 0;
-  
-  // Find top IPs and user agents
-  const topIPs = Object.entries(metrics.ipAddresses)
-    .sort((a, b) => b[1] - a[1])
-    .slice(0, 10);
-    
-  const topUserAgents = Object.entries(metrics.userAgents)
-    .sort((a, b) => b[1] - a[1])
-    .slice(0, 5);
     
-  // Find top countries
-  const topCountries = Object.entries(metrics.geoLocations)
-    .sort((a, b) => b[1] - a[1])
-    .slice(0, 10);
-    
-  // Find top targeted paths
-  const topPaths = Object.entries(metrics.requestPaths)
-    .sort((a, b) => b[1] - a[1])
-    .slice(0, 10);
-    
-  // Calculate hourly distribution
-  const hourlyDistribution = Array.from({ length: 24 }, (_, hour) => ({
-    hour,
-    bots: metrics.hourlyStats[hour]?.bots || 0,
-    total: metrics.hourlyStats[hour]?.total || 0
-  }));
+  // Last 24 hours, oldest first
+  const hours = timeSeries.query({
+    series: ['requests', 'detections'],
+    from: Date.now() - 23 * 3600000,
+    resolution: 'hour'
+  });
+  const hourlyDistribution = hours.series.detections.map((bots, i) => {
+    const start = new Date(hours.from + i * hours.step);
+    return {
+      hour: start.getHours(),
+      time: start.toISOString(),
+      bots,
+      total: hours.series.requests[i]
+    };
+  });
   
   return {
-    timeFrame: `${timeFrameHours} hours`,
+    version: reportVersion,
     totalRequests: metrics.totalRequests,
     detectedBots: metrics.detectedBots,
     legitimateRequests: metrics.totalRequests - metrics.detectedBots,
     botPercentage: `${botPercentage}%`,
-    detectionMethods: metrics.detectionMethods,
-    suspiciousPatterns: metrics.suspiciousPatterns,
-    topIPs,
-    topUserAgents,
-    topCountries,
-    topPaths,
-    hourlyDistribution,
+    detectionMethods: { ...metrics.detectionMethods },
+    suspiciousPatterns: { ...metrics.suspiciousPatterns },
+    topIPs: leaderboards.ipAddresses.map(entry => [...entry]),
+    topUserAgents: leaderboards.userAgents.map(entry => [...entry]),
+    topCountries: leaderboards.geoLocations.map(entry => [...entry]),
+    topPaths: leaderboards.requestPaths.map(entry => [...entry]),
+    hourlyDistribution
+  };
+}
+
+/**
+ * Generate a report of bot detection metrics
+ * @returns {Object} Metrics report (the snapshot is rebuilt only after changes)
+ */
+export function generateReport() {
+  if (!reportSnapshot) {
+    reportSnapshot = buildReportSnapshot();
+  }
+
+  const now = Date.now();
+  const timeFrame = now - metrics.lastReset;
+  const timeFrameHours = (timeFrame / 3600000).toFixed(2);
+  
+  return {
+    ...reportSnapshot,
+    timeFrame: `${timeFrameHours} hours`,
     averageBotsPerHour: (metrics.detectedBots / Math.max(parseFloat(timeFrameHours), 1)).toFixed(2),
     generatedAt: new Date().toISOString()
   };
 }
 
+/**
+ * Get the metrics report, fleet-wide when running as a cluster worker
+ * @param {Object} options - Report options
+ * @param {number} options.sinceVersion - Resolve null if the report hasn't changed since this version
+ * @returns {Promise<Object|null>} Metrics report
+ */
+export async function getReport({ sinceVersion } = {}) {
+  if (isWorker) {
+    return askPrimary('report', { sinceVersion });
+  }
+  return sinceVersion === reportVersion ? null : generateReport();
+}
+
+/**
+ * Query the detection time series, fleet-wide when running as a cluster worker
+ * @param {Object} options - Query options (series, from, to, resolution, step)
+ * @returns {Promise<Object>} { resolution, step, from, to, points, series }
+ */
+export async function getTimeSeries(options = {}) {
+  if (isWorker) {
+    const reply = await askPrimary('timeseries', { options });
+    if (reply.error) throw new RangeError(reply.error);
+    return reply.result;
+  }
+  return timeSeries.query(options);
+}
+
+/**
+ * Apply one test result to a metrics structure
+ * @param {Object} target - Metrics (or worker delta) to update
+ * @param {Object} result - Test result with test name and status_code
+ */
+function recordTestResult(target, result) {
+  target.totalRequests++;
+  if (result.status_code !== 200) {
+    target.detectedBots++;
+    const method = result.test.toLowerCase().replace(/\s/g, '');
+    if (target.detectionMethods[method] !== undefined) {
+      target.detectionMethods[method]++;
+    } else {
+      target.detectionMethods[method] = 1;
+    }
+
+    if (result.status_code === 429) {
+      target.suspiciousPatterns.rapidRequests++;
+    }
+  }
+}
+
 /**
  * Ingest external test results into the metrics
  * @param {Object} testResults - The results from a test run
@@ -272,70 +560,177 @@ export function ingestTestResults(testResults) {
     return;
   }
 
+  if (isWorker) {
+    flushMetricsDelta();
+    process.send({ type: MESSAGE_TYPE, op: 'ingest', testResults });
+    return;
+  }
+
   for (const result of testResults) {
-    metrics.totalRequests++;
-    if (result.status_code !== 200) {
-      metrics.detectedBots++;
-      const method = result.test.toLowerCase().replace(/\s/g, '');
-      if (metrics.detectionMethods[method] !== undefined) {
-        metrics.detectionMethods[method]++;
-      } else {
-        metrics.detectionMethods[method] = 1;
+    recordTestResult(metrics, result);
+  }
+  markReportDirty();
+  saveMetrics();
+}
+
+/**
+ * Ingest one batch of a streamed upload. Workers fold it into their delta
+ * (shipped with the regular flush) and the file write is deferred, so each
+ * batch costs only the counter updates.
+ * @param {Object[]} testResults - Parsed records
+ * @returns {number} Records applied (records without a test name are skipped)
+ */
+export function ingestTestResultBatch(testResults) {
+  const target = isWorker ? getPendingDelta() : metrics;
+  let applied = 0;
+  for (const result of testResults) {
+    if (!result || typeof result.test !== 'string') continue;
+    recordTestResult(target, result);
+    applied++;
+  }
+
+  if (!isWorker && applied > 0) {
+    markReportDirty();
+    scheduleSave();
+  }
+  return applied;
+}
+
+/**
+ * Reset metrics
+ */
+export function resetMetrics() {
+  if (isWorker) {
+    pendingDelta = null;
+    process.send({ type: MESSAGE_TYPE, op: 'reset' });
+    return;
+  }
+
+  metrics = createEmptyMetrics();
+  timeSeries.reset();
+  rebuildLeaderboards();
+  markReportDirty();
+  saveMetrics();
+}
+
+/**
+ * Aggregate metrics from cluster workers. Call once in the primary.
+ * @param {import('cluster').Cluster} clusterInstance - Node cluster module
+ */
+export function attachMetricsPrimary(clusterInstance = cluster) {
+  clusterInstance.on('message', (worker, message) => {
+    if (!message || message.type !== MESSAGE_TYPE) return;
+
+    try {
+      switch (message.op) {
+        case 'delta':
+          mergeDelta(message.delta);
+          scheduleSave();
+          break;
+        case 'report': {
+          const result = message.sinceVersion === reportVersion ? null : generateReport();
+          worker.send({ type: MESSAGE_TYPE, op: 'reply', id: message.id, result });
+          break;
+        }
+        case 'timeseries': {
+          // Bad queries are answered, not dropped, so the worker can return a 400
+          let reply;
+          try {
+            reply = { result: timeSeries.query(message.options) };
+          } catch (error) {
+            reply = { error: error.message };
+          }
+          worker.send({ type: MESSAGE_TYPE, op: 'reply', id: message.id, result: reply });
+          break;
+        }
+        case 'reset':
+          resetMetrics();
+          break;
+        case 'ingest':
+          ingestTestResults(message.testResults);
+          break;
+        default:
+          break;
       }
+    } catch (error) {
+      console.error('Error handling worker metrics message:', error);
+    }
+  });
+}
+
+// Live report subscribers (dashboard streams) in this process
+const reportSubscribers = new Set();
+let streamTimer = null;
+let streamedReport = null;
+
+/**
+ * Compare the latest report with the last one pushed and notify subscribers
+ * with the top-level fields that changed
+ */
+async function pushReportUpdate() {
+  try {
+    const report = await getReport({ sinceVersion: streamedReport?.version });
+    if (!report) return;
 
-      if (result.status_code === 429) {
-        metrics.suspiciousPatterns.rapidRequests++;
+    const changes = {};
+    for (const [key, value] of Object.entries(report)) {
+      if (key === 'generatedAt') continue;
+      if (!streamedReport || JSON.stringify(streamedReport[key]) !== JSON.stringify(value)) {
+        changes[key] = value;
       }
     }
+    changes.generatedAt = report.generatedAt;
+    streamedReport = report;
+
+    for (const listener of reportSubscribers) {
+      listener({ version: report.version, changes });
+    }
+  } catch (error) {
+    console.warn('Warning: Could not refresh live bot report:', error.message);
   }
-  saveMetrics();
 }
 
 /**
- * Reset metrics
+ * Receive report deltas (changed top-level fields) at most once per second
+ * @param {Function} listener - Called with { version, changes }
+ * @returns {Function} Unsubscribe
  */
-export function resetMetrics() {
-  metrics = {
-    totalRequests: 0,
-    detectedBots: 0,
-    detectionMethods: {
-      rateLimit: 0,
-      headlessBrowser: 0,
-      userAgent: 0,
-      behavioral: 0,
-      honeypot: 0,
-      captchaFailed: 0,
-      ipAnalysis: 0,
-      sqlInjection: 0,
-      combined: 0
-    },
-    ipAddresses: {},
-    userAgents: {},
-    geoLocations: {},
-    requestPaths: {},
-    hourlyStats: {},
-    suspiciousPatterns: {
-      rapidRequests: 0,
-      headlessDetections: 0,
-      vpnProxyRequests: 0,
-      honeypotTriggers: 0
-    },
-    lastReset: Date.now()
+export function subscribeReport(listener) {
+  reportSubscribers.add(listener);
+  if (!streamTimer) {
+    streamTimer = setInterval(pushReportUpdate, STREAM_INTERVAL);
+    streamTimer.unref();
+  }
+
+  return () => {
+    reportSubscribers.delete(listener);
+    if (reportSubscribers.size === 0 && streamTimer) {
+      clearInterval(streamTimer);
+      streamTimer = null;
+      streamedReport = null;
+    }
   };
-  saveMetrics();
 }
 
-// Set up periodic reporting
-setInterval(() => {
-  const report = generateReport();
-  console.log('=== Bot Detection Report ===');
-  console.log(JSON.stringify(report, null, 2));
-}, REPORT_INTERVAL);
+// Set up periodic reporting (the primary reports for the whole cluster)
+if (!isWorker) {
+  setInterval(() => {
+    const report = generateReport();
+    console.log('=== Bot Detection Report ===');
+    console.log(JSON.stringify(report, null, 2));
+  }, REPORT_INTERVAL);
+}
 
 export default {
   logBotDetection,
   logRequest,
   generateReport,
+  getReport,
+  getTimeSeries,
+  subscribeReport,
   resetMetrics,
-  ingestTestResults
-};
\ No newline at end of file
+  ingestTestResults,
+  ingestTestResultBatch,
+  flushMetricsDelta,
+  attachMetricsPrimary
+};
@@ -0,0 +1,206 @@
+import mongoose from 'mongoose';
+import BotDetection from '../User/BotDetection.js';
+
+// Shared write buffer for BotDetection documents. Detections are queued in
+// memory and written with insertMany, either when a batch fills up or on a
+// timer, so a bot flood costs one Mongo round trip per batch instead of one
+// per blocked request. The queue is bounded: once full it keeps a uniform
+// sample of the overflow (or drops new entries), and it is drained on shutdown.
+
+const DEFAULT_BATCH_SIZE = Number(process.env.DETECTION_BATCH_SIZE) || 500;
+const DEFAULT_FLUSH_INTERVAL = Number(process.env.DETECTION_FLUSH_INTERVAL_MS) || 1000;
+const DEFAULT_MAX_QUEUE = Number(process.env.DETECTION_MAX_QUEUE) || 10000;
+
+/**
+ * Create a batched, bounded write buffer for a mongoose model
+ * @param {Object} options - Buffer options
+ * @param {import('mongoose').Model} options.model - Model to insert into
+ * @param {number} options.batchSize - Documents per insertMany
+ * @param {number} options.flushInterval - Maximum time a document waits (ms)
+ * @param {number} options.maxQueueSize - Queue bound
+ * @param {string} options.overflowPolicy - 'sample' (reservoir) or 'drop' (reject new)
+ * @param {Function} options.countBy - Key to count each queued document under for countPending() (null to skip it)
+ * @returns {Object} Buffer with enqueue(), flush(), close(), countPending(), updatePending() and getStats()
+ */
+export function createWriteBuffer({
+  model,
+  batchSize = DEFAULT_BATCH_SIZE,
+  flushInterval = DEFAULT_FLUSH_INTERVAL,
+  maxQueueSize = DEFAULT_MAX_QUEUE,
+  overflowPolicy = 'sample',
+  countBy = null
+}) {
+  const queue = [];
+  // Queued documents per countBy key, kept up to date on every queue change
+  // so countPending() never walks the queue
+  const pendingCounts = new Map();
+  let overflowSeen = 0; // documents offered since the queue filled up
+  let flushing = null;
+  let flushScheduled = false;
+  let timer = null;
+  let closed = false;
+  const stats = { queued: 0, written: 0, dropped: 0, failed: 0, batches: 0 };
+
+  const isConnected = () => mongoose.connection.readyState === 1;
+
+  function countPendingDoc(doc, delta) {
+    const key = countBy?.(doc);
+    if (key === null || key === undefined) return;
+    const count = (pendingCounts.get(key) || 0) + delta;
+    if (count > 0) {
+      pendingCounts.set(key, count);
+    } else {
+      pendingCounts.delete(key);
+    }
+  }
+
+  function startTimer() {
+    if (timer || closed) return;
+    timer = setInterval(() => {
+      flush().catch(() => {});
+    }, flushInterval);
+    timer.unref?.();
+  }
+
+  function scheduleFlush() {
+    if (flushScheduled) return;
+    flushScheduled = true;
+    setImmediate(() => {
+      flushScheduled = false;
+      flush().catch(() => {});
+    });
+  }
+
+  /**
+   * Queue a detection document
+   * @param {Object} doc - Plain document matching the model schema
+   * @returns {boolean} Whether the document was kept
+   */
+  function enqueue(doc) {
+    if (closed) return false;
+    startTimer();
+    stats.queued++;
+
+    if (queue.length < maxQueueSize) {
+      queue.push(doc);
+      countPendingDoc(doc, 1);
+      if (queue.length >= batchSize && isConnected()) scheduleFlush();
+      return true;
+    }
+
+    // Full: keep a uniform random sample of everything offered (reservoir sampling)
+    overflowSeen++;
+    stats.dropped++;
+    if (overflowPolicy === 'sample') {
+      const slot = Math.floor(Math.random() * (maxQueueSize + overflowSeen));
+      if (slot < maxQueueSize) {
+        countPendingDoc(queue[slot], -1);
+        queue[slot] = doc;
+        countPendingDoc(doc, 1);
+        return true;
+      }
+    }
+    return false;
+  }
+
+  async function writeBatches() {
+    while (queue.length > 0 && isConnected()) {
+      const batch = queue.splice(0, batchSize);
+      batch.forEach(doc => countPendingDoc(doc, -1));
+      if (queue.length < maxQueueSize) overflowSeen = 0;
+
+      try {
+        // ordered: false keeps going past documents that fail validation
+        await model.insertMany(batch, { ordered: false });
+        stats.written += batch.length;
+      } catch (error) {
+        const inserted = error.insertedDocs?.length ?? 0;
+        stats.written += inserted;
+        stats.failed += batch.length - inserted;
+        console.warn(`⚠️ Bot detection batch write failed: ${error.message}`);
+      }
+      stats.batches++;
+    }
+  }
+
+  /**
+   * Write everything queued (no-op while the database is disconnected)
+   * @returns {Promise<void>} Resolves when the queue has been written
+   */
+  function flush() {
+    if (!flushing) {
+      flushing = writeBatches().finally(() => {
+        flushing = null;
+      });
+    }
+    return flushing;
+  }
+
+  /**
+   * Stop the timer and drain the queue
+   * @returns {Promise<void>} Resolves when pending documents are written
+   */
+  async function close() {
+    closed = true;
+    if (timer) clearInterval(timer);
+    timer = null;
+    if (flushing) await flushing;
+    await flush();
+  }
+
+  return {
+    enqueue,
+    flush,
+    close,
+    /**
+     * Count queued (not yet written) documents under a countBy key
+     * @param {string} key - Key returned by countBy
+     * @returns {number} Queued documents with that key
+     */
+    countPending: key => pendingCounts.get(key) || 0,
+    /**
+     * Apply an update to queued documents matching a predicate
+     * @param {Function} predicate - Filter applied to queued documents
+     * @param {Object} fields - Fields to set
+     */
+    updatePending: (predicate, fields) => {
+      queue.forEach(doc => {
+        if (!predicate(doc)) return;
+        countPendingDoc(doc, -1);
+        Object.assign(doc, fields);
+        countPendingDoc(doc, 1);
+      });
+    },
+    getStats: () => ({ ...stats, pending: queue.length })
+  };
+}
+
+// Shared buffer used by the routes; counts queued blocked requests per IP for the login check
+export const detectionWriteBuffer = createWriteBuffer({
+  model: BotDetection,
+  countBy: doc => (doc.blockedRequest ? doc.ipAddress : null)
+});
+
+/**
+ * Queue a BotDetection document for a batched insert
+ * @param {Object} doc - Detection fields (timestamp defaults to now)
+ * @returns {boolean} Whether the document was kept
+ */
+export function queueBotDetection(doc) {
+  return detectionWriteBuffer.enqueue({ timestamp: new Date(), ...doc });
+}
+
+/**
+ * Write all queued detections; call before the process exits
+ * @returns {Promise<void>} Resolves when the queue is drained
+ */
+export function flushBotDetections() {
+  return detectionWriteBuffer.close();
+}
+
+export default {
+  createWriteBuffer,
+  detectionWriteBuffer,
+  queueBotDetection,
+  flushBotDetections
+};
@@ -0,0 +1,286 @@
+import { registerGauge } from './stageMetrics.js';
+
+// Rolling request rates per device fingerprint over 1 second, 1 minute and
+// 15 minutes, kept in time-wheel counters. Every device owns a slot in
+// preallocated typed arrays: three wheels of small buckets plus a running
+// sum per wheel, so recording a request touches a few array cells and
+// reading a rate is a single load. Expired buckets are cleared lazily on the
+// device's next request, so each window is exact to one bucket (100 ms, 10 s
+// and 1 min). Slots are found through an open-addressing table keyed by the
+// fingerprint's first 64 bits (the digest is already uniformly random) and
+// sit on an LRU list: when the table is full the least recently seen device
+// is evicted, and devices idle longer than the widest window are swept
+// periodically. Memory is fixed at about 100 bytes per slot, whatever the
+// traffic, and nothing is allocated per device.
+// Counts are per process: under cluster.js each worker tracks the devices
+// the load balancer sends it.
+
+const TICK_MS = 100;
+const DEFAULT_CAPACITY = Number(process.env.DEVICE_TRACKER_CAPACITY) || 262144;
+const SWEEP_INTERVAL = 60 * 1000; // 1 minute
+const BUCKET_MAX = 0xffff;
+
+// Requests per window at which the device score reaches 1 (1s, 1m, 15m)
+const DEFAULT_LIMITS = (process.env.DEVICE_RATE_LIMITS || '20,300,2000').split(',').map(Number);
+
+// name, ticks per bucket, buckets: each wheel spans ticks * buckets
+const WHEELS = [
+  { name: 'perSecond', bucketTicks: 1, buckets: 10 },
+  { name: 'perMinute', bucketTicks: 100, buckets: 6 },
+  { name: 'perQuarterHour', bucketTicks: 600, buckets: 15 }
+];
+const IDLE_TICKS = WHEELS[WHEELS.length - 1].bucketTicks * WHEELS[WHEELS.length - 1].buckets;
+
+// 32-bit value of eight hex digits starting at `offset` (NaN-free: bad digits read as 0)
+function hex32(text, offset) {
+  let value = 0;
+  for (let i = offset; i < offset + 8; i++) {
+    const code = text.charCodeAt(i) | 0x20; // lower-case
+    const digit = code >= 97 ? code - 87 : code - 48;
+    value = (value << 4) | (digit & 0xf);
+  }
+  return value >>> 0;
+}
+
+/**
+ * Create a bounded per-device rate tracker
+ * @param {Object} options - Tracker options
+ * @param {number} options.capacity - Devices tracked at once
+ * @param {number[]} options.limits - Requests per 1s, 1m and 15m that score 1
+ * @param {Function} options.now - Clock in milliseconds
+ * @param {boolean} options.sweep - Evict idle devices on a timer
+ * @returns {Object} Tracker with record(), peek(), evictIdle() and getStats()
+ */
+export function createDeviceRateTracker({
+  capacity = DEFAULT_CAPACITY,
+  limits = DEFAULT_LIMITS,
+  now = Date.now,
+  sweep = true
+} = {}) {
+  const epoch = now();
+  // Open addressing with linear probing, at most half full: table cell -> slot (-1 empty)
+  let tableSize = 2;
+  while (tableSize < capacity * 2) tableSize *= 2;
+  const mask = tableSize - 1;
+  const table = new Int32Array(tableSize).fill(-1);
+  const keyHigh = new Uint32Array(capacity);
+  const keyLow = new Uint32Array(capacity);
+  let devices = 0;
+
+  const lastTick = new Uint32Array(capacity);
+  const previous = new Int32Array(capacity);
+  const following = new Int32Array(capacity);
+  const sums = WHEELS.map(() => new Uint32Array(capacity));
+  const buckets = WHEELS.map(wheel => new Uint16Array(capacity * wheel.buckets));
+  const stats = { evicted: 0, expired: 0 };
+
+  // LRU list: head is the most recently seen slot, tail the least; -1 ends it
+  let head = -1;
+  let tail = -1;
+  // Unused slots: everything past `used`, plus freed slots on the stack
+  let used = 0;
+  const freeSlots = new Int32Array(capacity);
+  let freeCount = 0;
+
+  // Table cell holding the key, or the empty cell where it would go
+  function probe(high, low) {
+    let cell = high & mask;
+    for (;;) {
+      const slot = table[cell];
+      if (slot === -1 || (keyHigh[slot] === high && keyLow[slot] === low)) return cell;
+      cell = (cell + 1) & mask;
+    }
+  }
+
+  // Backward-shift deletion keeps probe chains intact without tombstones
+  function removeKey(slot) {
+    let hole = probe(keyHigh[slot], keyLow[slot]);
+    let cell = hole;
+    for (;;) {
+      cell = (cell + 1) & mask;
+      const moving = table[cell];
+      if (moving === -1) break;
+      const home = keyHigh[moving] & mask;
+      if (((cell - home) & mask) >= ((cell - hole) & mask)) {
+        table[hole] = moving;
+        hole = cell;
+      }
+    }
+    table[hole] = -1;
+    devices--;
+  }
+
+  const currentTick = () => Math.max(0, Math.floor((now() - epoch) / TICK_MS));
+
+  function unlink(slot) {
+    const before = previous[slot];
+    const after = following[slot];
+    if (before === -1) head = after; else following[before] = after;
+    if (after === -1) tail = before; else previous[after] = before;
+  }
+
+  function pushFront(slot) {
+    previous[slot] = -1;
+    following[slot] = head;
+    if (head !== -1) previous[head] = slot;
+    head = slot;
+    if (tail === -1) tail = slot;
+  }
+
+  function release(slot) {
+    unlink(slot);
+    removeKey(slot);
+    freeSlots[freeCount++] = slot;
+  }
+
+  function allocate(high, low, tick) {
+    let slot;
+    if (freeCount > 0) {
+      slot = freeSlots[--freeCount];
+    } else if (used < capacity) {
+      slot = used++;
+    } else {
+      // Full: reuse the least recently seen device's slot
+      slot = tail;
+      release(slot);
+      freeCount--;
+      stats.evicted++;
+    }
+    keyHigh[slot] = high;
+    keyLow[slot] = low;
+    // Eviction may have shifted cells, so look the position up now
+    table[probe(high, low)] = slot;
+    devices++;
+    lastTick[slot] = tick;
+    for (let w = 0; w < WHEELS.length; w++) {
+      sums[w][slot] = 0;
+      buckets[w].fill(0, slot * WHEELS[w].buckets, (slot + 1) * WHEELS[w].buckets);
+    }
+    pushFront(slot);
+    return slot;
+  }
+
+  // Zero the buckets that fell out of each window since the slot's last update
+  function advance(slot, tick) {
+    const last = lastTick[slot];
+    if (tick <= last) return;
+    for (let w = 0; w < WHEELS.length; w++) {
+      const { bucketTicks, buckets: size } = WHEELS[w];
+      const from = Math.floor(last / bucketTicks);
+      const to = Math.floor(tick / bucketTicks);
+      if (to === from) continue;
+      const wheel = buckets[w];
+      const base = slot * size;
+      if (to - from >= size) {
+        wheel.fill(0, base, base + size);
+        sums[w][slot] = 0;
+      } else {
+        for (let b = from + 1; b <= to; b++) {
+          const index = base + (b % size);
+          sums[w][slot] -= wheel[index];
+          wheel[index] = 0;
+        }
+      }
+    }
+    lastTick[slot] = tick;
+  }
+
+  function score(slot) {
+    let ratio = 0;
+    for (let w = 0; w < WHEELS.length; w++) {
+      ratio = Math.max(ratio, sums[w][slot] / limits[w]);
+    }
+    return Math.min(ratio, 1);
+  }
+
+  function rates(slot) {
+    return {
+      perSecond: sums[0][slot],
+      perMinute: sums[1][slot],
+      perQuarterHour: sums[2][slot],
+      score: score(slot)
+    };
+  }
+
+  /**
+   * Count one request from a device
+   * @param {string} fingerprint - Hex device fingerprint
+   * @returns {Object} { perSecond, perMinute, perQuarterHour, score }
+   */
+  function record(fingerprint) {
+    const high = hex32(fingerprint, 0);
+    const low = hex32(fingerprint, 8);
+    const tick = currentTick();
+    let slot = table[probe(high, low)];
+    if (slot === -1) {
+      slot = allocate(high, low, tick);
+    } else {
+      advance(slot, tick);
+      if (slot !== head) {
+        unlink(slot);
+        pushFront(slot);
+      }
+    }
+
+    for (let w = 0; w < WHEELS.length; w++) {
+      const index = slot * WHEELS[w].buckets + (Math.floor(tick / WHEELS[w].bucketTicks) % WHEELS[w].buckets);
+      // Saturate rather than wrap; such a device scores 1 long before this
+      if (buckets[w][index] < BUCKET_MAX) {
+        buckets[w][index]++;
+        sums[w][slot]++;
+      }
+    }
+    return rates(slot);
+  }
+
+  /**
+   * Current rates of a device without counting a request
+   * @param {string} fingerprint - Hex device fingerprint
+   * @returns {Object|null} Rates, or null for an unknown device
+   */
+  function peek(fingerprint) {
+    const slot = table[probe(hex32(fingerprint, 0), hex32(fingerprint, 8))];
+    if (slot === -1) return null;
+    advance(slot, currentTick());
+    return rates(slot);
+  }
+
+  /**
+   * Free the slots of devices idle for longer than the widest window
+   * @returns {number} Devices evicted
+   */
+  function evictIdle() {
+    const tick = currentTick();
+    let evicted = 0;
+    while (tail !== -1 && tick - lastTick[tail] >= IDLE_TICKS) {
+      release(tail);
+      evicted++;
+    }
+    stats.expired += evicted;
+    return evicted;
+  }
+
+  if (sweep) {
+    const timer = setInterval(evictIdle, SWEEP_INTERVAL);
+    timer.unref?.();
+  }
+
+  return {
+    record,
+    peek,
+    evictIdle,
+    getStats() {
+      return { ...stats, devices, capacity };
+    }
+  };
+}
+
+// Shared tracker fed by deviceFingerprinting
+export const deviceRateTracker = createDeviceRateTracker();
+
+registerGauge('nextbuy_device_tracker_devices', 'Devices with a live rate tracker slot', {}, () => deviceRateTracker.getStats().devices);
+
+export default {
+  createDeviceRateTracker,
+  deviceRateTracker
+};
@@ -0,0 +1,311 @@
+import os from 'os';
+import { Worker } from 'worker_threads';
+import { performance } from 'perf_hooks';
+import { histogramSeries, incrementCounter, registerGauge } from './stageMetrics.js';
+
+// Dedicated, bounded bcrypt pool for the login and signup paths. Hashes run
+// on a fixed set of worker threads (utils/hashWorker.js) instead of libuv's
+// 4-thread default pool, which file-system work and uploads share. At most
+// queueLimit jobs wait for a thread; beyond that, and for jobs that waited
+// longer than queueTimeout, the pool rejects with HashPoolBusyError so the
+// route answers 503 immediately instead of queueing a credential-stuffing
+// burst. Threads start on first use. Threads that die are restarted with
+// exponential backoff; after MAX_RESTART_FAILURES exits in a row without a
+// completed job (e.g. bcrypt fails to load) the pool gives up for
+// RESTART_COOLDOWN and sheds everything with 503. Under cluster.js every
+// worker process has its own pool.
+
+const DEFAULT_POOL_SIZE = Number(process.env.HASH_POOL_SIZE)
+  || Math.max(1, Math.min(4, Math.floor((os.availableParallelism?.() || os.cpus().length) / 2)));
+const DEFAULT_QUEUE_LIMIT = Number(process.env.HASH_QUEUE_LIMIT) || DEFAULT_POOL_SIZE * 16;
+const DEFAULT_QUEUE_TIMEOUT = Number(process.env.HASH_QUEUE_TIMEOUT_MS) || 2000;
+const WORKER_FILE = new URL('./hashWorker.js', import.meta.url);
+const RESTART_DELAY = 100; // ms, doubled per consecutive failure
+const MAX_RESTART_DELAY = 5000;
+const MAX_RESTART_FAILURES = 5;
+const RESTART_COOLDOWN = 30 * 1000; // 30 seconds
+
+/**
+ * Raised when the pool sheds a job; routes answer 503 with Retry-After
+ */
+export class HashPoolBusyError extends Error {
+  constructor(reason, retryAfter = 1) {
+    super(`Hashing pool busy (${reason})`);
+    this.name = 'HashPoolBusyError';
+    this.reason = reason;
+    this.status = 503;
+    this.retryAfter = retryAfter;
+  }
+}
+
+/**
+ * Create a bounded worker-thread pool for password hashing
+ * @param {Object} options - Pool options
+ * @param {string} options.name - Metrics label
+ * @param {number} options.size - Worker threads
+ * @param {number} options.queueLimit - Jobs allowed to wait for a thread
+ * @param {number} options.queueTimeout - Longest wait before a job is shed (ms)
+ * @param {URL|string} options.workerFile - Worker script
+ * @returns {Object} Pool with hash(), compare(), isSaturated(), getStats() and close()
+ */
+export function createHashPool({
+  name = 'bcrypt',
+  size = DEFAULT_POOL_SIZE,
+  queueLimit = DEFAULT_QUEUE_LIMIT,
+  queueTimeout = DEFAULT_QUEUE_TIMEOUT,
+  workerFile = WORKER_FILE
+} = {}) {
+  const idle = [];
+  const workers = new Set();
+  const queue = [];
+  const running = new Map(); // worker -> job
+  let nextJobId = 1;
+  let closed = false;
+  // Thread exits since the last completed job; restarts wait while restartTimer is set
+  let consecutiveFailures = 0;
+  let restartTimer = null;
+  let unavailableUntil = 0;
+  const stats = { completed: 0, failed: 0, rejected: 0, timedOut: 0, restarts: 0 };
+
+  const waitSeries = {
+    hash: histogramSeries('nextbuy_hash_pool_wait_seconds', 'Time hashing jobs waited for a thread', { pool: name, op: 'hash' }),
+    compare: histogramSeries('nextbuy_hash_pool_wait_seconds', 'Time hashing jobs waited for a thread', { pool: name, op: 'compare' })
+  };
+  const runSeries = {
+    hash: histogramSeries('nextbuy_hash_pool_run_seconds', 'Time hashing jobs ran on a thread', { pool: name, op: 'hash' }),
+    compare: histogramSeries('nextbuy_hash_pool_run_seconds', 'Time hashing jobs ran on a thread', { pool: name, op: 'compare' })
+  };
+  const countOutcome = (op, outcome) => incrementCounter('nextbuy_hash_pool_jobs_total', 'Hashing jobs by outcome', { pool: name, op, outcome });
+
+  registerGauge('nextbuy_hash_pool_queue_depth', 'Hashing jobs waiting for a thread', { pool: name }, () => queue.length);
+  registerGauge('nextbuy_hash_pool_busy_threads', 'Hashing threads running a job', { pool: name }, () => running.size);
+
+  function spawnWorker() {
+    const worker = new Worker(workerFile);
+    worker.unref();
+    workers.add(worker);
+
+    worker.on('message', (message) => {
+      const job = running.get(worker);
+      running.delete(worker);
+      if (job && job.id === message.id) {
+        runSeries[job.op].observe((performance.now() - job.started) / 1000);
+        if (message.error) {
+          stats.failed++;
+          countOutcome(job.op, 'error');
+          job.reject(new Error(message.error));
+        } else {
+          stats.completed++;
+          consecutiveFailures = 0;
+          countOutcome(job.op, 'ok');
+          job.resolve(message.result);
+        }
+      }
+      release(worker);
+    });
+
+    // A crashed thread is replaced; its job runs once more on the next thread
+    worker.on('error', (error) => {
+      console.error(`❌ Hashing thread failed: ${error.message}`);
+    });
+    worker.on('exit', () => {
+      workers.delete(worker);
+      const index = idle.indexOf(worker);
+      if (index !== -1) idle.splice(index, 1);
+      const job = running.get(worker);
+      running.delete(worker);
+      if (job && !closed && job.attempts < 2) {
+        job.attempts++;
+        queue.unshift(job);
+      } else if (job) {
+        stats.failed++;
+        countOutcome(job.op, 'error');
+        job.reject(new HashPoolBusyError('thread exited'));
+      }
+      if (!closed) {
+        scheduleRestart();
+      }
+    });
+
+    idle.push(worker);
+  }
+
+  function ensureWorkers() {
+    if (restartTimer) return;
+    while (!closed && workers.size < size) spawnWorker();
+  }
+
+  // Fail everything waiting: the pool can't run jobs for a while
+  function shedQueue(reason, retryAfter) {
+    for (const job of queue.splice(0)) {
+      clearTimeout(job.timer);
+      stats.rejected++;
+      countOutcome(job.op, 'rejected');
+      job.reject(new HashPoolBusyError(reason, retryAfter));
+    }
+  }
+
+  // Restart dead threads with backoff, and stop trying if they keep dying
+  function scheduleRestart() {
+    // Threads that die together count once
+    if (restartTimer || unavailableUntil > Date.now()) return;
+    consecutiveFailures++;
+    if (consecutiveFailures >= MAX_RESTART_FAILURES) {
+      unavailableUntil = Date.now() + RESTART_COOLDOWN;
+      console.error(`❌ Hashing threads exited ${consecutiveFailures} times in a row; retrying in ${RESTART_COOLDOWN / 1000}s`);
+      shedQueue('unavailable', Math.ceil(RESTART_COOLDOWN / 1000));
+      return;
+    }
+    const delay = Math.min(RESTART_DELAY * 2 ** (consecutiveFailures - 1), MAX_RESTART_DELAY);
+    restartTimer = setTimeout(() => {
+      restartTimer = null;
+      stats.restarts++;
+      ensureWorkers();
+      drain();
+    }, delay);
+    restartTimer.unref?.();
+  }
+
+  // While given up, how long until the next attempt (0 when available)
+  function unavailableFor() {
+    if (unavailableUntil === 0) return 0;
+    const remaining = unavailableUntil - Date.now();
+    if (remaining > 0) return remaining;
+    // Cooldown over: one more failure gives up again
+    unavailableUntil = 0;
+    consecutiveFailures = MAX_RESTART_FAILURES - 1;
+    return 0;
+  }
+
+  function start(worker, job) {
+    clearTimeout(job.timer);
+    job.started = performance.now();
+    waitSeries[job.op].observe((job.started - job.queued) / 1000);
+    running.set(worker, job);
+    worker.postMessage({ id: job.id, ...job.message });
+  }
+
+  function release(worker) {
+    if (closed || !workers.has(worker)) return;
+    const job = queue.shift();
+    if (job) {
+      start(worker, job);
+    } else {
+      idle.push(worker);
+    }
+  }
+
+  function drain() {
+    while (idle.length > 0 && queue.length > 0) {
+      start(idle.pop(), queue.shift());
+    }
+  }
+
+  function submit(op, message) {
+    if (closed) {
+      return Promise.reject(new Error('Hashing pool is closed'));
+    }
+    const unavailable = unavailableFor();
+    if (unavailable > 0) {
+      stats.rejected++;
+      countOutcome(op, 'rejected');
+      return Promise.reject(new HashPoolBusyError('unavailable', Math.ceil(unavailable / 1000)));
+    }
+    ensureWorkers();
+
+    // Admission control: shed instead of growing the queue
+    if (idle.length === 0 && queue.length >= queueLimit) {
+      stats.rejected++;
+      countOutcome(op, 'rejected');
+      return Promise.reject(new HashPoolBusyError('queue full', Math.ceil(queueTimeout / 1000)));
+    }
+
+    return new Promise((resolve, reject) => {
+      const job = { id: nextJobId++, op, message, resolve, reject, queued: performance.now(), timer: null, attempts: 1 };
+      if (idle.length > 0) {
+        start(idle.pop(), job);
+        return;
+      }
+      // Waited too long: the client is better served by a fast 503
+      job.timer = setTimeout(() => {
+        const index = queue.indexOf(job);
+        if (index === -1) return;
+        queue.splice(index, 1);
+        stats.timedOut++;
+        countOutcome(op, 'timeout');
+        reject(new HashPoolBusyError('queue timeout', Math.ceil(queueTimeout / 1000)));
+      }, queueTimeout);
+      job.timer.unref?.();
+      queue.push(job);
+    });
+  }
+
+  return {
+    /**
+     * Hash a password
+     * @param {string} password - Plain-text password
+     * @param {number} rounds - bcrypt cost
+     * @returns {Promise<string>} bcrypt hash
+     */
+    hash(password, rounds) {
+      return submit('hash', { op: 'hash', password, rounds });
+    },
+
+    /**
+     * Check a password against a bcrypt hash
+     * @param {string} password - Plain-text password
+     * @param {string} hash - Stored hash
+     * @returns {Promise<boolean>} Whether they match
+     */
+    compare(password, hash) {
+      return submit('compare', { op: 'compare', password, hash });
+    },
+
+    /**
+     * Whether a new job would be shed right now
+     * @returns {boolean} Saturation state
+     */
+    isSaturated() {
+      if (unavailableUntil > Date.now()) return true;
+      return workers.size >= size && idle.length === 0 && queue.length >= queueLimit;
+    },
+
+    getStats() {
+      return { ...stats, size, queueLimit, queued: queue.length, busy: running.size, unavailable: unavailableUntil > Date.now() };
+    },
+
+    async close() {
+      closed = true;
+      clearTimeout(restartTimer);
+      restartTimer = null;
+      for (const job of queue.splice(0)) {
+        clearTimeout(job.timer);
+        job.reject(new Error('Hashing pool is closed'));
+      }
+      await Promise.all([...workers].map(worker => worker.terminate()));
+    }
+  };
+}
+
+// Shared pool for the auth routes
+export const hashPool = createHashPool();
+
+/**
+ * Reject requests with 503 before any database work while the pool is
+ * saturated. Mount ahead of handlers that hash.
+ */
+export function hashAdmission(req, res, next) {
+  if (hashPool.isSaturated()) {
+    incrementCounter('nextbuy_hash_pool_jobs_total', 'Hashing jobs by outcome', { pool: 'bcrypt', op: 'admission', outcome: 'rejected' });
+    res.set('Retry-After', String(Math.ceil(DEFAULT_QUEUE_TIMEOUT / 1000)));
+    return res.status(503).json({ message: 'Server is busy, please try again shortly' });
+  }
+  next();
+}
+
+export default {
+  HashPoolBusyError,
+  createHashPool,
+  hashPool,
+  hashAdmission
+};
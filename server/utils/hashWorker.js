@@ -0,0 +1,17 @@
+import { parentPort } from 'worker_threads';
+import bcrypt from 'bcrypt';
+
+// Hashing thread for utils/hashPool.js. The synchronous bcrypt calls run on
+// this thread, not on libuv's shared threadpool, so password hashing can't
+// starve file-system, DNS or zlib work in the main process.
+
+parentPort.on('message', ({ id, op, password, hash, rounds }) => {
+  try {
+    const result = op === 'hash'
+      ? bcrypt.hashSync(password, rounds)
+      : bcrypt.compareSync(password, hash);
+    parentPort.postMessage({ id, result });
+  } catch (error) {
+    parentPort.postMessage({ id, error: error.message });
+  }
+});
@@ -0,0 +1,290 @@
+// Single-pass injection scanner used by sqlInjectionCheck.
+// The legacy regex list is compiled once into a case-folded Aho-Corasick
+// automaton, so every string is walked once, character by character, and the
+// scan stops at the first match regardless of how many patterns there are.
+
+// Reference patterns the automaton reproduces (kept for tests and benchmarks)
+export const DEFAULT_INJECTION_PATTERNS = [
+  /('|(\-\-)|(;)|(\||\|)|(\*|\*))/i,
+  /(union|select|insert|update|delete|drop|create|alter|exec|execute)/i,
+  /(script|javascript|vbscript|onload|onerror|onclick)/i,
+  /(or\s+1\s*=\s*1|and\s+1\s*=\s*1)/i,
+  /(or\s+'\w+'\s*=\s*'\w+'|and\s+'\w+'\s*=\s*'\w+')/i,
+  /(\bor\b|\band\b)\s+(true|false)/i,
+  /(xp_|sp_|0x)/i,
+  /(information_schema|sysobjects|syscolumns)/i
+];
+
+// Literal tokens that are an immediate match. Longer variants of a token
+// (execute, javascript, vbscript) are implied by the shorter one, and the
+// quoted tautology pattern is implied by the single quote.
+const MATCH_TOKENS = [
+  "'", '--', ';', '|', '*',
+  'union', 'select', 'insert', 'update', 'delete', 'drop', 'create', 'alter', 'exec',
+  'script', 'onload', 'onerror', 'onclick',
+  'xp_', 'sp_', '0x',
+  'information_schema', 'sysobjects', 'syscolumns'
+];
+
+// Tokens that only match when followed by a tautology ("or 1=1", "and true")
+const VERIFY_TOKENS = ['or', 'and'];
+
+const ALPHABET = 128; // non-ASCII characters never case-fold onto ASCII under /i
+const NO_OUTPUT = 0;
+const OUTPUT_MATCH = 1;
+const OUTPUT_VERIFY = 2;
+
+const TAUTOLOGY = /\s+(?:1\s*=\s*1|(true|false))/iy;
+
+export const DEFAULT_MAX_DEPTH = 32; // nesting levels walked below each source
+export const DEFAULT_MAX_BYTES = 1024 * 1024; // 1 MB of string data per request
+
+/**
+ * Build a dense, case-folded Aho-Corasick transition table
+ * @param {string[]} matchTokens - Tokens that match unconditionally
+ * @param {string[]} verifyTokens - Tokens that need a follow-up check
+ * @returns {{ table: Uint16Array, outputs: Uint8Array, lengths: Uint8Array, firstOutput: number }} Automaton
+ */
+function buildAutomaton(matchTokens, verifyTokens) {
+  const goto = [new Map()];
+  const output = [NO_OUTPUT];
+  const length = [0];
+
+  const addToken = (token, kind) => {
+    let state = 0;
+    for (const char of token.toLowerCase()) {
+      const code = char.charCodeAt(0);
+      if (!goto[state].has(code)) {
+        goto.push(new Map());
+        output.push(NO_OUTPUT);
+        length.push(0);
+        goto[state].set(code, goto.length - 1);
+      }
+      state = goto[state].get(code);
+    }
+    // An unconditional match always wins over a verify token ending at the same state
+    if (output[state] !== OUTPUT_MATCH) {
+      output[state] = kind;
+      length[state] = token.length;
+    }
+  };
+
+  matchTokens.forEach(token => addToken(token, OUTPUT_MATCH));
+  verifyTokens.forEach(token => addToken(token, OUTPUT_VERIFY));
+
+  const stateCount = goto.length;
+  const table = new Uint16Array(stateCount * ALPHABET);
+  const fail = new Uint16Array(stateCount);
+  const outputs = Uint8Array.from(output);
+  const lengths = Uint8Array.from(length);
+
+  // Breadth-first construction of failure links, folding them into the table
+  const queue = [];
+  for (let code = 0; code < ALPHABET; code++) {
+    const next = goto[0].get(code);
+    if (next !== undefined) {
+      table[code] = next;
+      queue.push(next);
+    }
+  }
+
+  for (let head = 0; head < queue.length; head++) {
+    const state = queue[head];
+    // Inherit outputs reachable through the failure link
+    const inherited = outputs[fail[state]];
+    if (inherited === OUTPUT_MATCH || (inherited === OUTPUT_VERIFY && outputs[state] === NO_OUTPUT)) {
+      outputs[state] = inherited;
+      lengths[state] = lengths[fail[state]];
+    }
+
+    for (let code = 0; code < ALPHABET; code++) {
+      const next = goto[state].get(code);
+      if (next !== undefined) {
+        fail[next] = table[fail[state] * ALPHABET + code];
+        table[state * ALPHABET + code] = next;
+        queue.push(next);
+      } else {
+        table[state * ALPHABET + code] = table[fail[state] * ALPHABET + code];
+      }
+    }
+  }
+
+  // Uppercase ASCII letters follow the same edges as their lowercase forms
+  for (let state = 0; state < stateCount; state++) {
+    for (let code = 65; code <= 90; code++) {
+      table[state * ALPHABET + code] = table[state * ALPHABET + code + 32];
+    }
+  }
+
+  // Renumber so every state with an output sorts after `firstOutput`; the hot
+  // loop then needs a single comparison per character
+  const order = [];
+  for (let state = 0; state < stateCount; state++) {
+    if (outputs[state] === NO_OUTPUT) order.push(state);
+  }
+  const firstOutput = order.length;
+  for (let state = 0; state < stateCount; state++) {
+    if (outputs[state] !== NO_OUTPUT) order.push(state);
+  }
+  const rank = new Uint16Array(stateCount);
+  order.forEach((state, index) => { rank[state] = index; });
+
+  const renumbered = new Uint16Array(stateCount * ALPHABET);
+  const renumberedOutputs = new Uint8Array(stateCount);
+  const renumberedLengths = new Uint8Array(stateCount);
+  order.forEach((state, index) => {
+    for (let code = 0; code < ALPHABET; code++) {
+      renumbered[index * ALPHABET + code] = rank[table[state * ALPHABET + code]];
+    }
+    renumberedOutputs[index] = outputs[state];
+    renumberedLengths[index] = lengths[state];
+  });
+
+  return {
+    table: renumbered,
+    outputs: renumberedOutputs,
+    lengths: renumberedLengths,
+    firstOutput
+  };
+}
+
+const isWordChar = (code) => (
+  (code >= 48 && code <= 57) ||
+  (code >= 65 && code <= 90) ||
+  (code >= 97 && code <= 122) ||
+  code === 95
+);
+
+/**
+ * Create a string matcher equivalent to testing every pattern in DEFAULT_INJECTION_PATTERNS
+ * @returns {Function} (value: string) => boolean
+ */
+export function createInjectionMatcher() {
+  const { table, outputs, lengths, firstOutput } = buildAutomaton(MATCH_TOKENS, VERIFY_TOKENS);
+
+  // "or"/"and" ending at `end` must be followed by a tautology; the true/false
+  // form additionally needs a word boundary before the keyword
+  const verify = (value, end, tokenLength) => {
+    TAUTOLOGY.lastIndex = end + 1;
+    const match = TAUTOLOGY.exec(value);
+    if (!match) return false;
+    if (match[1] === undefined) return true;
+    const start = end - tokenLength + 1;
+    return start === 0 || !isWordChar(value.charCodeAt(start - 1));
+  };
+
+  return (value) => {
+    let state = 0;
+    for (let i = 0, len = value.length; i < len; i++) {
+      const code = value.charCodeAt(i);
+      state = code < ALPHABET ? table[(state << 7) | code] : 0;
+      if (state < firstOutput) continue;
+      if (outputs[state] === OUTPUT_MATCH || verify(value, i, lengths[state])) return true;
+    }
+    return false;
+  };
+}
+
+/**
+ * Create a scanner that walks nested payloads with depth and byte budgets
+ * @param {Object} options - Scanner options
+ * @param {number} options.maxDepth - Maximum nesting depth before the payload is rejected
+ * @param {number} options.maxBytes - Maximum string bytes scanned before the payload is rejected
+ *   (reason 'byte_limit', which sqlInjectionCheck answers with 413 rather than as an injection)
+ * @returns {{ scan: Function, matches: Function }} Scanner
+ */
+export function createInjectionScanner({
+  maxDepth = DEFAULT_MAX_DEPTH,
+  maxBytes = DEFAULT_MAX_BYTES
+} = {}) {
+  const matches = createInjectionMatcher();
+
+  /**
+   * Scan one or more request sources sharing a single budget
+   * @param {Object} sources - Map of source name to value (e.g. { body, query, params })
+   * @returns {Object|null} null when clean, otherwise { source, field, reason }
+   */
+  const scan = (sources) => {
+    const keys = [];
+    let budget = maxBytes;
+    let hit = null;
+
+    const visit = (value, depth) => {
+      // Every visited node costs at least one byte so huge arrays of numbers stay bounded
+      budget--;
+
+      if (typeof value === 'string') {
+        budget -= value.length;
+        if (budget < 0) {
+          hit = 'byte_limit';
+          return true;
+        }
+        if (matches(value)) {
+          hit = 'pattern';
+          return true;
+        }
+        return false;
+      }
+
+      if (budget < 0) {
+        hit = 'byte_limit';
+        return true;
+      }
+
+      if (value === null || typeof value !== 'object') return false;
+
+      if (depth >= maxDepth) {
+        hit = 'depth_limit';
+        return true;
+      }
+
+      if (Array.isArray(value)) {
+        for (let i = 0; i < value.length; i++) {
+          keys.push(i);
+          if (visit(value[i], depth + 1)) return true;
+          keys.pop();
+        }
+        return false;
+      }
+
+      for (const key in value) {
+        if (!Object.prototype.hasOwnProperty.call(value, key)) continue;
+        keys.push(key);
+        if (visit(value[key], depth + 1)) return true;
+        keys.pop();
+      }
+      return false;
+    };
+
+    for (const source in sources) {
+      const value = sources[source];
+      if (value === null || value === undefined) continue;
+      if (visit(value, 0)) {
+        return { source, field: formatPath(keys), reason: hit };
+      }
+    }
+
+    return null;
+  };
+
+  return { scan, matches };
+}
+
+/**
+ * Render a key path such as ['items', 2, 'name'] as "items[2].name"
+ * @param {Array<string|number>} keys - Key path
+ * @returns {string} Dotted field path
+ */
+function formatPath(keys) {
+  let field = '';
+  for (const key of keys) {
+    if (typeof key === 'number') {
+      field += `[${key}]`;
+    } else {
+      field += field ? `.${key}` : key;
+    }
+  }
+  return field;
+}
+
+export default createInjectionScanner;
@@ -0,0 +1,120 @@
+import zlib from 'zlib';
+import { StringDecoder } from 'string_decoder';
+
+// Incremental NDJSON reader for large uploads. The body is decompressed and
+// split into records chunk by chunk, so memory stays bounded by one chunk plus
+// one line, and reading pauses while the consumer works on a batch.
+
+const DEFAULT_BATCH_SIZE = 1000;
+const DEFAULT_MAX_LINE_BYTES = 64 * 1024; // 64 KB per record
+
+/**
+ * Error with an HTTP status for the route to report
+ */
+export class NdjsonError extends Error {
+  constructor(message, status = 400) {
+    super(message);
+    this.name = 'NdjsonError';
+    this.status = status;
+  }
+}
+
+/**
+ * Decode the body according to its Content-Encoding
+ * @param {import('stream').Readable} stream - Request stream
+ * @param {string} contentEncoding - Content-Encoding header
+ * @returns {import('stream').Readable} Decompressed stream
+ */
+export function decodeBody(stream, contentEncoding) {
+  const encoding = (contentEncoding || 'identity').trim().toLowerCase();
+  let decoder;
+  if (encoding === 'gzip' || encoding === 'x-gzip') {
+    decoder = zlib.createGunzip();
+  } else if (encoding === 'br') {
+    decoder = zlib.createBrotliDecompress();
+  } else if (encoding === 'identity') {
+    return stream;
+  } else {
+    throw new NdjsonError(`Unsupported Content-Encoding: ${encoding}`, 415);
+  }
+
+  // Surface source errors (aborted uploads) on the stream being read
+  stream.on('error', error => decoder.destroy(error));
+  return stream.pipe(decoder);
+}
+
+/**
+ * Read newline-delimited JSON records in batches
+ * @param {import('stream').Readable} stream - Decoded body
+ * @param {Object} options - Reader options
+ * @param {number} options.batchSize - Maximum records per batch
+ * @param {number} options.maxLineBytes - Longest accepted line
+ * @param {Object} options.stats - Receives { records, rejected, bytes }
+ * @returns {AsyncGenerator<Object[]>} Batches of parsed records
+ */
+export async function* readNdjsonBatches(stream, {
+  batchSize = DEFAULT_BATCH_SIZE,
+  maxLineBytes = DEFAULT_MAX_LINE_BYTES,
+  stats = {}
+} = {}) {
+  stats.records = 0;
+  stats.rejected = 0;
+  stats.bytes = 0;
+
+  const decoder = new StringDecoder('utf8');
+  let carry = '';
+  let batch = [];
+
+  const parseLine = (line) => {
+    const trimmed = line.trim();
+    if (!trimmed) return;
+    try {
+      batch.push(JSON.parse(trimmed));
+      stats.records++;
+    } catch (error) {
+      stats.rejected++;
+    }
+  };
+
+  try {
+    for await (const chunk of stream) {
+      stats.bytes += chunk.length;
+      const text = carry + decoder.write(chunk);
+      let start = 0;
+      let newline;
+      while ((newline = text.indexOf('\n', start)) !== -1) {
+        parseLine(text.slice(start, newline));
+        start = newline + 1;
+        if (batch.length >= batchSize) {
+          yield batch;
+          batch = [];
+        }
+      }
+      carry = text.slice(start);
+      if (carry.length > maxLineBytes) {
+        throw new NdjsonError(`Record exceeds ${maxLineBytes} bytes`, 413);
+      }
+      // Hand over what this chunk produced; the stream stays paused meanwhile
+      if (batch.length > 0) {
+        yield batch;
+        batch = [];
+      }
+    }
+  } catch (error) {
+    if (error instanceof NdjsonError) throw error;
+    // zlib reports Z_DATA_ERROR and friends, brotli ERR__ERROR_FORMAT_*
+    if (typeof error.code === 'string' && /^(Z_|ERR__ERROR)/.test(error.code)) {
+      throw new NdjsonError('Invalid compressed body');
+    }
+    throw error;
+  }
+
+  parseLine(carry + decoder.end());
+  if (batch.length > 0) yield batch;
+}
+
+export default {
+  NdjsonError,
+  decodeBody,
+  readNdjsonBatches
+};
@@ -0,0 +1,238 @@
+import fs from 'fs';
+import path from 'path';
+import { createHash, randomBytes } from 'crypto';
+import { Transform } from 'stream';
+import { pipeline } from 'stream/promises';
+
+// Content-addressed profile photos. Uploads stream through a SHA-256 hash
+// into a temporary file (nothing is buffered in memory), then land under
+// uploads/photos/<digest>.<ext>. A photo already on disk is not stored
+// again, and its resized WebP variants (<digest>-<size>.webp) are generated
+// once, on first upload. The file names change with the content, so they
+// are served as immutable with a one-year cache lifetime.
+// Resizing uses sharp when it is installed; without it the original is used.
+
+export const PHOTO_DIR = path.join(path.resolve(), 'uploads', 'photos');
+export const PHOTO_URL_PREFIX = 'uploads/photos';
+const VARIANT_SIZES = (process.env.PHOTO_VARIANT_SIZES || '64,256')
+  .split(',').map(Number).filter(size => size > 0).sort((a, b) => a - b);
+
+// Magic numbers of the accepted formats
+const IMAGE_SIGNATURES = [
+  { ext: 'jpg', matches: bytes => bytes[0] === 0xff && bytes[1] === 0xd8 && bytes[2] === 0xff },
+  { ext: 'png', matches: bytes => bytes.subarray(0, 4).equals(Buffer.from([0x89, 0x50, 0x4e, 0x47])) },
+  { ext: 'gif', matches: bytes => bytes.subarray(0, 4).toString('latin1') === 'GIF8' },
+  { ext: 'webp', matches: bytes => bytes.subarray(0, 4).toString('latin1') === 'RIFF' && bytes.subarray(8, 12).toString('latin1') === 'WEBP' }
+];
+
+/**
+ * Raised for uploads that are not a supported image
+ */
+export class PhotoUploadError extends Error {
+  constructor(message) {
+    super(message);
+    this.name = 'PhotoUploadError';
+    this.status = 400;
+  }
+}
+
+let sharpLoader = null;
+
+function loadSharp() {
+  if (!sharpLoader) {
+    sharpLoader = import('sharp')
+      .then(module => module.default)
+      .catch(() => {
+        console.warn('⚠️ sharp is not installed; profile photos are stored without resized variants');
+        return null;
+      });
+  }
+  return sharpLoader;
+}
+
+const exists = file => fs.promises.access(file).then(() => true, () => false);
+
+// Hashes and sniffs the bytes on their way to disk
+function createDigestStream() {
+  const hash = createHash('sha256');
+  let head = Buffer.alloc(0);
+  const stream = new Transform({
+    transform(chunk, encoding, callback) {
+      if (head.length < 12) head = Buffer.concat([head, chunk.subarray(0, 12 - head.length)]);
+      hash.update(chunk);
+      stream.size += chunk.length;
+      callback(null, chunk);
+    }
+  });
+  stream.size = 0;
+  stream.result = () => ({
+    digest: hash.digest('hex'),
+    type: head.length >= 12 ? IMAGE_SIGNATURES.find(signature => signature.matches(head)) : undefined
+  });
+  return stream;
+}
+
+/**
+ * Create the photo store
+ * @param {Object} options - Store options
+ * @param {string} options.directory - Where photos are written
+ * @param {string} options.urlPrefix - Relative URL path of that directory
+ * @param {number[]} options.sizes - Square variant sizes in pixels
+ * @returns {Object} Store with save(stream) and a multer storage()
+ */
+export function createPhotoStore({
+  directory = PHOTO_DIR,
+  urlPrefix = PHOTO_URL_PREFIX,
+  sizes = VARIANT_SIZES
+} = {}) {
+  // Variant generation in progress, so concurrent identical uploads resize once
+  const pendingVariants = new Map();
+  let directoryReady = null;
+
+  const ensureDirectory = () => {
+    directoryReady ??= fs.promises.mkdir(directory, { recursive: true });
+    return directoryReady;
+  };
+
+  const variantName = (digest, size) => `${digest}-${size}.webp`;
+
+  async function generateVariants(digest, originalFile) {
+    const sharp = await loadSharp();
+    if (!sharp || sizes.length === 0) return false;
+
+    const missing = [];
+    for (const size of sizes) {
+      if (!(await exists(path.join(directory, variantName(digest, size))))) missing.push(size);
+    }
+    if (missing.length === 0) return true;
+
+    // Decode once, resize per size; metadata (EXIF, GPS) is dropped
+    const source = sharp(originalFile, { failOn: 'error' }).rotate();
+    await Promise.all(missing.map(async (size) => {
+      const target = path.join(directory, variantName(digest, size));
+      const temporary = `${target}.${randomBytes(6).toString('hex')}.tmp`;
+      await source.clone().resize(size, size, { fit: 'cover' }).webp({ quality: 80 }).toFile(temporary);
+      await fs.promises.rename(temporary, target);
+    }));
+    return true;
+  }
+
+  function variantsFor(digest, originalFile) {
+    let pending = pendingVariants.get(digest);
+    if (!pending) {
+      pending = generateVariants(digest, originalFile).finally(() => pendingVariants.delete(digest));
+      pendingVariants.set(digest, pending);
+    }
+    return pending;
+  }
+
+  /**
+   * Store an uploaded photo
+   * @param {import('stream').Readable} stream - Upload body
+   * @returns {Promise<Object>} { digest, size, deduplicated, original, variants, path }
+   */
+  async function save(stream) {
+    await ensureDirectory();
+    // Dot-prefixed, so express.static never serves a partial upload
+    const temporary = path.join(directory, `.upload-${randomBytes(8).toString('hex')}`);
+    const digestStream = createDigestStream();
+
+    try {
+      await pipeline(stream, digestStream, fs.createWriteStream(temporary));
+    } catch (error) {
+      await fs.promises.rm(temporary, { force: true });
+      throw error;
+    }
+
+    const { digest, type } = digestStream.result();
+    if (!type) {
+      await fs.promises.rm(temporary, { force: true });
+      throw new PhotoUploadError('Profile photo must be a JPEG, PNG, GIF or WebP image');
+    }
+
+    const originalName = `${digest}.${type.ext}`;
+    const originalFile = path.join(directory, originalName);
+    // link() fails if the content is already stored, also for concurrent identical uploads
+    let deduplicated = false;
+    try {
+      await fs.promises.link(temporary, originalFile);
+    } catch (error) {
+      if (error.code !== 'EEXIST') throw error;
+      deduplicated = true;
+    } finally {
+      await fs.promises.rm(temporary, { force: true });
+    }
+
+    let resized = false;
+    try {
+      resized = await variantsFor(digest, originalFile);
+    } catch (error) {
+      // Undecodable despite a valid signature
+      if (!deduplicated) await fs.promises.rm(originalFile, { force: true });
+      throw new PhotoUploadError('Profile photo could not be processed');
+    }
+
+    const variants = {};
+    if (resized) {
+      for (const size of sizes) variants[size] = `${urlPrefix}/${variantName(digest, size)}`;
+    }
+    const original = `${urlPrefix}/${originalName}`;
+    return {
+      digest,
+      size: digestStream.size,
+      deduplicated,
+      original,
+      variants,
+      // What gets stored on the user: the largest variant, or the original
+      path: resized ? variants[sizes[sizes.length - 1]] : original
+    };
+  }
+
+  return {
+    save,
+
+    /**
+     * multer storage engine backed by this store
+     * @returns {Object} StorageEngine
+     */
+    storage() {
+      return {
+        _handleFile(req, file, callback) {
+          // Past multer's fileSize limit the stream is cut short: abort instead of storing a partial file
+          file.stream.once('limit', () => file.stream.destroy(new PhotoUploadError('Profile photo is too large')));
+          save(file.stream).then(stored => callback(null, stored), callback);
+        },
+        // Content-addressed files may belong to other users, so they stay
+        _removeFile(req, file, callback) {
+          callback(null);
+        }
+      };
+    }
+  };
+}
+
+// Shared store for the auth routes
+export const photoStore = createPhotoStore();
+
+/**
+ * Static-file options for the photo directory: names are content hashes,
+ * so responses never change and can be cached for a year
+ */
+export const photoStaticOptions = {
+  immutable: true,
+  maxAge: '365d',
+  index: false,
+  setHeaders(res) {
+    // Avatars are embedded by the client, which runs on another origin
+    res.setHeader('Cross-Origin-Resource-Policy', 'cross-origin');
+  }
+};
+
+export default {
+  PHOTO_DIR,
+  PHOTO_URL_PREFIX,
+  PhotoUploadError,
+  createPhotoStore,
+  photoStore,
+  photoStaticOptions
+};
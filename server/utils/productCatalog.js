@@ -0,0 +1,95 @@
+import { ProductSearchIndex } from './productSearchIndex.js';
+
+// In-memory product catalog shared by the product and benchmark routes.
+// Every change goes through upsertProduct/removeProduct so the search index
+// stays in step without rebuilding, and bumps the catalog version that keys
+// the pre-serialized response cache.
+
+// Sample product data (in a real app, this would come from a database)
+export const sampleProducts = [
+  {
+    id: 1,
+    name: "Wireless Headphones",
+    price: 99.99,
+    category: "Electronics",
+    description: "High-quality wireless headphones with noise cancellation"
+  },
+  {
+    id: 2,
+    name: "Smart Watch",
+    price: 299.99,
+    category: "Electronics",
+    description: "Advanced fitness tracking and notification features"
+  },
+  {
+    id: 3,
+    name: "Laptop Stand",
+    price: 49.99,
+    category: "Accessories",
+    description: "Ergonomic aluminum laptop stand"
+  },
+  {
+    id: 4,
+    name: "Coffee Mug",
+    price: 14.99,
+    category: "Home",
+    description: "Ceramic coffee mug with thermal insulation"
+  },
+  {
+    id: 5,
+    name: "Backpack",
+    price: 79.99,
+    category: "Accessories",
+    description: "Waterproof travel backpack with multiple compartments"
+  }
+];
+
+export const productIndex = new ProductSearchIndex();
+sampleProducts.forEach(product => productIndex.upsert(product));
+
+let catalogVersion = 1;
+
+/**
+ * Current catalog version; changes whenever a product is added, updated or removed
+ * @returns {number} Version
+ */
+export function getCatalogVersion() {
+  return catalogVersion;
+}
+
+/**
+ * Add a product or replace the one with the same id
+ * @param {Object} product - Product with id, name, category and description
+ */
+export function upsertProduct(product) {
+  productIndex.upsert(product);
+  catalogVersion++;
+}
+
+/**
+ * Remove a product from the catalog
+ * @param {number} productId - Product id
+ * @returns {boolean} Whether the product existed
+ */
+export function removeProduct(productId) {
+  const removed = productIndex.remove(productId);
+  if (removed) catalogVersion++;
+  return removed;
+}
+
+/**
+ * Look up a product by id
+ * @param {number} productId - Product id
+ * @returns {Object|undefined} Product
+ */
+export function getProduct(productId) {
+  return productIndex.get(productId);
+}
+
+export default {
+  productIndex,
+  upsertProduct,
+  removeProduct,
+  getProduct,
+  getCatalogVersion
+};
@@ -0,0 +1,459 @@
+// Incremental inverted index for product search.
+//
+// Postings are kept per token in growable typed arrays (doc id, doc version,
+// weight). Updating or removing a product bumps its version, which turns its
+// old postings into tombstones that are compacted lazily, so changes never
+// rescan the catalog. Query terms are matched against the vocabulary as exact
+// tokens, prefixes (short prefix map) and substrings (trigram map), then
+// ranked by field-weighted TF-IDF and paged with keyset cursors.
+
+export const DEFAULT_PAGE_SIZE = 20;
+export const MAX_PAGE_SIZE = 100;
+
+const DEFAULT_FIELD_WEIGHTS = { name: 3, category: 2, description: 1 };
+const MATCH_WEIGHTS = { exact: 1, prefix: 0.7, substring: 0.4 };
+const SHORT_PREFIX_LENGTH = 2; // terms shorter than a trigram use the prefix map
+const MAX_QUERY_TERMS = 8;
+const INITIAL_POSTINGS = 4;
+
+/**
+ * Split text into lowercase alphanumeric tokens
+ * @param {string} text - Text to tokenize
+ * @returns {string[]} Tokens
+ */
+export function tokenize(text) {
+  if (!text) return [];
+  return String(text).toLowerCase().split(/[^\p{L}\p{N}]+/u).filter(Boolean);
+}
+
+function trigrams(token) {
+  const grams = new Set();
+  for (let i = 0; i + 3 <= token.length; i++) {
+    grams.add(token.slice(i, i + 3));
+  }
+  return grams;
+}
+
+function compareIds(a, b) {
+  if (typeof a === 'number' && typeof b === 'number') return a - b;
+  return String(a) < String(b) ? -1 : String(a) > String(b) ? 1 : 0;
+}
+
+/**
+ * Encode a keyset cursor as an opaque URL-safe string
+ * @param {Object} position - Cursor position
+ * @returns {string} Cursor
+ */
+export function encodeCursor(position) {
+  return Buffer.from(JSON.stringify(position)).toString('base64url');
+}
+
+/**
+ * Decode a cursor produced by encodeCursor
+ * @param {string} cursor - Cursor from a previous page
+ * @returns {Object|null} Position, or null when absent
+ * @throws {Error} When the cursor is malformed
+ */
+export function decodeCursor(cursor) {
+  if (!cursor) return null;
+  try {
+    const position = JSON.parse(Buffer.from(String(cursor), 'base64url').toString('utf8'));
+    if (position && typeof position === 'object') return position;
+  } catch (error) {
+    // fall through to the error below
+  }
+  throw new Error('Invalid cursor');
+}
+
+/**
+ * Clamp a requested page size to [1, MAX_PAGE_SIZE]
+ * @param {*} limit - Requested limit (query string value)
+ * @returns {number} Page size
+ */
+export function normalizePageSize(limit) {
+  const size = parseInt(limit, 10);
+  if (isNaN(size) || size < 1) return DEFAULT_PAGE_SIZE;
+  return Math.min(size, MAX_PAGE_SIZE);
+}
+
+class Postings {
+  constructor() {
+    this.docs = new Int32Array(INITIAL_POSTINGS);
+    this.versions = new Uint32Array(INITIAL_POSTINGS);
+    this.weights = new Float32Array(INITIAL_POSTINGS);
+    this.length = 0;
+    this.live = 0;
+  }
+
+  push(doc, version, weight) {
+    if (this.length === this.docs.length) {
+      const capacity = this.length * 2;
+      const docs = new Int32Array(capacity);
+      const versions = new Uint32Array(capacity);
+      const weights = new Float32Array(capacity);
+      docs.set(this.docs);
+      versions.set(this.versions);
+      weights.set(this.weights);
+      this.docs = docs;
+      this.versions = versions;
+      this.weights = weights;
+    }
+    this.docs[this.length] = doc;
+    this.versions[this.length] = version;
+    this.weights[this.length] = weight;
+    this.length++;
+    this.live++;
+  }
+
+  /**
+   * Drop tombstoned entries in place
+   * @param {Uint32Array} docVersions - Current version of every doc
+   */
+  compact(docVersions) {
+    let write = 0;
+    for (let read = 0; read < this.length; read++) {
+      const doc = this.docs[read];
+      if (this.versions[read] !== docVersions[doc]) continue;
+      this.docs[write] = doc;
+      this.versions[write] = this.versions[read];
+      this.weights[write] = this.weights[read];
+      write++;
+    }
+    this.length = write;
+  }
+}
+
+export class ProductSearchIndex {
+  /**
+   * @param {Object} options - Index options
+   * @param {Object} options.fieldWeights - Weight of a token occurrence per field
+   * @param {string} options.idField - Product id property
+   */
+  constructor({ fieldWeights = DEFAULT_FIELD_WEIGHTS, idField = 'id' } = {}) {
+    this.fieldWeights = fieldWeights;
+    this.idField = idField;
+
+    // Internal doc ids are dense array positions; product ids map onto them
+    this.products = [];
+    this.docVersions = new Uint32Array(1024);
+    this.docByProductId = new Map();
+    this.liveCount = 0;
+
+    this.postings = new Map();
+    this.trigramTokens = new Map();
+    this.prefixTokens = new Map();
+
+    // Scratch buffers reused by every search
+    this.scores = new Float32Array(1024);
+    this.matched = new Uint8Array(1024);
+    this.stamps = new Uint32Array(1024);
+    this.searchStamp = 0;
+  }
+
+  get size() {
+    return this.liveCount;
+  }
+
+  get(productId) {
+    const doc = this.docByProductId.get(productId);
+    return doc === undefined ? undefined : this.products[doc];
+  }
+
+  /**
+   * Add or replace a product. Indexed products are treated as immutable:
+   * pass a new object to update rather than mutating the stored one.
+   * @param {Object} product - Product with an id field
+   */
+  upsert(product) {
+    const productId = product[this.idField];
+    let doc = this.docByProductId.get(productId);
+
+    if (doc === undefined) {
+      doc = this.products.length;
+      this.products.push(product);
+      this.docByProductId.set(productId, doc);
+      this.ensureCapacity(doc + 1);
+      this.liveCount++;
+    } else {
+      this.retire(doc);
+      this.products[doc] = product;
+    }
+
+    const version = this.docVersions[doc];
+    for (const [token, weight] of this.weighTokens(product)) {
+      let postings = this.postings.get(token);
+      if (!postings) {
+        postings = new Postings();
+        this.postings.set(token, postings);
+        this.addToVocabulary(token);
+      }
+      postings.push(doc, version, weight);
+    }
+  }
+
+  /**
+   * Remove a product
+   * @param {*} productId - Product id
+   * @returns {boolean} Whether the product existed
+   */
+  remove(productId) {
+    const doc = this.docByProductId.get(productId);
+    if (doc === undefined) return false;
+    this.retire(doc);
+    this.products[doc] = null;
+    this.docByProductId.delete(productId);
+    this.liveCount--;
+    return true;
+  }
+
+  /**
+   * Page through all products in insertion order
+   * @param {Object} options - Paging options
+   * @param {number} options.limit - Page size
+   * @param {string} options.cursor - Cursor from the previous page
+   * @returns {{ items: Object[], total: number, nextCursor: string|null }} Page
+   */
+  list({ limit = DEFAULT_PAGE_SIZE, cursor } = {}) {
+    const position = decodeCursor(cursor);
+    // Client-supplied: an out-of-range index would make the scan below unbounded
+    if (position && !(Number.isInteger(position.d) && position.d >= -1 && position.d < this.products.length)) {
+      throw new Error('Invalid cursor');
+    }
+    const items = [];
+    let doc = position ? position.d + 1 : 0;
+
+    for (; doc < this.products.length && items.length < limit; doc++) {
+      if (this.products[doc]) items.push(this.products[doc]);
+    }
+
+    let hasMore = false;
+    for (let next = doc; next < this.products.length; next++) {
+      if (this.products[next]) {
+        hasMore = true;
+        break;
+      }
+    }
+
+    return {
+      items,
+      total: this.liveCount,
+      nextCursor: hasMore ? encodeCursor({ d: doc - 1 }) : null
+    };
+  }
+
+  /**
+   * Ranked search; every query term must match
+   * @param {string} query - Free-text query
+   * @param {Object} options - Paging options
+   * @param {number} options.limit - Page size
+   * @param {string} options.cursor - Cursor from the previous page
+   * @returns {{ items: Object[], total: number, nextCursor: string|null }} Page
+   */
+  search(query, { limit = DEFAULT_PAGE_SIZE, cursor } = {}) {
+    const position = decodeCursor(cursor);
+    if (position && !(Number.isFinite(position.s)
+      && (typeof position.i === 'string' || Number.isFinite(position.i)))) {
+      throw new Error('Invalid cursor');
+    }
+    const terms = [...new Set(tokenize(query))].slice(0, MAX_QUERY_TERMS);
+    if (terms.length === 0) return { items: [], total: 0, nextCursor: null };
+
+    // Expand each term to matching vocabulary tokens; rarest term first
+    const expanded = terms
+      .map(term => this.expandTerm(term))
+      .map(tokens => ({ tokens, cost: tokens.reduce((sum, [postings]) => sum + postings.length, 0) }))
+      .sort((a, b) => a.cost - b.cost);
+
+    if (expanded[0].tokens.length === 0) return { items: [], total: 0, nextCursor: null };
+
+    const stamp = this.nextStamp();
+    const { scores, matched, stamps, docVersions } = this;
+    const candidates = [];
+
+    expanded.forEach(({ tokens }, termIndex) => {
+      for (const [postings, factor] of tokens) {
+        const { docs, versions, weights } = postings;
+        for (let i = 0; i < postings.length; i++) {
+          const doc = docs[i];
+          if (versions[i] !== docVersions[doc]) continue;
+
+          if (termIndex === 0) {
+            if (stamps[doc] !== stamp) {
+              stamps[doc] = stamp;
+              matched[doc] = 1;
+              scores[doc] = 0;
+              candidates.push(doc);
+            }
+          } else if (stamps[doc] !== stamp || matched[doc] < termIndex) {
+            continue;
+          } else if (matched[doc] === termIndex) {
+            matched[doc] = termIndex + 1;
+          }
+          scores[doc] += weights[i] * factor;
+        }
+      }
+    });
+
+    // Bounded top-k after the cursor: (score desc, product id asc)
+    const required = expanded.length;
+    const page = [];
+    let total = 0;
+
+    for (const doc of candidates) {
+      if (matched[doc] !== required) continue;
+      total++;
+
+      const score = scores[doc];
+      const productId = this.products[doc][this.idField];
+      if (position && (score > position.s || (score === position.s && compareIds(productId, position.i) <= 0))) {
+        continue;
+      }
+      if (page.length > limit) {
+        const worst = page[page.length - 1];
+        if (score < worst.score || (score === worst.score && compareIds(productId, worst.productId) > 0)) continue;
+      }
+
+      let at = page.length;
+      while (at > 0) {
+        const other = page[at - 1];
+        if (other.score > score || (other.score === score && compareIds(other.productId, productId) < 0)) break;
+        at--;
+      }
+      page.splice(at, 0, { doc, score, productId });
+      if (page.length > limit + 1) page.pop();
+    }
+
+    const hasMore = page.length > limit;
+    const items = page.slice(0, limit);
+    const last = items[items.length - 1];
+
+    return {
+      items: items.map(({ doc }) => this.products[doc]),
+      total,
+      nextCursor: hasMore ? encodeCursor({ s: last.score, i: last.productId }) : null
+    };
+  }
+
+  // Internal helpers
+
+  weighTokens(product) {
+    const weights = new Map();
+    for (const [field, fieldWeight] of Object.entries(this.fieldWeights)) {
+      for (const token of tokenize(product[field])) {
+        weights.set(token, (weights.get(token) || 0) + fieldWeight);
+      }
+    }
+    return weights;
+  }
+
+  /**
+   * Tombstone a doc's current postings and update live counts
+   */
+  retire(doc) {
+    for (const token of this.weighTokens(this.products[doc]).keys()) {
+      const postings = this.postings.get(token);
+      if (!postings) continue;
+      postings.live--;
+      if (postings.live === 0) {
+        this.postings.delete(token);
+        this.removeFromVocabulary(token);
+      } else if (postings.live * 2 < postings.length) {
+        // Compact once tombstones outnumber live entries
+        this.docVersions[doc]++;
+        postings.compact(this.docVersions);
+        this.docVersions[doc]--;
+      }
+    }
+    this.docVersions[doc]++;
+  }
+
+  /**
+   * Vocabulary tokens matching a query term, with their ranking factor
+   * @returns {Array<[Postings, number]>} Postings and weight multipliers
+   */
+  expandTerm(term) {
+    const matches = new Map();
+    const consider = (token, kind) => {
+      const factor = MATCH_WEIGHTS[kind] * this.idf(token);
+      if (!matches.has(token) || matches.get(token) < factor) matches.set(token, factor);
+    };
+
+    if (this.postings.has(term)) consider(term, 'exact');
+
+    if (term.length <= SHORT_PREFIX_LENGTH) {
+      for (const token of this.prefixTokens.get(term) || []) {
+        if (token !== term) consider(token, 'prefix');
+      }
+    } else {
+      // Intersect via the rarest trigram, then verify the substring
+      let smallest = null;
+      for (const gram of trigrams(term)) {
+        const tokens = this.trigramTokens.get(gram);
+        if (!tokens) return [];
+        if (!smallest || tokens.size < smallest.size) smallest = tokens;
+      }
+      for (const token of smallest) {
+        if (token === term || !token.includes(term)) continue;
+        consider(token, token.startsWith(term) ? 'prefix' : 'substring');
+      }
+    }
+
+    return [...matches].map(([token, factor]) => [this.postings.get(token), factor]);
+  }
+
+  idf(token) {
+    const postings = this.postings.get(token);
+    return Math.log(1 + this.liveCount / Math.max(1, postings ? postings.live : 1));
+  }
+
+  addToVocabulary(token) {
+    for (let length = 1; length <= Math.min(SHORT_PREFIX_LENGTH, token.length); length++) {
+      const prefix = token.slice(0, length);
+      if (!this.prefixTokens.has(prefix)) this.prefixTokens.set(prefix, new Set());
+      this.prefixTokens.get(prefix).add(token);
+    }
+    for (const gram of trigrams(token)) {
+      if (!this.trigramTokens.has(gram)) this.trigramTokens.set(gram, new Set());
+      this.trigramTokens.get(gram).add(token);
+    }
+  }
+
+  removeFromVocabulary(token) {
+    for (let length = 1; length <= Math.min(SHORT_PREFIX_LENGTH, token.length); length++) {
+      const prefix = token.slice(0, length);
+      const tokens = this.prefixTokens.get(prefix);
+      if (tokens && tokens.delete(token) && tokens.size === 0) this.prefixTokens.delete(prefix);
+    }
+    for (const gram of trigrams(token)) {
+      const tokens = this.trigramTokens.get(gram);
+      if (tokens && tokens.delete(token) && tokens.size === 0) this.trigramTokens.delete(gram);
+    }
+  }
+
+  ensureCapacity(docCount) {
+    if (docCount <= this.docVersions.length) return;
+    let capacity = this.docVersions.length;
+    while (capacity < docCount) capacity *= 2;
+
+    const grow = (array, Type) => {
+      const next = new Type(capacity);
+      next.set(array);
+      return next;
+    };
+    this.docVersions = grow(this.docVersions, Uint32Array);
+    this.scores = new Float32Array(capacity);
+    this.matched = new Uint8Array(capacity);
+    this.stamps = grow(this.stamps, Uint32Array);
+  }
+
+  nextStamp() {
+    this.searchStamp++;
+    if (this.searchStamp === 0xffffffff) {
+      this.stamps.fill(0);
+      this.searchStamp = 1;
+    }
+    return this.searchStamp;
+  }
+}
+
+export default ProductSearchIndex;
@@ -0,0 +1,214 @@
+import fs from 'fs';
+import path from 'path';
+import v8 from 'v8';
+import { Session } from 'inspector';
+
+// On-demand diagnostics for a running server: a sampling CPU profile,
+// taken through the inspector's Profiler domain (the same .cpuprofile
+// format as node --cpu-prof, opened by Chrome DevTools or speedscope), and
+// V8 heap snapshots. Artifacts are written to logs/profiles/ and the
+// oldest are pruned past PROFILE_KEEP. A CPU profile that is never stopped
+// ends by itself after CPU_PROFILE_MAX_MS.
+// Under cluster.js each worker profiles itself: control requests act on
+// the worker that owns the connection, so a client should keep one
+// keep-alive connection for start and stop.
+
+export const PROFILE_DIR = path.join(process.cwd(), 'logs', 'profiles');
+const MAX_CPU_PROFILE = Number(process.env.CPU_PROFILE_MAX_MS) || 10 * 60 * 1000; // 10 minutes
+const KEEP_ARTIFACTS = Number(process.env.PROFILE_KEEP) || 20;
+const DEFAULT_SAMPLING_INTERVAL = 1000; // microseconds, V8's default
+const ARTIFACT_NAME = /^(cpu|heap)-[\w.-]+\.(cpuprofile|heapsnapshot)$/;
+
+/**
+ * Raised for profiling requests that conflict with the profiler's state
+ */
+export class ProfilerError extends Error {
+  constructor(message, status = 409) {
+    super(message);
+    this.name = 'ProfilerError';
+    this.status = status;
+  }
+}
+
+/**
+ * Create a profiler for this process
+ * @param {Object} options - Profiler options
+ * @param {string} options.directory - Where artifacts are written
+ * @param {number} options.maxDuration - Longest CPU profile (ms)
+ * @param {number} options.keep - Artifacts kept on disk
+ * @returns {Object} Profiler with startCpuProfile(), stopCpuProfile(), heapSnapshot(), listArtifacts() and artifactPath()
+ */
+export function createProfiler({
+  directory = PROFILE_DIR,
+  maxDuration = MAX_CPU_PROFILE,
+  keep = KEEP_ARTIFACTS
+} = {}) {
+  let session = null;
+  let active = null;
+
+  const post = (method, params = {}) => new Promise((resolve, reject) => {
+    session.post(method, params, (error, result) => (error ? reject(error) : resolve(result)));
+  });
+
+  // cpu-2026-10-19T10-00-00-000Z-1234-login.cpuprofile
+  const artifactName = (kind, label, extension) => {
+    const stamp = new Date().toISOString().replace(/[:.]/g, '-');
+    return `${kind}-${stamp}-${process.pid}${label ? `-${label}` : ''}.${extension}`;
+  };
+  const cleanLabel = label => String(label || '').replace(/[^\w-]/g, '_').slice(0, 40);
+
+  async function listArtifacts() {
+    let names;
+    try {
+      names = await fs.promises.readdir(directory);
+    } catch (error) {
+      if (error.code === 'ENOENT') return [];
+      throw error;
+    }
+    const artifacts = await Promise.all(names.filter(name => ARTIFACT_NAME.test(name)).map(async (name) => {
+      const stats = await fs.promises.stat(path.join(directory, name));
+      return { name, bytes: stats.size, createdAt: stats.mtime.toISOString() };
+    }));
+    return artifacts.sort((a, b) => a.createdAt.localeCompare(b.createdAt));
+  }
+
+  async function prune() {
+    try {
+      const artifacts = await listArtifacts();
+      for (const artifact of artifacts.slice(0, Math.max(0, artifacts.length - keep))) {
+        await fs.promises.rm(path.join(directory, artifact.name), { force: true });
+      }
+    } catch (error) {
+      console.warn('Warning: Could not prune profiling artifacts:', error.message);
+    }
+  }
+
+  /**
+   * Start sampling the CPU
+   * @param {Object} options - Profile options
+   * @param {string} options.label - Added to the artifact name (e.g. the load phase)
+   * @param {number} options.samplingInterval - Microseconds between samples
+   * @returns {Promise<Object>} { pid, label, startedAt, samplingInterval }
+   */
+  async function startCpuProfile({ label, samplingInterval = DEFAULT_SAMPLING_INTERVAL } = {}) {
+    if (active) {
+      throw new ProfilerError('A CPU profile is already running');
+    }
+    const interval = Math.round(Number(samplingInterval));
+    if (!(interval >= 10 && interval <= 1000000)) {
+      throw new ProfilerError('samplingInterval must be between 10 and 1000000 microseconds', 400);
+    }
+
+    // Claimed before the first await, so concurrent starts fail fast
+    const run = { label: cleanLabel(label), startedAt: Date.now(), running: false, timer: null };
+    active = run;
+    try {
+      if (!session) {
+        session = new Session();
+        session.connect();
+      }
+      await post('Profiler.enable');
+      await post('Profiler.setSamplingInterval', { interval });
+      await post('Profiler.start');
+    } catch (error) {
+      active = null;
+      throw error;
+    }
+    run.running = true;
+
+    // A forgotten profile must not sample (and grow) forever
+    run.timer = setTimeout(() => {
+      stopCpuProfile()
+        .then(artifact => console.warn(`⚠️ CPU profile stopped after ${maxDuration}ms: ${artifact.name}`))
+        .catch(error => console.warn('Warning: Could not stop CPU profile:', error.message));
+    }, maxDuration);
+    run.timer.unref?.();
+
+    console.log(`🔬 CPU profile started (pid ${process.pid}${run.label ? `, ${run.label}` : ''})`);
+    return { pid: process.pid, label: run.label, startedAt: new Date(run.startedAt).toISOString(), samplingInterval: interval };
+  }
+
+  /**
+   * Stop the running CPU profile and write it to disk
+   * @returns {Promise<Object>} { name, bytes, duration, samples, pid }
+   */
+  async function stopCpuProfile() {
+    if (!active || !active.running) {
+      throw new ProfilerError(active ? 'The CPU profile is still starting' : 'No CPU profile is running');
+    }
+    const run = active;
+    active = null;
+    clearTimeout(run.timer);
+
+    const { profile } = await post('Profiler.stop');
+    await post('Profiler.disable');
+    const name = artifactName('cpu', run.label, 'cpuprofile');
+    const data = JSON.stringify(profile);
+    await fs.promises.mkdir(directory, { recursive: true });
+    await fs.promises.writeFile(path.join(directory, name), data);
+    await prune();
+
+    console.log(`🔬 CPU profile saved: ${name}`);
+    return {
+      name,
+      bytes: Buffer.byteLength(data),
+      duration: Date.now() - run.startedAt,
+      samples: profile.samples?.length || 0,
+      pid: process.pid
+    };
+  }
+
+  /**
+   * Write a V8 heap snapshot. The process pauses while the heap is written
+   * (roughly a second per 100 MB of heap).
+   * @param {Object} options - Snapshot options
+   * @param {string} options.label - Added to the artifact name
+   * @returns {Promise<Object>} { name, bytes, duration, pid }
+   */
+  async function heapSnapshot({ label } = {}) {
+    const name = artifactName('heap', cleanLabel(label), 'heapsnapshot');
+    const started = Date.now();
+    await fs.promises.mkdir(directory, { recursive: true });
+    v8.writeHeapSnapshot(path.join(directory, name));
+    const { size } = await fs.promises.stat(path.join(directory, name));
+    await prune();
+
+    console.log(`🔬 Heap snapshot saved: ${name}`);
+    return { name, bytes: size, duration: Date.now() - started, pid: process.pid };
+  }
+
+  return {
+    startCpuProfile,
+    stopCpuProfile,
+    heapSnapshot,
+    listArtifacts,
+
+    /**
+     * Absolute path of an artifact, or null for names that are not artifacts
+     * @param {string} name - Artifact file name
+     * @returns {string|null} Path inside the profile directory
+     */
+    artifactPath(name) {
+      return ARTIFACT_NAME.test(name) ? path.join(directory, name) : null;
+    },
+
+    getStatus() {
+      return {
+        pid: process.pid,
+        cpuProfile: active
+          ? { label: active.label, startedAt: new Date(active.startedAt).toISOString(), running: active.running }
+          : null
+      };
+    }
+  };
+}
+
+// Shared profiler for the admin profiling routes
+export const profiler = createProfiler();
+
+export default {
+  PROFILE_DIR,
+  ProfilerError,
+  createProfiler,
+  profiler
+};
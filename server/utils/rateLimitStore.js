@@ -0,0 +1,527 @@
+import cluster from 'cluster';
+
+// Shared store for express-rate-limit.
+//
+// A single process counts locally. Under cluster mode every worker batches its
+// increments to the primary over the IPC channel, and the primary owns the
+// host-wide counters (or forwards the batches to a remote adapter such as
+// Redis for multi-node deployments). With each reply the primary grants the
+// worker a lease: a share of the key's remaining headroom that the worker may
+// spend without asking again. Outstanding leases never exceed the limit, so a
+// limit check only waits for a round trip on the first hit of a window or
+// once the worker's lease is used up.
+
+const MESSAGE_TYPE = 'nextbuy:rate-limit';
+const PRUNE_INTERVAL = 60 * 1000; // 1 minute
+
+/**
+ * @typedef {Object} RateLimitResult
+ * @property {number} totalHits - Estimated hits in the sliding window
+ * @property {number} resetTime - Epoch ms at which the current window ends
+ */
+
+/**
+ * @typedef {Object} RemoteRateLimitAdapter
+ * @property {(windowMs: number, entries: Array<[string, number]>) => Promise<RateLimitResult[]>} incrementBatch
+ *   Apply [key, delta] pairs and return the updated count for each, in order
+ * @property {(windowMs: number, key: string) => Promise<void>} resetKey - Forget a key
+ */
+
+/**
+ * Sliding-window counter: weighted sum of the previous and current fixed windows
+ */
+export class SlidingWindowCounter {
+  constructor(windowMs) {
+    this.windowMs = windowMs;
+    this.entries = new Map();
+  }
+
+  /**
+   * Add `delta` hits to a key
+   * @param {string} key - Counter key
+   * @param {number} delta - Hits to add (negative to undo)
+   * @param {number} now - Current time in ms
+   * @returns {RateLimitResult} Updated estimate
+   */
+  increment(key, delta, now = Date.now()) {
+    const windowStart = now - (now % this.windowMs);
+    let entry = this.entries.get(key);
+
+    if (!entry) {
+      entry = { windowStart, current: 0, previous: 0 };
+      this.entries.set(key, entry);
+    } else if (entry.windowStart !== windowStart) {
+      entry.previous = windowStart - entry.windowStart === this.windowMs ? entry.current : 0;
+      entry.current = 0;
+      entry.windowStart = windowStart;
+    }
+
+    entry.current = Math.max(0, entry.current + delta);
+
+    const weight = 1 - (now - windowStart) / this.windowMs;
+    return {
+      totalHits: Math.floor(entry.previous * weight) + entry.current,
+      resetTime: windowStart + this.windowMs
+    };
+  }
+
+  reset(key) {
+    this.entries.delete(key);
+  }
+
+  resetAll() {
+    this.entries.clear();
+  }
+
+  /**
+   * Drop keys that no longer contribute to any window
+   * @param {number} now - Current time in ms
+   */
+  prune(now = Date.now()) {
+    const cutoff = now - 2 * this.windowMs;
+    for (const [key, entry] of this.entries) {
+      if (entry.windowStart <= cutoff) this.entries.delete(key);
+    }
+  }
+}
+
+// Counters owned by this process, one per window length
+const localCounters = new Map();
+// Primary only: key -> { resetTime, grants: Map(workerId -> lease) }
+const leases = new Map();
+let remoteAdapter = null;
+let ipcTransport = null;
+
+function getLocalCounter(windowMs) {
+  let counter = localCounters.get(windowMs);
+  if (!counter) {
+    counter = new SlidingWindowCounter(windowMs);
+    localCounters.set(windowMs, counter);
+  }
+  return counter;
+}
+
+setInterval(() => {
+  const now = Date.now();
+  for (const counter of localCounters.values()) counter.prune(now);
+  for (const [key, lease] of leases) {
+    if (lease.resetTime <= now) leases.delete(key);
+  }
+}, PRUNE_INTERVAL).unref();
+
+/**
+ * Apply a batch against the counters owned by this process (local or remote)
+ * @param {number} windowMs - Window length
+ * @param {Array<[string, number]>} entries - [key, delta] pairs
+ * @returns {Promise<RateLimitResult[]>|RateLimitResult[]} Results in entry order
+ */
+function applyBatch(windowMs, entries) {
+  if (remoteAdapter) {
+    return remoteAdapter.incrementBatch(windowMs, entries);
+  }
+  const counter = getLocalCounter(windowMs);
+  const now = Date.now();
+  return entries.map(([key, delta]) => counter.increment(key, delta, now));
+}
+
+function resetOwnedKey(windowMs, key) {
+  if (remoteAdapter) {
+    return remoteAdapter.resetKey(windowMs, key);
+  }
+  getLocalCounter(windowMs).reset(key);
+}
+
+/**
+ * Use a remote adapter (e.g. Redis) for counters owned by this process.
+ * Call this in the primary (or the only) process.
+ * @param {RemoteRateLimitAdapter|null} adapter - Adapter, or null to count locally
+ */
+export function setRemoteRateLimitAdapter(adapter) {
+  remoteAdapter = adapter;
+}
+
+/**
+ * Grant a worker its share of a key's remaining headroom
+ * @param {string} key - Counter key
+ * @param {number} workerId - Requesting worker
+ * @param {RateLimitResult} result - Count after applying the worker's batch
+ * @param {number} limit - Limiter maximum (0 when dynamic)
+ * @param {number} workerCount - Live workers sharing the key
+ * @returns {[number, number]} Hits including other workers' reservations, and the new lease
+ */
+function grantLease(key, workerId, result, limit, workerCount) {
+  let lease = leases.get(key);
+  if (!lease || lease.resetTime !== result.resetTime) {
+    lease = { resetTime: result.resetTime, grants: new Map() };
+    leases.set(key, lease);
+  }
+  // The worker's previous lease is settled by the batch it just sent
+  lease.grants.delete(workerId);
+
+  // Headroom leased to other workers counts as already spent, so requests
+  // judged against this total can't overrun hits those workers answer locally
+  let outstanding = 0;
+  for (const grant of lease.grants.values()) outstanding += grant;
+  const reserved = result.totalHits + outstanding;
+  if (!limit) return [reserved, 0];
+
+  const grant = Math.max(0, Math.floor((limit - reserved) / workerCount));
+  if (grant > 0) lease.grants.set(workerId, grant);
+  return [reserved, grant];
+}
+
+/**
+ * Serve rate-limit batches from cluster workers. Call once in the primary.
+ * @param {import('cluster').Cluster} clusterInstance - Node cluster module
+ */
+export function attachRateLimitPrimary(clusterInstance = cluster) {
+  clusterInstance.on('message', async (worker, message) => {
+    if (!message || message.type !== MESSAGE_TYPE) return;
+
+    if (message.op === 'reset') {
+      try {
+        await resetOwnedKey(message.windowMs, message.key);
+      } catch (error) {
+        console.warn('Rate limit reset failed:', error.message);
+      }
+      return;
+    }
+
+    if (message.op !== 'batch') return;
+
+    let results;
+    try {
+      results = await applyBatch(message.windowMs, message.entries);
+    } catch (error) {
+      console.warn('Rate limit batch failed, counting locally:', error.message);
+      const counter = getLocalCounter(message.windowMs);
+      results = message.entries.map(([key, delta]) => counter.increment(key, delta));
+    }
+
+    const workerCount = Math.max(1, Object.keys(clusterInstance.workers || {}).length);
+
+    if (worker.isConnected()) {
+      worker.send({
+        type: MESSAGE_TYPE,
+        op: 'result',
+        id: message.id,
+        results: results.map((result, index) => {
+          const [reserved, grant] = grantLease(message.entries[index][0], worker.id, result, message.limit, workerCount);
+          return [reserved, result.resetTime, grant];
+        })
+      });
+    }
+  });
+
+  // A departed worker's unused leases go back to the pool
+  clusterInstance.on('exit', (worker) => {
+    for (const lease of leases.values()) lease.grants.delete(worker.id);
+  });
+}
+
+/**
+ * Worker side of the IPC channel, shared by every store in the process
+ */
+class IpcTransport {
+  constructor() {
+    this.nextId = 1;
+    this.pending = new Map();
+    process.on('message', (message) => {
+      if (!message || message.type !== MESSAGE_TYPE || message.op !== 'result') return;
+      const request = this.pending.get(message.id);
+      if (!request) return;
+      this.pending.delete(message.id);
+      clearTimeout(request.timer);
+      request.resolve(message.results.map(([totalHits, resetTime, lease]) => ({ totalHits, resetTime, lease })));
+    });
+  }
+
+  incrementBatch(windowMs, limit, entries, timeoutMs) {
+    return new Promise((resolve, reject) => {
+      const id = this.nextId++;
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`no reply from primary within ${timeoutMs}ms`));
+      }, timeoutMs);
+      timer.unref();
+      this.pending.set(id, { resolve, timer });
+      process.send({ type: MESSAGE_TYPE, op: 'batch', id, windowMs, limit, entries });
+    });
+  }
+
+  resetKey(windowMs, key) {
+    process.send({ type: MESSAGE_TYPE, op: 'reset', windowMs, key });
+  }
+}
+
+function getIpcTransport() {
+  if (!ipcTransport) ipcTransport = new IpcTransport();
+  return ipcTransport;
+}
+
+/**
+ * express-rate-limit store shared across cluster workers
+ */
+export class SharedRateLimitStore {
+  /**
+   * @param {Object} options - Store options
+   * @param {string} options.prefix - Namespace for this limiter's keys
+   * @param {number} options.flushIntervalMs - Longest a local hit waits before being sent
+   * @param {number} options.maxBatch - Keys per batch that trigger an immediate flush
+   * @param {number} options.syncTimeoutMs - Wait for the primary before falling back to local counting
+   */
+  constructor({ prefix, flushIntervalMs = 25, maxBatch = 256, syncTimeoutMs = 1000 } = {}) {
+    this.prefix = prefix ? `${prefix}:` : '';
+    this.flushIntervalMs = flushIntervalMs;
+    this.maxBatch = maxBatch;
+    this.syncTimeoutMs = syncTimeoutMs;
+    this.localKeys = false;
+
+    this.windowMs = 60 * 1000;
+    this.limit = 0;
+    this.clustered = cluster.isWorker && typeof process.send === 'function';
+
+    // Worker-side estimates: key -> { hits, lease, used, inFlight, pending, resetTime }
+    this.cache = new Map();
+    this.dirty = new Set();
+    this.waiters = new Map();
+    this.flushTimer = null;
+    this.urgentFlush = false;
+  }
+
+  /**
+   * Called by express-rate-limit with the limiter's options
+   * @param {Object} options - Limiter options
+   */
+  init(options) {
+    this.windowMs = options.windowMs;
+    const limit = options.limit ?? options.max;
+    // A dynamic limit can't be leased, so every hit syncs
+    this.limit = typeof limit === 'number' ? limit : 0;
+  }
+
+  async get(key) {
+    const entry = this.cache.get(this.prefix + key);
+    if (!entry) return undefined;
+    return {
+      totalHits: entry.hits + entry.inFlight + entry.pending,
+      resetTime: new Date(entry.resetTime)
+    };
+  }
+
+  increment(key) {
+    const fullKey = this.prefix + key;
+
+    if (!this.clustered) {
+      return this.fromOwned(fullKey, 1);
+    }
+
+    const now = Date.now();
+    let entry = this.cache.get(fullKey);
+    if (!entry || (now >= entry.resetTime && entry.inFlight === 0)) {
+      // Unsent hits from the previous window still count towards the sliding estimate
+      const pending = entry ? entry.pending : 0;
+      entry = { hits: 0, lease: 0, used: pending, inFlight: 0, pending, resetTime: 0 };
+      this.cache.set(fullKey, entry);
+    }
+
+    entry.pending++;
+    entry.used++;
+    this.dirty.add(fullKey);
+
+    const estimate = entry.hits + entry.inFlight + entry.pending;
+    const unknown = entry.resetTime === 0 || now >= entry.resetTime;
+
+    if (unknown || entry.used > entry.lease) {
+      // First hit of a window or lease spent: wait for the host-wide count
+      return new Promise((resolve) => {
+        if (!this.waiters.has(fullKey)) this.waiters.set(fullKey, []);
+        this.waiters.get(fullKey).push(resolve);
+        this.scheduleFlush(true);
+      });
+    }
+
+    this.scheduleFlush(this.dirty.size >= this.maxBatch);
+    return { totalHits: estimate, resetTime: new Date(entry.resetTime) };
+  }
+
+  decrement(key) {
+    const fullKey = this.prefix + key;
+
+    if (!this.clustered) {
+      this.fromOwned(fullKey, -1);
+      return;
+    }
+
+    const entry = this.cache.get(fullKey);
+    if (!entry) return;
+    entry.pending--;
+    entry.used--;
+    this.dirty.add(fullKey);
+    this.scheduleFlush(false);
+  }
+
+  async resetKey(key) {
+    const fullKey = this.prefix + key;
+    this.cache.delete(fullKey);
+    this.dirty.delete(fullKey);
+
+    if (this.clustered) {
+      getIpcTransport().resetKey(this.windowMs, fullKey);
+    } else {
+      await resetOwnedKey(this.windowMs, fullKey);
+    }
+  }
+
+  async resetAll() {
+    this.cache.clear();
+    this.dirty.clear();
+  }
+
+  /**
+   * Count against the counters owned by this process
+   */
+  fromOwned(fullKey, delta) {
+    if (!remoteAdapter) {
+      const result = getLocalCounter(this.windowMs).increment(fullKey, delta);
+      return { totalHits: result.totalHits, resetTime: new Date(result.resetTime) };
+    }
+    return remoteAdapter.incrementBatch(this.windowMs, [[fullKey, delta]])
+      .then(([result]) => ({ totalHits: result.totalHits, resetTime: new Date(result.resetTime) }));
+  }
+
+  scheduleFlush(urgent) {
+    if (urgent && !this.urgentFlush) {
+      this.urgentFlush = true;
+      // setImmediate lets every request parsed in this tick join the batch
+      setImmediate(() => this.flush());
+      return;
+    }
+    if (!this.flushTimer) {
+      this.flushTimer = setTimeout(() => this.flush(), this.flushIntervalMs);
+      this.flushTimer.unref();
+    }
+  }
+
+  flush() {
+    this.urgentFlush = false;
+    if (this.flushTimer) {
+      clearTimeout(this.flushTimer);
+      this.flushTimer = null;
+    }
+    if (this.dirty.size === 0) return;
+
+    const keys = [];
+    const entries = [];
+    const waiters = [];
+    for (const fullKey of this.dirty) {
+      const entry = this.cache.get(fullKey);
+      if (!entry) continue;
+      keys.push(fullKey);
+      entries.push([fullKey, entry.pending]);
+      entry.inFlight += entry.pending;
+      entry.pending = 0;
+      waiters.push(this.waiters.get(fullKey) || null);
+      this.waiters.delete(fullKey);
+    }
+    this.dirty.clear();
+
+    const settle = (results) => {
+      keys.forEach((fullKey, index) => {
+        const entry = this.cache.get(fullKey);
+        const sent = entries[index][1];
+        if (entry) {
+          entry.inFlight -= sent;
+          if (results) {
+            entry.hits = results[index].totalHits;
+            entry.resetTime = results[index].resetTime;
+            entry.lease = results[index].lease;
+            // Hits made after this batch left draw on the new lease
+            entry.used = entry.inFlight + entry.pending;
+          } else {
+            entry.hits += sent;
+          }
+        }
+        const resolveList = waiters[index];
+        if (resolveList) {
+          const totalHits = entry ? entry.hits + entry.inFlight + entry.pending : sent;
+          const resetTime = new Date(entry && entry.resetTime ? entry.resetTime : Date.now() + this.windowMs);
+          resolveList.forEach(resolve => resolve({ totalHits, resetTime }));
+        }
+      });
+    };
+
+    getIpcTransport()
+      .incrementBatch(this.windowMs, this.limit, entries, this.syncTimeoutMs)
+      .then(settle)
+      .catch((error) => {
+        // No primary is serving the channel: keep limiting with per-process counts
+        console.warn(`Rate limit store "${this.prefix}" falling back to local counting:`, error.message);
+        this.clustered = false;
+        settle(null);
+        for (const [fullKey, entry] of this.cache) {
+          getLocalCounter(this.windowMs).increment(fullKey, entry.hits + entry.pending);
+        }
+        this.cache.clear();
+      });
+  }
+}
+
+/**
+ * Remote adapter backed by a node-redis v4+ client. Counts are kept in two
+ * fixed-window keys per client so the sliding estimate matches the local store.
+ * @param {Object} client - Connected redis client
+ * @param {Object} options - Adapter options
+ * @param {string} options.prefix - Key prefix in Redis
+ * @returns {RemoteRateLimitAdapter} Adapter
+ */
+export function createRedisRateLimitAdapter(client, { prefix = 'nextbuy:rl:' } = {}) {
+  return {
+    async incrementBatch(windowMs, entries) {
+      const now = Date.now();
+      const windowStart = now - (now % windowMs);
+      const windowIndex = windowStart / windowMs;
+      const multi = client.multi();
+
+      for (const [key, delta] of entries) {
+        const current = `${prefix}${key}:${windowIndex}`;
+        multi.incrBy(current, delta);
+        multi.pExpire(current, 2 * windowMs);
+        multi.get(`${prefix}${key}:${windowIndex - 1}`);
+      }
+
+      const replies = await multi.exec();
+      const weight = 1 - (now - windowStart) / windowMs;
+
+      return entries.map((_, index) => {
+        const current = Math.max(0, Number(replies[index * 3]));
+        const previous = Number(replies[index * 3 + 2] || 0);
+        return {
+          totalHits: Math.floor(previous * weight) + current,
+          resetTime: windowStart + windowMs
+        };
+      });
+    },
+
+    async resetKey(windowMs, key) {
+      const windowIndex = Math.floor(Date.now() / windowMs);
+      await client.del([`${prefix}${key}:${windowIndex}`, `${prefix}${key}:${windowIndex - 1}`]);
+    }
+  };
+}
+
+/**
+ * Connect to Redis and use it for the counters owned by this process
+ * @param {string} url - Redis connection URL
+ * @returns {Promise<Object>} Connected redis client
+ */
+export async function connectRedisRateLimitAdapter(url) {
+  const { createClient } = await import('redis');
+  const client = createClient({ url });
+  client.on('error', (error) => console.warn('Redis rate limit store error:', error.message));
+  await client.connect();
+  setRemoteRateLimitAdapter(createRedisRateLimitAdapter(client));
+  return client;
+}
+
+export default SharedRateLimitStore;
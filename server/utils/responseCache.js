@@ -0,0 +1,145 @@
+import crypto from 'crypto';
+import zlib from 'zlib';
+
+// Cache of pre-serialized JSON responses. Each entry is serialized once per
+// source version and compressed lazily, once per encoding; requests then cost
+// a buffer write. ETags are content hashes, so every cluster worker produces
+// the same tag for the same body and If-None-Match revalidation works behind
+// a load balancer. Each content-coding gets its own strong tag ("<hash>",
+// "<hash>-br", "<hash>-gz"), as RFC 9110 requires.
+
+const DEFAULT_MAX_ENTRIES = 500;
+const MIN_COMPRESS_BYTES = 1024; // smaller bodies aren't worth the CPU
+const CACHE_CONTROL = 'no-cache'; // clients may store, but must revalidate (bot checks run per request)
+
+const ENCODERS = {
+  br: body => zlib.brotliCompressSync(body, {
+    params: {
+      [zlib.constants.BROTLI_PARAM_QUALITY]: 9,
+      [zlib.constants.BROTLI_PARAM_SIZE_HINT]: body.length
+    }
+  }),
+  gzip: body => zlib.gzipSync(body, { level: 9 })
+};
+const ETAG_SUFFIXES = { br: '-br', gzip: '-gz' };
+
+/**
+ * Pick the best encoding the client accepts
+ * @param {string} acceptEncoding - Accept-Encoding header
+ * @returns {string|null} 'br', 'gzip' or null for identity
+ */
+export function negotiateEncoding(acceptEncoding) {
+  if (!acceptEncoding) return null;
+  const accepted = new Set();
+  for (const part of String(acceptEncoding).split(',')) {
+    const [name, ...params] = part.trim().toLowerCase().split(';');
+    const q = params.find(param => param.trim().startsWith('q='));
+    if (q && parseFloat(q.trim().slice(2)) === 0) continue;
+    accepted.add(name.trim());
+  }
+  if (accepted.has('br')) return 'br';
+  if (accepted.has('gzip') || accepted.has('*')) return 'gzip';
+  return null;
+}
+
+// Weak comparison against every representation of the entry: they share one payload
+function etagMatches(ifNoneMatch, etags) {
+  if (!ifNoneMatch) return false;
+  if (ifNoneMatch.trim() === '*') return true;
+  return ifNoneMatch.split(',').some(tag => etags.includes(tag.trim().replace(/^W\//, '')));
+}
+
+/**
+ * Create a bounded (LRU) response cache
+ * @param {Object} options - Cache options
+ * @param {number} options.maxEntries - Maximum cached responses
+ * @returns {Object} Cache with send() and clear()
+ */
+export function createResponseCache({ maxEntries = DEFAULT_MAX_ENTRIES } = {}) {
+  const entries = new Map();
+  let cachedVersion = null;
+  const stats = { hits: 0, misses: 0, notModified: 0 };
+
+  function lookup(key, version, buildPayload) {
+    // A new source version invalidates everything at once
+    if (version !== cachedVersion) {
+      entries.clear();
+      cachedVersion = version;
+    }
+
+    let entry = entries.get(key);
+    if (entry) {
+      stats.hits++;
+      // Refresh LRU position
+      entries.delete(key);
+      entries.set(key, entry);
+      return entry;
+    }
+
+    stats.misses++;
+    const body = Buffer.from(JSON.stringify(buildPayload()));
+    const hash = crypto.createHash('sha1').update(body).digest('base64url');
+    const etags = { identity: `"${hash}"` };
+    for (const [encoding, suffix] of Object.entries(ETAG_SUFFIXES)) {
+      etags[encoding] = `"${hash}${suffix}"`;
+    }
+    entry = {
+      body,
+      etags,
+      allEtags: Object.values(etags),
+      encoded: {}
+    };
+    entries.set(key, entry);
+    if (entries.size > maxEntries) {
+      entries.delete(entries.keys().next().value);
+    }
+    return entry;
+  }
+
+  /**
+   * Send a cached JSON response, building it on a miss
+   * @param {Object} req - Express request
+   * @param {Object} res - Express response
+   * @param {string} key - Cache key (must identify the payload for a version)
+   * @param {*} version - Source version; a change invalidates the cache
+   * @param {Function} buildPayload - Returns the payload object; may throw
+   */
+  function send(req, res, key, version, buildPayload) {
+    const entry = lookup(key, version, buildPayload);
+    const encoding = entry.body.length >= MIN_COMPRESS_BYTES ? negotiateEncoding(req.headers['accept-encoding']) : null;
+
+    res.set({
+      'ETag': entry.etags[encoding || 'identity'],
+      'Cache-Control': CACHE_CONTROL,
+      'Vary': 'Accept-Encoding'
+    });
+
+    if (etagMatches(req.headers['if-none-match'], entry.allEtags)) {
+      stats.notModified++;
+      return res.status(304).end();
+    }
+
+    let body = entry.body;
+    if (encoding) {
+      if (!entry.encoded[encoding]) {
+        entry.encoded[encoding] = ENCODERS[encoding](entry.body);
+      }
+      body = entry.encoded[encoding];
+      res.set('Content-Encoding', encoding);
+    }
+
+    res.set({
+      'Content-Type': 'application/json; charset=utf-8',
+      'Content-Length': String(body.length)
+    });
+    return res.status(200).end(body);
+  }
+
+  return {
+    send,
+    clear: () => entries.clear(),
+    getStats: () => ({ ...stats, entries: entries.size })
+  };
+}
+
+export default createResponseCache;
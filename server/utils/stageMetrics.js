@@ -0,0 +1,433 @@
+import cluster from 'cluster';
+import { performance, monitorEventLoopDelay } from 'perf_hooks';
+
+// Low-overhead request instrumentation exposed in the Prometheus text format:
+// per-middleware-stage latency histograms, per-route request counters and
+// durations, event-loop lag and heap statistics. Recording a sample is two
+// performance.now() calls and a short bucket scan on a pre-resolved series,
+// so it stays on in production. Under cluster.js the primary collects and
+// sums the series from every worker when one of them is scraped.
+// With SERVER_TIMING=true every response also carries a Server-Timing header
+// with that request's stage durations, for load tools to attribute latency.
+
+const MESSAGE_TYPE = 'nextbuy:stage-metrics';
+const COLLECT_TIMEOUT = 1000; // 1 second for workers to answer a scrape
+const isWorker = cluster.isWorker && typeof process.send === 'function';
+const SERVER_TIMING = process.env.SERVER_TIMING === 'true';
+// Overhead benchmarks switch stages off by name (tests/protectionOverheadBenchmark.js)
+const DISABLED_STAGES = new Set((process.env.DISABLED_STAGES || '').split(',').map(stage => stage.trim()).filter(Boolean));
+const announcedDisabled = new Set();
+
+// Seconds; middleware stages run in microseconds to milliseconds
+const DEFAULT_BUCKETS = [0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5];
+
+const HANDLER_START = Symbol('handlerStart');
+const PENDING_STAGE = Symbol('pendingStage');
+const STAGE_TIMINGS = Symbol('stageTimings');
+
+const metrics = new Map();
+const gaugeReaders = [];
+
+function labelKey(labels) {
+  return Object.values(labels).join('\u0000');
+}
+
+function getMetric(name, type, help) {
+  let metric = metrics.get(name);
+  if (!metric) {
+    metric = { name, type, help, series: new Map() };
+    metrics.set(name, metric);
+  }
+  return metric;
+}
+
+/**
+ * Get (or create) a histogram series
+ * @param {string} name - Metric name
+ * @param {string} help - Help text
+ * @param {Object} labels - Label values
+ * @returns {{ observe: Function }} Series
+ */
+export function histogramSeries(name, help, labels) {
+  const metric = getMetric(name, 'histogram', help);
+  const key = labelKey(labels);
+  let series = metric.series.get(key);
+  if (!series) {
+    const buckets = new Float64Array(DEFAULT_BUCKETS.length);
+    series = {
+      labels,
+      buckets,
+      sum: 0,
+      count: 0,
+      observe(seconds) {
+        for (let i = 0; i < DEFAULT_BUCKETS.length; i++) {
+          if (seconds <= DEFAULT_BUCKETS[i]) {
+            buckets[i]++;
+            break;
+          }
+        }
+        this.sum += seconds;
+        this.count++;
+      }
+    };
+    metric.series.set(key, series);
+  }
+  return series;
+}
+
+/**
+ * Add to a counter series
+ * @param {string} name - Metric name
+ * @param {string} help - Help text
+ * @param {Object} labels - Label values
+ * @param {number} amount - Increment
+ */
+export function incrementCounter(name, help, labels, amount = 1) {
+  const metric = getMetric(name, 'counter', help);
+  const key = labelKey(labels);
+  const series = metric.series.get(key);
+  if (series) {
+    series.value += amount;
+  } else {
+    metric.series.set(key, { labels, value: amount });
+  }
+}
+
+/**
+ * Wrap a middleware so the time until it calls next() (or ends the
+ * response itself) is recorded under its stage name. Needs requestMetrics
+ * mounted first to see stages that answer the request themselves. Stages
+ * named in DISABLED_STAGES are replaced by a pass-through.
+ * @param {string} stage - Stage label
+ * @param {Function} middleware - Express middleware
+ * @returns {Function} Instrumented middleware
+ */
+export function timeStage(stage, middleware) {
+  if (DISABLED_STAGES.has(stage)) {
+    if (!announcedDisabled.has(stage)) {
+      announcedDisabled.add(stage);
+      console.warn(`⚠️ Middleware stage "${stage}" is disabled (DISABLED_STAGES)`);
+    }
+    return function disabledStage(req, res, next) {
+      next();
+    };
+  }
+
+  const help = 'Time spent in each middleware stage';
+  const passed = histogramSeries('nextbuy_stage_duration_seconds', help, { stage, outcome: 'next' });
+  const responded = histogramSeries('nextbuy_stage_duration_seconds', help, { stage, outcome: 'responded' });
+
+  return function instrumented(req, res, next) {
+    const pending = { stage, series: responded, start: performance.now() };
+    req[PENDING_STAGE] = pending;
+
+    return middleware(req, res, (...args) => {
+      if (req[PENDING_STAGE] === pending) {
+        req[PENDING_STAGE] = undefined;
+        const elapsed = performance.now() - pending.start;
+        passed.observe(elapsed / 1000);
+        req[STAGE_TIMINGS]?.push([stage, elapsed]);
+      }
+      next(...args);
+    });
+  };
+}
+
+// Stage names are code-defined tokens, so they need no quoting
+function formatServerTiming(req, start) {
+  const now = performance.now();
+  const entries = req[STAGE_TIMINGS].map(([stage, ms]) => `${stage};dur=${ms.toFixed(3)}`);
+  const pending = req[PENDING_STAGE];
+  if (pending) {
+    entries.push(`${pending.stage};dur=${(now - pending.start).toFixed(3)}`);
+  } else if (req[HANDLER_START] !== undefined) {
+    entries.push(`handler;dur=${(now - req[HANDLER_START]).toFixed(3)}`);
+  }
+  entries.push(`total;dur=${(now - start).toFixed(3)}`);
+  return entries.join(', ');
+}
+
+// Headers are sent by writeHead, so the stage list is finalised there
+function emitServerTiming(req, res, start) {
+  req[STAGE_TIMINGS] = [];
+  const writeHead = res.writeHead;
+  res.writeHead = function writeHeadWithTiming(...args) {
+    if (!res.headersSent) {
+      res.setHeader('Server-Timing', formatServerTiming(req, start));
+    }
+    return writeHead.apply(this, args);
+  };
+}
+
+/**
+ * Count every request by route and status and time the whole request.
+ * Mount first.
+ */
+export function requestMetrics(req, res, next) {
+  const start = performance.now();
+  if (SERVER_TIMING) emitServerTiming(req, res, start);
+
+  res.once('finish', () => {
+    const end = performance.now();
+    // Route templates keep label cardinality bounded
+    const route = req.route ? `${req.baseUrl || ''}${req.route.path}` : 'unmatched';
+
+    incrementCounter('nextbuy_http_requests_total', 'HTTP requests by route and status', {
+      method: req.method,
+      route,
+      status: String(res.statusCode)
+    });
+    histogramSeries('nextbuy_http_request_duration_seconds', 'End-to-end request duration', { route })
+      .observe((end - start) / 1000);
+
+    // A stage that never called next() answered the request itself (blocked, rate limited, ...)
+    const pending = req[PENDING_STAGE];
+    if (pending) {
+      pending.series.observe((end - pending.start) / 1000);
+    } else if (req[HANDLER_START] !== undefined) {
+      histogramSeries('nextbuy_stage_duration_seconds', 'Time spent in each middleware stage', { stage: 'handler', outcome: 'responded' })
+        .observe((end - req[HANDLER_START]) / 1000);
+    }
+  });
+
+  next();
+}
+
+/**
+ * Mark the end of the middleware chain; the rest of the request is
+ * recorded as the "handler" stage
+ */
+export function markHandlerStart(req, res, next) {
+  req[HANDLER_START] = performance.now();
+  next();
+}
+
+/**
+ * Report a gauge read at scrape time (e.g. a queue depth)
+ * @param {string} name - Metric name
+ * @param {string} help - Help text
+ * @param {Object} labels - Label values
+ * @param {Function} read - Returns the current value
+ */
+export function registerGauge(name, help, labels, read) {
+  gaugeReaders.push({ name, help, labels, read });
+}
+
+// Event-loop delay, sampled by libuv timers (percentiles since the last scrape)
+const eventLoopDelay = monitorEventLoopDelay({ resolution: 20 });
+eventLoopDelay.enable();
+
+function collectGauges() {
+  const memory = process.memoryUsage();
+  const labels = isWorker ? { worker: String(cluster.worker.id) } : {};
+  const ns = value => (Number.isFinite(value) ? value / 1e9 : 0);
+  const gauges = [
+    ['nodejs_eventloop_lag_p50_seconds', 'Event loop delay, 50th percentile', ns(eventLoopDelay.percentile(50))],
+    ['nodejs_eventloop_lag_p99_seconds', 'Event loop delay, 99th percentile', ns(eventLoopDelay.percentile(99))],
+    ['nodejs_eventloop_lag_max_seconds', 'Event loop delay, maximum', ns(eventLoopDelay.max)],
+    ['nodejs_eventloop_lag_mean_seconds', 'Event loop delay, mean', ns(eventLoopDelay.mean)],
+    ['nodejs_heap_size_used_bytes', 'V8 heap used', memory.heapUsed],
+    ['nodejs_heap_size_total_bytes', 'V8 heap allocated', memory.heapTotal],
+    ['nodejs_external_memory_bytes', 'Memory used by C++ objects bound to JS', memory.external],
+    ['process_resident_memory_bytes', 'Resident set size', memory.rss]
+  ];
+  eventLoopDelay.reset();
+
+  return gauges.map(([name, help, value]) => ({
+    name,
+    type: 'gauge',
+    help,
+    series: [{ labels, value }]
+  })).concat(registeredGauges(labels));
+}
+
+// Registered gauges, one metric per name with a series per label set
+function registeredGauges(labels) {
+  const byName = new Map();
+  for (const gauge of gaugeReaders) {
+    if (!byName.has(gauge.name)) {
+      byName.set(gauge.name, { name: gauge.name, type: 'gauge', help: gauge.help, series: [] });
+    }
+    byName.get(gauge.name).series.push({ labels: { ...gauge.labels, ...labels }, value: gauge.read() });
+  }
+  return [...byName.values()];
+}
+
+/**
+ * Serializable copy of every series in this process
+ * @returns {Object[]} Metrics
+ */
+export function collectMetrics() {
+  const collected = [...metrics.values()].map(metric => ({
+    name: metric.name,
+    type: metric.type,
+    help: metric.help,
+    series: [...metric.series.values()].map(series => (metric.type === 'histogram'
+      ? { labels: series.labels, buckets: Array.from(series.buckets), sum: series.sum, count: series.count }
+      : { labels: series.labels, value: series.value }))
+  }));
+  return collected.concat(collectGauges());
+}
+
+/**
+ * Sum metrics collected from several processes
+ * @param {Object[][]} sources - collectMetrics() results
+ * @returns {Object[]} Merged metrics
+ */
+export function mergeMetrics(sources) {
+  const merged = new Map();
+  for (const source of sources) {
+    for (const metric of source) {
+      let target = merged.get(metric.name);
+      if (!target) {
+        target = { ...metric, series: new Map() };
+        merged.set(metric.name, target);
+      }
+      for (const series of metric.series) {
+        const key = labelKey(series.labels);
+        const existing = target.series.get(key);
+        if (!existing) {
+          target.series.set(key, metric.type === 'histogram'
+            ? { ...series, buckets: [...series.buckets] }
+            : { ...series });
+        } else if (metric.type === 'histogram') {
+          series.buckets.forEach((count, i) => { existing.buckets[i] += count; });
+          existing.sum += series.sum;
+          existing.count += series.count;
+        } else {
+          existing.value += series.value;
+        }
+      }
+    }
+  }
+  return [...merged.values()].map(metric => ({ ...metric, series: [...metric.series.values()] }));
+}
+
+function formatLabels(labels, extra) {
+  const pairs = Object.entries({ ...labels, ...extra })
+    .map(([key, value]) => `${key}="${String(value).replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n')}"`);
+  return pairs.length > 0 ? `{${pairs.join(',')}}` : '';
+}
+
+/**
+ * Render metrics in the Prometheus text exposition format
+ * @param {Object[]} collected - collectMetrics()/mergeMetrics() result
+ * @returns {string} Exposition text
+ */
+export function renderMetrics(collected) {
+  const lines = [];
+  for (const metric of collected) {
+    lines.push(`# HELP ${metric.name} ${metric.help}`);
+    lines.push(`# TYPE ${metric.name} ${metric.type}`);
+    for (const series of metric.series) {
+      if (metric.type === 'histogram') {
+        let cumulative = 0;
+        DEFAULT_BUCKETS.forEach((bound, i) => {
+          cumulative += series.buckets[i];
+          lines.push(`${metric.name}_bucket${formatLabels(series.labels, { le: bound })} ${cumulative}`);
+        });
+        lines.push(`${metric.name}_bucket${formatLabels(series.labels, { le: '+Inf' })} ${series.count}`);
+        lines.push(`${metric.name}_sum${formatLabels(series.labels)} ${series.sum}`);
+        lines.push(`${metric.name}_count${formatLabels(series.labels)} ${series.count}`);
+      } else {
+        lines.push(`${metric.name}${formatLabels(series.labels)} ${series.value}`);
+      }
+    }
+  }
+  return lines.join('\n') + '\n';
+}
+
+// Pending scrape requests from this worker to the primary
+let nextRequestId = 1;
+const pendingScrapes = new Map();
+
+if (isWorker) {
+  process.on('message', (message) => {
+    if (!message || message.type !== MESSAGE_TYPE) return;
+
+    if (message.op === 'collect') {
+      process.send({ type: MESSAGE_TYPE, op: 'collected', id: message.id, metrics: collectMetrics() });
+    } else if (message.op === 'reply') {
+      const scrape = pendingScrapes.get(message.id);
+      if (!scrape) return;
+      pendingScrapes.delete(message.id);
+      clearTimeout(scrape.timer);
+      scrape.resolve(message.metrics);
+    }
+  });
+}
+
+/**
+ * Exposition text for a scrape; cluster-wide when running as a worker
+ * @returns {Promise<string>} Prometheus text format
+ */
+export async function getMetricsText() {
+  if (!isWorker) {
+    return renderMetrics(collectMetrics());
+  }
+
+  const merged = await new Promise((resolve) => {
+    const id = nextRequestId++;
+    const timer = setTimeout(() => {
+      // Primary unavailable: expose this worker alone
+      pendingScrapes.delete(id);
+      resolve(collectMetrics());
+    }, COLLECT_TIMEOUT * 2);
+    pendingScrapes.set(id, { resolve, timer });
+    process.send({ type: MESSAGE_TYPE, op: 'scrape', id });
+  });
+  return renderMetrics(merged);
+}
+
+/**
+ * Answer worker scrapes by collecting from every worker. Call once in the primary.
+ * @param {import('cluster').Cluster} clusterInstance - Node cluster module
+ */
+export function attachStageMetricsPrimary(clusterInstance = cluster) {
+  let nextCollectId = 1;
+  const collections = new Map();
+
+  clusterInstance.on('message', (worker, message) => {
+    if (!message || message.type !== MESSAGE_TYPE) return;
+
+    if (message.op === 'scrape') {
+      const workers = Object.values(clusterInstance.workers).filter(w => w && w.isConnected());
+      const id = nextCollectId++;
+      const collection = { results: [], remaining: workers.length, timer: null };
+
+      const finish = () => {
+        clearTimeout(collection.timer);
+        collections.delete(id);
+        if (worker.isConnected()) {
+          worker.send({ type: MESSAGE_TYPE, op: 'reply', id: message.id, metrics: mergeMetrics(collection.results) });
+        }
+      };
+      collection.finish = finish;
+      collection.timer = setTimeout(finish, COLLECT_TIMEOUT);
+      collections.set(id, collection);
+
+      for (const target of workers) {
+        target.send({ type: MESSAGE_TYPE, op: 'collect', id });
+      }
+    } else if (message.op === 'collected') {
+      const collection = collections.get(message.id);
+      if (!collection) return;
+      collection.results.push(message.metrics);
+      if (--collection.remaining === 0) collection.finish();
+    }
+  });
+}
+
+export default {
+  histogramSeries,
+  incrementCounter,
+  registerGauge,
+  timeStage,
+  requestMetrics,
+  markHandlerStart,
+  collectMetrics,
+  mergeMetrics,
+  renderMetrics,
+  getMetricsText,
+  attachStageMetricsPrimary
+};
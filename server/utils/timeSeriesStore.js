@@ -0,0 +1,295 @@
+import fs from 'fs';
+import os from 'os';
+
+// Fixed-size counters over time at several resolutions (per second, minute
+// and hour by default). Each resolution is a ring of rows, one row per time
+// bucket: the bucket number followed by one 32-bit counter per series. A
+// count is added to the current row of every resolution, so the coarser
+// rings hold the rollup of the finer ones and outlive them. Rows are reused
+// when the ring wraps, so memory and file size never grow.
+//
+// The whole store is one byte image that is also the file format: a header
+// (magic, version, resolutions, series names) followed by the rings,
+// little-endian. Saving writes only the rows changed since the last save.
+
+const MAGIC = 0x5354424e; // "NBTS"
+const FORMAT_VERSION = 1;
+const MAX_POINTS = 10000;
+
+export const DEFAULT_RESOLUTIONS = [
+  { name: 'second', step: 1000, slots: 3600 }, // 1 hour
+  { name: 'minute', step: 60 * 1000, slots: 2880 }, // 2 days
+  { name: 'hour', step: 60 * 60 * 1000, slots: 2160 } // 90 days
+];
+
+function encodeHeader(series, resolutions) {
+  const names = Buffer.from(series.join('\n'), 'utf8');
+  const length = Math.ceil((20 + resolutions.length * 8 + names.length) / 4) * 4;
+  const header = Buffer.alloc(length);
+  header.writeUInt32LE(MAGIC, 0);
+  header.writeUInt32LE(FORMAT_VERSION, 4);
+  header.writeUInt32LE(resolutions.length, 8);
+  header.writeUInt32LE(series.length, 12);
+  header.writeUInt32LE(names.length, 16);
+  resolutions.forEach((resolution, i) => {
+    header.writeUInt32LE(resolution.step, 20 + i * 8);
+    header.writeUInt32LE(resolution.slots, 24 + i * 8);
+  });
+  names.copy(header, 20 + resolutions.length * 8);
+  return header;
+}
+
+function decodeHeader(data) {
+  if (data.length < 20 || data.readUInt32LE(0) !== MAGIC || data.readUInt32LE(4) !== FORMAT_VERSION) {
+    return null;
+  }
+  const resolutionCount = data.readUInt32LE(8);
+  const seriesCount = data.readUInt32LE(12);
+  const namesLength = data.readUInt32LE(16);
+  const namesStart = 20 + resolutionCount * 8;
+  const resolutions = Array.from({ length: resolutionCount }, (_, i) => ({
+    step: data.readUInt32LE(20 + i * 8),
+    slots: data.readUInt32LE(24 + i * 8)
+  }));
+  const series = seriesCount > 0 ? data.toString('utf8', namesStart, namesStart + namesLength).split('\n') : [];
+  return { resolutions, series, length: Math.ceil((namesStart + namesLength) / 4) * 4 };
+}
+
+/**
+ * Create a multi-resolution counter store
+ * @param {Object} options - Store options
+ * @param {string[]} options.series - Counter names, fixed for the life of the store
+ * @param {Object[]} options.resolutions - { name, step (ms), slots } per ring, finest first
+ * @param {string|null} options.file - Binary file to load from and save to
+ * @param {Function} options.now - Clock in milliseconds
+ * @returns {Object} Store with add(), query(), reset(), flush() and getStats()
+ */
+export function createTimeSeriesStore({
+  series,
+  resolutions = DEFAULT_RESOLUTIONS,
+  file = null,
+  now = Date.now
+}) {
+  const columns = new Map(series.map((name, i) => [name, i]));
+  const width = series.length + 1; // bucket number, then one counter per series
+  const header = encodeHeader(series, resolutions);
+
+  let byteOffset = header.length;
+  const tiers = resolutions.map((resolution) => {
+    const tier = { ...resolution, byteOffset, dirty: new Uint8Array(resolution.slots), dirtySlots: [] };
+    byteOffset += resolution.slots * width * 4;
+    return tier;
+  });
+  const image = new Uint8Array(byteOffset);
+  image.set(header);
+  for (const tier of tiers) {
+    tier.rows = new Uint32Array(image.buffer, tier.byteOffset, tier.slots * width);
+  }
+
+  // Typed arrays use the host byte order, which the format fixes as little-endian
+  const persistent = Boolean(file) && os.endianness() === 'LE';
+  let fullWrite = true;
+  let fd = null;
+
+  function markDirty(tier, slot) {
+    if (tier.dirty[slot]) return;
+    tier.dirty[slot] = 1;
+    tier.dirtySlots.push(slot);
+  }
+
+  function clearDirty() {
+    for (const tier of tiers) {
+      tier.dirty.fill(0);
+      tier.dirtySlots.length = 0;
+    }
+  }
+
+  // Copy the rings of a file written with other series or resolutions
+  function migrate(data, layout) {
+    let offset = layout.length;
+    for (const stored of layout.resolutions) {
+      const tier = tiers.find(candidate => candidate.step === stored.step && candidate.slots === stored.slots);
+      const storedWidth = layout.series.length + 1;
+      if (tier && offset + stored.slots * storedWidth * 4 <= data.length) {
+        const rows = new Uint32Array(data.buffer.slice(data.byteOffset + offset, data.byteOffset + offset + stored.slots * storedWidth * 4));
+        for (let slot = 0; slot < stored.slots; slot++) {
+          tier.rows[slot * width] = rows[slot * storedWidth];
+          layout.series.forEach((name, column) => {
+            const target = columns.get(name);
+            if (target !== undefined) tier.rows[slot * width + 1 + target] = rows[slot * storedWidth + 1 + column];
+          });
+        }
+      }
+      offset += stored.slots * storedWidth * 4;
+    }
+  }
+
+  if (persistent && fs.existsSync(file)) {
+    try {
+      const data = fs.readFileSync(file);
+      if (data.length === image.length && data.subarray(0, header.length).equals(header)) {
+        image.set(data);
+        fullWrite = false;
+      } else {
+        const layout = decodeHeader(data);
+        if (layout) {
+          migrate(data, layout);
+        } else {
+          console.warn(`⚠️ Ignoring unreadable time-series file ${file}`);
+        }
+      }
+    } catch (error) {
+      console.warn('Warning: Could not load time series:', error.message);
+    }
+  }
+
+  /**
+   * Add to a counter
+   * @param {string} name - Series name
+   * @param {number} count - Amount to add
+   * @param {number} time - Event time in milliseconds
+   * @returns {boolean} Whether the series exists
+   */
+  function add(name, count = 1, time = now()) {
+    const column = columns.get(name);
+    if (column === undefined) return false;
+
+    for (const tier of tiers) {
+      const bucket = Math.floor(time / tier.step);
+      const slot = bucket % tier.slots;
+      const row = slot * width;
+      const stored = tier.rows[row];
+      if (stored !== bucket) {
+        // Older than this ring still holds
+        if (stored > bucket) continue;
+        tier.rows.fill(0, row, row + width);
+        tier.rows[row] = bucket;
+      }
+      tier.rows[row + 1 + column] += count;
+      markDirty(tier, slot);
+    }
+    return true;
+  }
+
+  /**
+   * Read counters over a time range. Without a resolution, the finest ring
+   * that still covers `from` is used; `step` sums neighbouring buckets.
+   * @param {Object} options - Query options
+   * @param {string[]} options.series - Series to return (all by default)
+   * @param {number} options.from - Range start in milliseconds (default: an hour ago)
+   * @param {number} options.to - Range end in milliseconds (default: now)
+   * @param {string} options.resolution - Ring name
+   * @param {number} options.step - Bucket width of the result in milliseconds
+   * @returns {Object} { resolution, step, from, to, points, series: { name: number[] } }
+   */
+  function query({ series: names = series, from, to, resolution, step } = {}) {
+    const current = now();
+    const end = to ?? current;
+    const start = from ?? end - 60 * 60 * 1000;
+    if (!Number.isFinite(start) || !Number.isFinite(end) || start > end) {
+      throw new RangeError('Invalid time range');
+    }
+
+    const tier = resolution
+      ? tiers.find(candidate => candidate.name === resolution)
+      : tiers.find(candidate => current - start < candidate.step * candidate.slots) || tiers[tiers.length - 1];
+    if (!tier) {
+      throw new RangeError(`Unknown resolution "${resolution}"`);
+    }
+    const selected = names.map((name) => {
+      const column = columns.get(name);
+      if (column === undefined) throw new RangeError(`Unknown series "${name}"`);
+      return column;
+    });
+
+    const group = step ? Math.max(1, Math.round(step / tier.step)) : 1;
+    const first = Math.floor(start / tier.step);
+    const last = Math.floor(end / tier.step);
+    const points = Math.floor((last - first) / group) + 1;
+    if (points > MAX_POINTS) {
+      throw new RangeError(`Range spans ${points} points; use a coarser resolution or step (max ${MAX_POINTS})`);
+    }
+
+    const values = selected.map(() => new Array(points).fill(0));
+    // Only buckets the ring still holds; the rest read as zero
+    const newest = Math.floor(current / tier.step);
+    for (let bucket = Math.max(first, newest - tier.slots + 1); bucket <= Math.min(last, newest); bucket++) {
+      const row = (bucket % tier.slots) * width;
+      if (tier.rows[row] !== bucket) continue;
+      const point = Math.floor((bucket - first) / group);
+      for (let i = 0; i < selected.length; i++) {
+        values[i][point] += tier.rows[row + 1 + selected[i]];
+      }
+    }
+
+    return {
+      resolution: tier.name,
+      step: tier.step * group,
+      from: first * tier.step,
+      to: (last + 1) * tier.step,
+      points,
+      series: Object.fromEntries(names.map((name, i) => [name, values[i]]))
+    };
+  }
+
+  /**
+   * Write changed rows to the file (the whole image after a load or reset)
+   */
+  function flush() {
+    if (!persistent) return;
+    try {
+      if (fullWrite) {
+        if (fd !== null) {
+          fs.closeSync(fd);
+          fd = null;
+        }
+        const temporary = `${file}.tmp`;
+        fs.writeFileSync(temporary, image);
+        fs.renameSync(temporary, file);
+        fullWrite = false;
+      } else {
+        fd ??= fs.openSync(file, 'r+');
+        for (const tier of tiers) {
+          for (const slot of tier.dirtySlots) {
+            const offset = tier.byteOffset + slot * width * 4;
+            fs.writeSync(fd, image, offset, width * 4, offset);
+          }
+        }
+      }
+      clearDirty();
+    } catch (error) {
+      console.warn('Warning: Could not save time series:', error.message);
+      if (fd !== null) {
+        fs.closeSync(fd);
+        fd = null;
+      }
+      fullWrite = true;
+    }
+  }
+
+  return {
+    series,
+    add,
+    query,
+    flush,
+
+    reset() {
+      image.fill(0, header.length);
+      clearDirty();
+      fullWrite = true;
+    },
+
+    getStats() {
+      return {
+        series: series.length,
+        bytes: image.length,
+        resolutions: tiers.map(({ name, step, slots }) => ({ name, step, slots, span: step * slots }))
+      };
+    }
+  };
+}
+
+export default {
+  DEFAULT_RESOLUTIONS,
+  createTimeSeriesStore
+};